@@ -0,0 +1,72 @@
+"""Benchmark the array formatters against the scalar formatters in a loop.
+
+Run with:
+    python benchmarks/bench_formatters.py --rows 1000000
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from trainer.utils.formatters import (
+    format_distance,
+    format_distances,
+    format_duration,
+    format_durations,
+    format_pace,
+    format_paces,
+)
+
+
+def timed(func: Callable[[], Any]) -> tuple[Any, float]:
+    """Return the result of func and its wall time in seconds."""
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def compare(label: str, scalar: Callable[[], list[str]], vectorized: Callable[[], Any]) -> None:
+    """Time both variants, check their outputs agree and print the speed-up."""
+    expected, scalar_time = timed(scalar)
+    actual, vector_time = timed(vectorized)
+    assert actual.tolist() == expected, f"{label}: outputs differ"
+    print(
+        f"  {label:<10} scalar {scalar_time * 1000:9.1f} ms   "
+        f"array {vector_time * 1000:8.1f} ms   {scalar_time / vector_time:5.1f}x"
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    meters = rng.uniform(0, 50_000, args.rows)
+    seconds = rng.integers(0, 30_000, args.rows)
+    meters_list, seconds_list = meters.tolist(), seconds.tolist()
+
+    print(f"Formatting {args.rows:,} rows")
+    compare(
+        "duration",
+        lambda: [format_duration(s) for s in seconds_list],
+        lambda: format_durations(seconds),
+    )
+    compare(
+        "distance",
+        lambda: [format_distance(m) for m in meters_list],
+        lambda: format_distances(meters),
+    )
+    compare(
+        "pace",
+        lambda: [format_pace(m, s) for m, s in zip(meters_list, seconds_list)],
+        lambda: format_paces(meters, seconds),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark bulk import of activity files.
+
+Writes synthetic hour-long GPX tracks (one point per second) to a temporary
+directory and reports import throughput in files per second for increasing
+numbers of worker processes. With ``--zip`` the files are packed into one zip
+archive first, like a Strava bulk export.
+
+Run with:
+    python benchmarks/bench_import.py --files 200 --workers 1 2 4
+    python benchmarks/bench_import.py --files 4000 --seconds 60 --workers 1 --zip
+"""
+
+import argparse
+import os
+import tempfile
+import zipfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from trainer.importers import run_import
+
+POINT = (
+    '<trkpt lat="{lat:.6f}" lon="{lon:.6f}"><ele>{ele:.1f}</ele><time>{time}</time>'
+    "<extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>{hr}</gpxtpx:hr>"
+    "</gpxtpx:TrackPointExtension></extensions></trkpt>\n"
+)
+
+
+def write_gpx(path: Path, start: datetime, seconds: int) -> None:
+    """Write a synthetic run with one track point per second."""
+    with open(path, "w") as f:
+        f.write(
+            '<?xml version="1.0"?>\n<gpx version="1.1" '
+            'xmlns="http://www.topografix.com/GPX/1/1" '
+            'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">'
+            "<trk><type>running</type><trkseg>\n"
+        )
+        for second in range(seconds):
+            f.write(
+                POINT.format(
+                    lat=51.5 + second * 2e-5,
+                    lon=-0.1 + second * 1e-5,
+                    ele=20 + (second % 300) / 10,
+                    time=(start + timedelta(seconds=second)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    hr=120 + second % 40,
+                )
+            )
+        f.write("</trkseg></trk></gpx>\n")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--seconds", type=int, default=3600, help="Track length per file")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1})
+    )
+    parser.add_argument("--zip", action="store_true", help="Import from one zip archive")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = datetime(2020, 1, 1, 7, tzinfo=timezone.utc)  # noqa: UP017
+        for index in range(args.files):
+            write_gpx(Path(directory) / f"{index}.gpx", start + timedelta(days=index), args.seconds)
+        size = sum(path.stat().st_size for path in Path(directory).iterdir())
+        source = directory
+        if args.zip:
+            source = os.path.join(directory, "export.zip")
+            with zipfile.ZipFile(source, "w", zipfile.ZIP_DEFLATED) as archive:
+                for path in sorted(Path(directory).glob("*.gpx")):
+                    archive.write(path, f"activities/{path.name}")
+                    path.unlink()
+
+        print(
+            f"\n{args.files:,} GPX files of {args.seconds:,} points ({size / 1e6:.0f} MB)"
+            + (" in a zip archive" if args.zip else "")
+        )
+        for workers in args.workers:
+            stats = run_import([source], workers=workers)
+            assert stats.imported == args.files
+            print(f"  {workers:>2} worker(s) {stats.files_per_second:10,.1f} files/s")
+
+
+if __name__ == "__main__":
+    main()
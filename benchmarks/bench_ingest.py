@@ -0,0 +1,85 @@
+"""Benchmark bulk ingestion of Strava activity JSON.
+
+Compares building Workout models one at a time with the bulk TypeAdapter,
+trusted model_construct and incremental streaming paths, reported as
+activities per second.
+
+Run with:
+    python benchmarks/bench_ingest.py --rows 10000 100000
+"""
+
+import argparse
+import io
+import json
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from trainer.models import Workout
+from trainer.models.ingest import construct_workouts, iter_workouts, parse_workouts
+
+ACTIVITY_TYPES = ["Run", "Ride", "Swim", "Walk", "Hike"]
+
+
+def make_activities(rows: int, seed: int = 42) -> list[dict[str, Any]]:
+    """Generate raw activities shaped like Strava API responses."""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)  # noqa: UP017
+    return [
+        {
+            "id": 10_000_000 + i,
+            "name": f"Activity {i}",
+            "type": rng.choice(ACTIVITY_TYPES),
+            "start_date": (start + timedelta(hours=rng.randint(0, 40_000))).isoformat(),
+            "distance": rng.uniform(500, 40_000),
+            "moving_time": rng.randint(600, 14_400),
+            "elapsed_time": rng.randint(600, 16_000),
+            "total_elevation_gain": rng.uniform(0, 800),
+            "average_heartrate": rng.uniform(110, 170),
+            "max_heartrate": rng.uniform(150, 195),
+            "average_speed": rng.uniform(1, 12),
+        }
+        for i in range(rows)
+    ]
+
+
+def measure(label: str, rows: int, func: Callable[[], Any], repeat: int = 3) -> None:
+    """Print the best throughput of several runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<44} {rows / best:12,.0f} activities/s")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        activities = make_activities(rows)
+        payload = json.dumps(activities).encode()
+        trusted = [workout.model_dump() for workout in parse_workouts(payload)]
+
+        print(f"\n{rows:,} activities ({len(payload) / 1e6:.1f} MB of JSON)")
+        measure(
+            "json.loads + Workout(**record)",
+            rows,
+            lambda: [Workout(**record) for record in json.loads(payload)],
+        )
+        measure("parse_workouts (TypeAdapter.validate_json)", rows, lambda: parse_workouts(payload))
+        measure(
+            "iter_workouts (streaming, 64 KiB reads)",
+            rows,
+            lambda: sum(1 for _ in iter_workouts(io.BytesIO(payload))),
+        )
+        measure("construct_workouts (trusted)", rows, lambda: construct_workouts(trusted))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Benchmark conversations replayed from a cassette.
+
+Records a synthetic conversation (a model that calls a Strava tool, then
+answers, with production-like latencies), or loads a cassette recorded with
+TRAINER_CASSETTE_MODE=record, and replays it through TrainerAgent for
+increasing numbers of concurrent users. Instant replay measures the agent's
+own overhead; --realtime replay waits the recorded latencies, so queueing in
+the LLM scheduler shows up as it would in production.
+
+Run with:
+    python benchmarks/bench_replay.py --users 1 10 50 --realtime
+    python benchmarks/bench_replay.py --cassette cassettes/session.jsonl --realtime
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from mcp.types import CallToolResult, TextContent
+
+from trainer.agents import TrainerAgent
+from trainer.tools import Cassette, CassetteMode, set_cassette, strava_mcp
+
+MODEL_LATENCY = 0.4
+TOOL_LATENCY = 0.15
+MESSAGE = "What was my last run?"
+
+
+class SyntheticLlm(BaseLlm):
+    """Model that looks up recent activities, then answers."""
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return ["synthetic-.*"]
+
+    async def generate_content_async(self, llm_request, stream=False):
+        await asyncio.sleep(MODEL_LATENCY)
+        last = llm_request.contents[-1].parts[0]
+        if last.function_response:
+            part = types.Part(text="Your last run was 5 km at 5:10/km.")
+        else:
+            call = types.FunctionCall(name="get_recent_activities", args={"per_page": 5})
+            part = types.Part(function_call=call)
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+class SyntheticSession:
+    """MCP session that answers every tool call after a delay."""
+
+    async def call_tool(self, name, arguments=None):
+        await asyncio.sleep(TOOL_LATENCY)
+        text = '{"id": 1, "firstname": "Sam"}' if name == "get-athlete-profile" else "[]"
+        return CallToolResult(content=[TextContent(type="text", text=text)])
+
+
+async def record(path: Path) -> tuple[str, list[str]]:
+    """Record the synthetic conversation."""
+    LLMRegistry.register(SyntheticLlm)
+    strava_mcp._mcp_session = SyntheticSession()  # type: ignore[assignment]
+    set_cassette(Cassette(path, mode=CassetteMode.RECORD))
+    agent = TrainerAgent(model_name="synthetic-model", heavy_model_name=None)
+    await agent.process_message(MESSAGE)
+    strava_mcp._mcp_session = None
+    return "synthetic-model", [MESSAGE]
+
+
+def recorded_conversation(path: Path) -> tuple[str, list[str]]:
+    """Find the model and the user messages in a cassette."""
+    model, messages = "", []
+    for line in path.read_text().splitlines():
+        interaction = json.loads(line)
+        if interaction["kind"] != "llm":
+            continue
+        model = interaction["request"]["model"]
+        last = interaction["request"]["contents"][-1]
+        texts = [part["text"] for part in last.get("parts", []) if "text" in part]
+        if last.get("role") == "user" and texts and "".join(texts) not in messages:
+            messages.append("".join(texts))
+    return model, messages
+
+
+async def converse(user: int, model: str, messages: list[str]) -> float:
+    """Send every message as one user, returning the conversation latency."""
+    agent = TrainerAgent(
+        model_name=model, heavy_model_name=None, user_id=f"user-{user}", session_id="bench"
+    )
+    started = time.perf_counter()
+    for message in messages:
+        await agent.process_message(message)
+    return time.perf_counter() - started
+
+
+async def replay(path: Path, users: int, model: str, messages: list[str], realtime: bool):
+    """Replay the conversation for many users at once and print throughput."""
+    cassette = Cassette(path, realtime=realtime, allow_repeats=True)
+    set_cassette(cassette)
+    started = time.perf_counter()
+    latencies = sorted(
+        await asyncio.gather(*(converse(user, model, messages) for user in range(users)))
+    )
+    elapsed = time.perf_counter() - started
+    assert cassette.misses == 0, "conversation did not replay as recorded"
+    print(
+        f"  {users:>4} users {users / elapsed:10,.1f} conversations/s"
+        f"   p50 {statistics.median(latencies):6.2f}s"
+        f"   p99 {latencies[int(0.99 * (users - 1))]:6.2f}s"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Run the benchmark."""
+    with tempfile.TemporaryDirectory() as directory:
+        if args.cassette:
+            path = args.cassette
+            model, messages = recorded_conversation(path)
+        else:
+            path = Path(directory) / "synthetic.jsonl"
+            model, messages = await record(path)
+
+        mode = "real-time" if args.realtime else "instant"
+        print(f"\n{mode} replay of {len(messages)} message(s) to {model} from {path}")
+        for users in args.users:
+            await replay(path, users, model, messages, args.realtime)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cassette", type=Path, help="Cassette to replay (default: synthetic)")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--realtime", action="store_true", help="Wait recorded latencies")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark materialized weekly rollups against aggregating on demand.
+
+Loads synthetic activities into an ActivityStore with ActivityRollups attached,
+then compares reading an 8-week table from the rollups with building it from
+the stored activities (through a WorkoutTable) for every question. Also
+reports the cost the rollups add to each activity update.
+
+Run with:
+    python benchmarks/bench_rollups.py --rows 10000 100000
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+from trainer.models import Workout
+from trainer.sync import ActivityRollups, ActivityStore, Period
+from trainer.sync.rollups import previous_period
+
+ACTIVITY_TYPES = ["Run", "Ride", "Swim", "Walk"]
+TODAY = date(2025, 10, 8)
+
+
+def make_workouts(rows: int, seed: int = 42) -> list[Workout]:
+    """Generate workouts spread over the last ten years."""
+    rng = random.Random(seed)
+    end = datetime(TODAY.year, TODAY.month, TODAY.day, tzinfo=timezone.utc)  # noqa: UP017
+    return [
+        Workout(
+            id=str(i),
+            name=f"Activity {i}",
+            type=rng.choice(ACTIVITY_TYPES),
+            start_date=end - timedelta(hours=rng.randint(0, 87_600)),
+            distance=rng.uniform(500, 40_000),
+            duration=rng.randint(600, 14_400),
+            elevation_gain=rng.uniform(0, 800),
+        )
+        for i in range(rows)
+    ]
+
+
+def on_demand_table(store: ActivityStore, weeks: int) -> list[float]:
+    """Weekly distance for the last weeks, aggregated from the stored activities."""
+    table = store.table(1)
+    start = TODAY - timedelta(days=TODAY.weekday())
+    totals = []
+    for _ in range(weeks):
+        since = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)  # noqa: UP017
+        week = table.filter(start=since, end=since + timedelta(days=7))
+        totals.append(week.total("distance"))
+        start = previous_period(start, Period.WEEK)
+    return totals[::-1]
+
+
+def measure(label: str, func: Callable[[], Any], repeat: int = 5) -> float:
+    """Print and return the best time of several runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<44} {best * 1000:10.3f} ms")
+    return best
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--weeks", type=int, default=8)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        workouts = make_workouts(rows)
+        print(f"\n{rows:,} activities")
+
+        plain = ActivityStore()
+        store = ActivityStore()
+        rollups = ActivityRollups()
+        store.add_listener(rollups.on_activity_change)
+        plain_time = measure("load without rollups", lambda: [plain.upsert(1, w) for w in workouts])
+        rollup_time = measure("load with rollups", lambda: [store.upsert(1, w) for w in workouts])
+        print(f"  rollup cost per update {(rollup_time - plain_time) / rows * 1e6:23.2f} us")
+
+        expected = on_demand_table(store, args.weeks)
+        table = rollups.table(1, periods=args.weeks, today=TODAY)
+        assert all(
+            abs(row.totals.distance - total) < 1e-3
+            for row, total in zip(table, expected, strict=True)
+        )
+        slow = measure(
+            f"{args.weeks}-week table, on demand", lambda: on_demand_table(store, args.weeks)
+        )
+        fast = measure(
+            f"{args.weeks}-week table, from rollups",
+            lambda: rollups.table(1, periods=args.weeks, today=TODAY),
+        )
+        print(f"  speed-up {slow / fast:38,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark clustering an athlete's history into repeated routes.
+
+Generates synthetic routes around a home location (loops and out-and-backs of
+a few to tens of kilometers), then activities that each follow one of them
+with GPS noise, in either direction and, for loops, from any start point.
+Reports the time to decode and cluster the whole history, how well the routes
+found match the generated ones, and the time to add one more activity.
+
+Run with:
+    python benchmarks/bench_routes.py --activities 10000 --routes 300
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from trainer.models import Workout
+from trainer.routes import RouteIndex, encode_polyline
+
+HOME = (51.75, -1.26)
+METERS_PER_DEGREE = 111_320.0
+
+
+def make_route(rng: np.random.Generator) -> np.ndarray:
+    """Generate a route as (n, 2) offsets from home, in meters, about 50 m apart."""
+    length = rng.uniform(3_000, 40_000)
+    steps = int(length / 50)
+    if rng.random() < 0.6:
+        # Loop: a wobbly circle through a point near home
+        radius = length / (2 * np.pi)
+        angle = np.linspace(0, 2 * np.pi, steps) + rng.uniform(0, 2 * np.pi)
+        wobble = 1 + 0.15 * np.sin(angle * rng.integers(2, 6))
+        center = rng.normal(0, 2_000, 2)
+        return center + radius * wobble[:, None] * np.column_stack([np.cos(angle), np.sin(angle)])
+    # Out-and-back along a random walk
+    heading = np.cumsum(rng.normal(0, 0.2, steps // 2)) + rng.uniform(0, 2 * np.pi)
+    out = np.cumsum(50 * np.column_stack([np.cos(heading), np.sin(heading)]), axis=0)
+    return np.concatenate([out, out[::-1]]) + rng.normal(0, 1_000, 2)
+
+
+def follow(route: np.ndarray, rng: np.random.Generator) -> tuple[str, float]:
+    """Encode a noisy effort on a route, returning its polyline and length."""
+    path = route[::-1] if rng.random() < 0.5 else route
+    if np.allclose(path[0], path[-1], atol=100):
+        path = np.roll(path, rng.integers(len(path)), axis=0)
+    path = path + rng.normal(0, 5, path.shape)
+    length = float(np.hypot(*np.diff(path, axis=0).T).sum())
+    latitude = HOME[0] + path[:, 1] / METERS_PER_DEGREE
+    longitude = HOME[1] + path[:, 0] / (METERS_PER_DEGREE * np.cos(np.radians(HOME[0])))
+    return encode_polyline(latitude, longitude), length
+
+
+def make_history(activities: int, routes: int, seed: int = 42) -> tuple[list[Workout], list[int]]:
+    """Generate activities oldest first, and the route each one followed."""
+    rng = np.random.default_rng(seed)
+    pick = random.Random(seed)
+    shapes = [make_route(rng) for _ in range(routes)]
+    # A few favourite routes account for most activities
+    weights = [1 / (rank + 1) for rank in range(routes)]
+    start = datetime(2016, 1, 1, 7, tzinfo=timezone.utc)  # noqa: UP017
+    workouts, truth = [], []
+    for i in range(activities):
+        route = pick.choices(range(routes), weights)[0]
+        polyline, length = follow(shapes[route], rng)
+        workouts.append(
+            Workout(
+                id=str(i),
+                name=f"Activity {i}",
+                type="Run",
+                start_date=start + timedelta(hours=8 * i),
+                distance=length,
+                duration=round(length / rng.uniform(2.5, 4.0)),
+                average_heartrate=float(rng.uniform(130, 170)),
+                polyline=polyline,
+            )
+        )
+        truth.append(route)
+    return workouts, truth
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--activities", type=int, default=10_000)
+    parser.add_argument("--routes", type=int, default=300)
+    args = parser.parse_args()
+
+    workouts, truth = make_history(args.activities, args.routes)
+    points = sum(len(w.polyline or "") for w in workouts) / len(workouts)
+    print(f"{args.activities:,} activities on {args.routes} routes ({points:.0f} polyline chars)")
+
+    index = RouteIndex()
+    started = time.perf_counter()
+    index.add(workouts[:-1])
+    elapsed = time.perf_counter() - started
+    print(f"  cluster history {elapsed:31.2f} s")
+
+    started = time.perf_counter()
+    index.add(workouts[-1:])
+    print(f"  add one activity {(time.perf_counter() - started) * 1000:27.2f} ms")
+
+    found: dict[int, set[int]] = {}
+    for workout, route in zip(workouts, truth, strict=True):
+        cluster = index.route_of(workout.id)
+        assert cluster is not None
+        found.setdefault(route, set()).add(id(cluster))
+    clusters = {id(index.route_of(w.id)) for w in workouts}
+    used = len(set(truth))
+    split = sum(len(ids) - 1 for ids in found.values())
+    merged = used + split - len(clusters)
+    print(f"  routes found {len(clusters):>26} (of {used}; {split} splits, {merged} merges)")
+
+
+if __name__ == "__main__":
+    main()
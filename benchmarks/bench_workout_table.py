@@ -0,0 +1,106 @@
+"""Benchmark WorkoutTable against a plain list of Workout models.
+
+Compares memory use and the time taken to build, filter and aggregate a
+large synthetic set of activities.
+
+Run with:
+    python benchmarks/bench_workout_table.py --rows 100000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from trainer.models import Workout, WorkoutTable
+
+ACTIVITY_TYPES = ["Run", "Ride", "Swim", "Walk", "Hike", "WeightTraining"]
+
+
+def make_workouts(rows: int, seed: int = 42) -> list[Workout]:
+    """Generate synthetic, validated workouts."""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)  # noqa: UP017
+    return [
+        Workout(
+            id=str(10_000_000 + i),
+            name=f"Activity {i}",
+            type=rng.choice(ACTIVITY_TYPES),
+            start_date=start + timedelta(hours=rng.randint(0, 5 * 365 * 24)),
+            distance=rng.uniform(500, 40_000),
+            duration=rng.randint(600, 14_400),
+            elevation_gain=rng.uniform(0, 800) if rng.random() > 0.2 else None,
+            average_heartrate=rng.uniform(110, 170) if rng.random() > 0.3 else None,
+            max_heartrate=rng.uniform(150, 195) if rng.random() > 0.3 else None,
+            average_speed=rng.uniform(1, 12),
+            calories=rng.uniform(100, 2000),
+        )
+        for i in range(rows)
+    ]
+
+
+def measure(label: str, func: Callable[[], Any], repeat: int = 5) -> Any:
+    """Print the best wall time of several runs and return the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<40} {best * 1000:10.2f} ms")
+    return result
+
+
+def traced_size(func: Callable[[], Any]) -> tuple[Any, int]:
+    """Return the result of func and the peak memory allocated while building it."""
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"Generating {args.rows:,} workouts...")
+    workouts, list_bytes = traced_size(lambda: make_workouts(args.rows))
+    table, table_bytes = traced_size(lambda: WorkoutTable.from_workouts(workouts))
+
+    print("\nMemory")
+    print(f"  {'list[Workout]':<40} {list_bytes / 1e6:10.1f} MB")
+    print(f"  {'WorkoutTable (peak while building)':<40} {table_bytes / 1e6:10.1f} MB")
+    print(f"  {'WorkoutTable (column arrays)':<40} {table.nbytes / 1e6:10.1f} MB")
+
+    since = datetime(2023, 1, 1, tzinfo=timezone.utc)  # noqa: UP017
+
+    print("\nFilter runs since 2023 and total their distance")
+    measure(
+        "list[Workout]",
+        lambda: sum(w.distance for w in workouts if w.type == "Run" and w.start_date >= since),
+    )
+    measure("WorkoutTable", lambda: table.filter(type="Run", start=since).total("distance"))
+
+    print("\nPer-type summary")
+
+    def summarize_list() -> dict[str, float]:
+        totals: dict[str, float] = {}
+        for workout in workouts:
+            totals[workout.type] = totals.get(workout.type, 0.0) + workout.distance
+        return totals
+
+    measure("list[Workout]", summarize_list)
+    measure("WorkoutTable", table.summary_by_type)
+
+    print("\nMaterialize 1,000 rows")
+    measure("WorkoutTable.row", lambda: [table[i] for i in range(min(1000, len(table)))])
+
+
+if __name__ == "__main__":
+    main()
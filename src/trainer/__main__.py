@@ -1,7 +1,10 @@
 """Main entry point for the trainer CLI."""
 
+import argparse
 import asyncio
+import contextlib
 import logging
+import os
 import sys
 
 from trainer.agents.trainer_agent import TrainerAgent
@@ -12,7 +15,69 @@ from trainer.utils.logging import setup_logging
 logger = logging.getLogger(__name__)
 
 
-async def async_main() -> int:
+async def run_webhook(args: argparse.Namespace) -> int:
+    """Serve the Strava webhook receiver."""
+    from trainer.sync import run_webhook_server
+
+    settings = get_settings()
+    try:
+        await run_webhook_server(args.host, args.port, settings.strava_webhook_verify_token)
+    except Exception as e:
+        logger.error(f"Error occurred: {e}", exc_info=True)
+        print(f"\n❌ Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        from trainer.tools import close_mcp_session
+
+        with contextlib.suppress(Exception):
+            await close_mcp_session()
+    return 0
+
+
+def import_files(args: argparse.Namespace) -> int:
+    """Import activity files recorded outside Strava."""
+    from trainer.importers import run_import
+
+    get_settings(load_dotenv_file=True)
+    setup_logging()
+
+    if args.output is None:
+        print("No --output directory given: files are only validated, not saved")
+    stats = run_import(args.paths, args.output, args.workers)
+    print(
+        f"Imported {stats.imported:,} of {stats.files:,} files in {stats.elapsed:.1f}s "
+        f"({stats.files_per_second:,.1f} files/s)"
+    )
+    if stats.duplicates:
+        print(f"{stats.duplicates:,} duplicate workouts (imported before, or in several files)")
+    if stats.failed:
+        print(f"❌ {stats.failed:,} files could not be imported", file=sys.stderr)
+    return 1 if stats.failed else 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    """Serve the chat API from a supervisor and several worker processes."""
+    from trainer.serve import run_server
+
+    settings = get_settings(load_dotenv_file=True)
+    setup_logging()
+
+    try:
+        run_server(
+            args.host,
+            args.port,
+            args.workers or os.cpu_count() or 1,
+            args.state_dir or settings.state_dir,
+            drain_timeout=args.drain_timeout,
+        )
+    except Exception as e:
+        logger.error(f"Error occurred: {e}", exc_info=True)
+        print(f"\n❌ Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+async def async_main(args: argparse.Namespace | None = None) -> int:
     """Async main function that runs the trainer agent."""
     # Load .env file for CLI usage (not done at import time for test speed)
     get_settings(load_dotenv_file=True)
@@ -20,6 +85,9 @@ async def async_main() -> int:
     setup_logging()
     logger.info("Starting trAIner CLI")
 
+    if args is not None and args.command == "webhook":
+        return await run_webhook(args)
+
     print("🏃 trAIner - Your AI Personal Trainer")
     print("=" * 40)
 
@@ -47,8 +115,12 @@ async def async_main() -> int:
 
 def main() -> int:
     """Entry point for the trainer CLI."""
-    parse_arguments()
-    return asyncio.run(async_main())
+    args = parse_arguments()
+    if args.command == "import":
+        return import_files(args)
+    if args.command == "serve":
+        return serve(args)
+    return asyncio.run(async_main(args))
 
 
 if __name__ == "__main__":
@@ -1,5 +1,14 @@
 """Agent implementations for the personal trainer."""
 
+from .router import ModelRouter, Route
+from .scheduler import LLMScheduler, SchedulerOverloadedError, get_llm_scheduler
 from .trainer_agent import TrainerAgent
 
-__all__ = ["TrainerAgent"]
+__all__ = [
+    "TrainerAgent",
+    "ModelRouter",
+    "Route",
+    "LLMScheduler",
+    "SchedulerOverloadedError",
+    "get_llm_scheduler",
+]
@@ -0,0 +1,180 @@
+"""Routing of requests between a fast model and a larger one.
+
+Most messages are quick lookups ("how far did I run yesterday?") that a small,
+fast model answers well from the athlete snapshot. Only planning and in-depth
+analysis benefit from a larger, slower model. Requests are classified with
+cheap keyword and length heuristics, so routing adds no model round trip.
+
+A few keywords ("plan", "analyze", ...) send a request to the larger model on
+their own. Other heavy keywords add up to a score, which lookup phrasing
+("what", "my last run") only lowers for messages with no heavy keywords: asking
+"what should I do to get faster?" still needs a considered answer.
+"""
+
+import logging
+import re
+import statistics
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+
+logger = logging.getLogger(__name__)
+
+
+class Route(str, Enum):
+    """Which model a request is sent to."""
+
+    FAST = "fast"
+    HEAVY = "heavy"
+
+
+# Keywords that on their own mean a request needs planning or in-depth reasoning
+DECISIVE_PATTERN = re.compile(
+    r"\b(plan|plans|planning|design\w*|analy[sz]\w*|periodi[sz]\w*|overtrain\w*)\b",
+    re.IGNORECASE,
+)
+
+# Patterns suggesting a request needs planning or in-depth reasoning, with weights
+HEAVY_PATTERNS: tuple[tuple[re.Pattern[str], float], ...] = tuple(
+    (re.compile(pattern, re.IGNORECASE), weight)
+    for pattern, weight in (
+        (r"\b(training|race|marathon|workout)?\s*plan(s|ning)?\b", 2.0),
+        (r"\b(schedule|program(me)?|periodi[sz]\w*|taper\w*|build[- ]?up|block)\b", 1.5),
+        (r"\b\d+[- ]?(week|month)s?\b", 1.5),
+        (r"\b(analy[sz]\w*|assess\w*|evaluat\w*|diagnos\w*|break ?down)\b", 1.5),
+        (r"\b(compar\w*|trends?|progress\w*|improv\w*|plateau\w*)\b", 1.0),
+        (r"\b(get(ting)? (faster|fitter|stronger)|sub[- ]?\d[\d:.]*|personal (best|record))", 1.5),
+        (r"\b(mileage|miles (a|per) week|volume|ultra\w*)\b", 1.0),
+        (r"\b(why|how (can|should|do) i|what should i|recommend\w*|advice|strategy)\b", 1.0),
+        (r"\b(injur\w*|recover\w*|overtrain\w*|fatigue)\b", 0.5),
+    )
+)
+
+# Patterns suggesting a simple lookup answerable from data at hand
+FAST_PATTERNS: tuple[tuple[re.Pattern[str], float], ...] = tuple(
+    (re.compile(pattern, re.IGNORECASE), weight)
+    for pattern, weight in (
+        (r"^\s*(what|when|how (far|long|many|much|fast)|which|did i|list|show)\b", 1.0),
+        (r"\b(yesterday|today|last (run|ride|swim|activity|workout|week)|this week)\b", 1.0),
+        (r"\b(distance|pace|heart ?rate|hr|time|total|count|kudos|elevation)\b", 0.5),
+        (r"^\s*(hi|hello|hey|thanks?( you)?|ok(ay)?|cool|great)\b", 1.5),
+    )
+)
+
+# Messages longer than this (in characters) count as heavy on their own
+LONG_MESSAGE = 400
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """The outcome of classifying a request."""
+
+    route: Route
+    score: float
+    reason: str
+
+
+@dataclass
+class RouteStats:
+    """Latency of requests sent down one route."""
+
+    requests: int = 0
+    total_latency: float = 0.0
+    recent: deque[float] = field(default_factory=lambda: deque(maxlen=500))
+
+    def record(self, latency: float) -> None:
+        """Record the latency of one request, in seconds."""
+        self.requests += 1
+        self.total_latency += latency
+        self.recent.append(latency)
+
+    @property
+    def median(self) -> float:
+        """Median latency of recent requests."""
+        return statistics.median(self.recent) if self.recent else 0.0
+
+
+class ModelRouter:
+    """Chooses a model for each request and tracks latency per route."""
+
+    def __init__(self, fast_model: str, heavy_model: str, threshold: float = 2.0):
+        """Initialize the router.
+
+        Args:
+            fast_model: Model for quick lookups and conversation
+            heavy_model: Model for planning and in-depth analysis
+            threshold: Heavy score at or above which a request is routed to the heavy model
+        """
+        self.models = {Route.FAST: fast_model, Route.HEAVY: heavy_model}
+        self.threshold = threshold
+        self.stats = {route: RouteStats() for route in Route}
+
+    def classify(self, message: str) -> RouteDecision:
+        """Decide which model should handle a message.
+
+        Args:
+            message: The user's message
+
+        Returns:
+            The routing decision, with the heuristic score and the reason for it
+        """
+        score = 0.0
+        reasons = []
+        for pattern, weight in HEAVY_PATTERNS:
+            # Distinct matches count, up to two per pattern
+            matches = list(
+                dict.fromkeys(match.group(0).strip().lower() for match in pattern.finditer(message))
+            )
+            score += weight * min(len(matches), 2)
+            reasons.extend(matches)
+        if not reasons:
+            # Lookup phrasing must not cancel out heavy keywords, only weaker signals
+            for pattern, weight in FAST_PATTERNS:
+                if pattern.search(message):
+                    score -= weight
+        if len(message) > LONG_MESSAGE:
+            score += self.threshold
+            reasons.append(f"{len(message)} chars")
+        # Several questions at once usually need a structured answer
+        if message.count("?") > 2:
+            score += 1.0
+            reasons.append("multiple questions")
+
+        decisive = DECISIVE_PATTERN.search(message)
+        if decisive and decisive.group(0).lower() not in reasons:
+            reasons.insert(0, decisive.group(0).lower())
+
+        if decisive or score >= self.threshold:
+            return RouteDecision(Route.HEAVY, score, ", ".join(reasons))
+        return RouteDecision(Route.FAST, score, "lookup" if not reasons else ", ".join(reasons))
+
+    def model_for(self, route: Route) -> str:
+        """Return the model name used for a route."""
+        return self.models[route]
+
+    def record(self, route: Route, latency: float) -> None:
+        """Record and log the latency of a request.
+
+        Args:
+            route: Route the request was sent down
+            latency: Seconds taken to respond
+        """
+        stats = self.stats[route]
+        stats.record(latency)
+        logger.info(
+            f"{route.value} route ({self.models[route]}) responded in {latency:.2f}s "
+            f"(median {stats.median:.2f}s over last {len(stats.recent)})"
+        )
+
+    def metrics(self) -> dict[str, float]:
+        """Request counts and latency per route, for monitoring.
+
+        Returns:
+            Dictionary of metric name to value
+        """
+        metrics: dict[str, float] = {}
+        for route, stats in self.stats.items():
+            metrics[f"{route.value}_requests"] = stats.requests
+            metrics[f"{route.value}_latency_median"] = stats.median
+            metrics[f"{route.value}_latency_total"] = stats.total_latency
+        return metrics
@@ -0,0 +1,410 @@
+"""Fair-share scheduling of LLM requests across users.
+
+When many users share one process, every model call goes through a single
+``LLMScheduler`` (agents use a ``ScheduledLlm`` wrapping their model). A slot is
+only held while the model generates, not while ADK runs tools or waits on the
+Strava quota between calls. The scheduler caps the number of LLM calls in
+flight, both globally and per user, and orders waiting requests with weighted
+fair queuing: each user's requests are tagged with a virtual finish time that
+advances by ``cost / weight`` per admitted request, so a user submitting many
+expensive requests cannot starve other users' quick questions. Users also have
+token budgets, refilled continuously, charged with the tokens each call
+actually used.
+
+Requests that cannot be served within the limits are shed with
+``SchedulerOverloadedError`` rather than queued indefinitely, which keeps tail
+latency bounded under bursty load.
+"""
+
+import asyncio
+import contextlib
+import logging
+import statistics
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Hashable
+from dataclasses import dataclass, field
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+
+from trainer.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Fewest users tracked before idle ones are forgotten
+PRUNE_USERS = 64
+
+
+class SchedulerOverloadedError(Exception):
+    """Raised when a request is shed because scheduling limits were exceeded."""
+
+    def __init__(self, user_id: Hashable, reason: str):
+        super().__init__(f"Request from {user_id} rejected: {reason}")
+        self.user_id = user_id
+        self.reason = reason
+
+
+@dataclass
+class _Request:
+    start: float  # Virtual start tag
+    finish: float  # Virtual finish tag
+    future: asyncio.Future[None]
+    enqueued_at: float
+
+
+@dataclass
+class _User:
+    weight: float
+    tokens: float  # Remaining token budget
+    refilled_at: float
+    in_flight: int = 0
+    last_finish: float = 0.0
+    queue: deque[_Request] = field(default_factory=deque)
+
+
+class Slot:
+    """Permission to make one LLM call, held while the call runs."""
+
+    def __init__(self, scheduler: "LLMScheduler", user_id: Hashable, wait: float):
+        self._scheduler = scheduler
+        self.user_id = user_id
+        self.wait = wait
+        self.tokens = 0
+
+    def charge(self, tokens: int) -> None:
+        """Charge tokens used by the call to the user's budget.
+
+        Args:
+            tokens: Number of tokens consumed
+        """
+        self.tokens += tokens
+        self._scheduler._charge(self.user_id, tokens)
+
+
+class LLMScheduler:
+    """Fair-share scheduler for LLM calls from many users."""
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        max_in_flight_per_user: int = 2,
+        tokens_per_minute: float | None = 200_000,
+        max_queued: int = 64,
+        max_queued_per_user: int = 8,
+        max_queue_wait: float | None = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            max_in_flight: Most LLM calls running at once across all users
+            max_in_flight_per_user: Most LLM calls running at once for one user
+            tokens_per_minute: Each user's token budget refill rate, which is also
+                the most they can accumulate (None disables budgets)
+            max_queued: Most requests waiting across all users before shedding
+            max_queued_per_user: Most requests waiting for one user before shedding
+            max_queue_wait: Seconds a request may wait before it is shed (None waits indefinitely)
+            clock: Monotonic time source
+        """
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_user = max_in_flight_per_user
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.max_queue_wait = max_queue_wait
+        self._clock = clock
+        self._users: dict[Hashable, _User] = {}
+        self._weights: dict[Hashable, float] = {}
+        self._in_flight = 0
+        self._queued = 0
+        self._virtual_time = 0.0
+        self._prune_at = PRUNE_USERS
+        self._waits: deque[float] = deque(maxlen=1000)
+        self.shed = 0
+        self.completed = 0
+
+    def set_weight(self, user_id: Hashable, weight: float) -> None:
+        """Give a user a larger (or smaller) share of capacity; the default is 1.
+
+        Args:
+            user_id: User identifier
+            weight: Relative share
+        """
+        self._weights[user_id] = weight
+        if user_id in self._users:
+            self._users[user_id].weight = weight
+
+    def _refilled(self, user: _User, now: float) -> float:
+        """Tokens in a user's budget once refilled up to now."""
+        assert self.tokens_per_minute is not None
+        refill = (now - user.refilled_at) * self.tokens_per_minute / 60
+        return min(user.tokens + refill, self.tokens_per_minute)
+
+    def _prune(self) -> None:
+        """Forget idle users with a full token budget.
+
+        An idle user's finish tag is at most one request ahead of the virtual
+        time, so forgetting it forgives no more than their last request's cost.
+        """
+        now = self._clock()
+        for user_id, user in list(self._users.items()):
+            if (
+                not user.in_flight
+                and not user.queue
+                and (
+                    self.tokens_per_minute is None
+                    or self._refilled(user, now) >= self.tokens_per_minute
+                )
+            ):
+                del self._users[user_id]
+        self._prune_at = max(2 * len(self._users), PRUNE_USERS)
+
+    def _user(self, user_id: Hashable) -> _User:
+        user = self._users.get(user_id)
+        if user is None:
+            if len(self._users) >= self._prune_at:
+                self._prune()
+            user = self._users[user_id] = _User(
+                weight=self._weights.get(user_id, 1.0),
+                tokens=self.tokens_per_minute or 0.0,
+                refilled_at=self._clock(),
+            )
+        elif self.tokens_per_minute is not None:
+            now = self._clock()
+            user.tokens = self._refilled(user, now)
+            user.refilled_at = now
+        return user
+
+    def _charge(self, user_id: Hashable, tokens: int) -> None:
+        if self.tokens_per_minute is not None:
+            self._user(user_id).tokens -= tokens
+
+    def _shed(self, user_id: Hashable, reason: str) -> SchedulerOverloadedError:
+        self.shed += 1
+        logger.warning(f"Shedding LLM request from {user_id}: {reason}")
+        return SchedulerOverloadedError(user_id, reason)
+
+    def _dispatch(self) -> None:
+        """Start queued requests in fair order while capacity allows."""
+        while self._in_flight < self.max_in_flight:
+            # The eligible user whose next request has the earliest virtual finish
+            best: _User | None = None
+            for user in self._users.values():
+                if (
+                    user.queue
+                    and user.in_flight < self.max_in_flight_per_user
+                    and (best is None or user.queue[0].finish < best.queue[0].finish)
+                ):
+                    best = user
+            if best is None:
+                return
+
+            request = best.queue[0]
+            if request.future.done():  # Timed out or cancelled; takes no capacity
+                self._dequeue(best, request)
+                continue
+            best.queue.popleft()
+            self._queued -= 1
+            self._virtual_time = max(self._virtual_time, request.start)
+            best.last_finish = request.finish
+            best.in_flight += 1
+            self._in_flight += 1
+            request.future.set_result(None)
+
+    async def acquire(self, user_id: Hashable, cost: float = 1.0) -> float:
+        """Wait for permission to make an LLM call.
+
+        Every successful acquire must be paired with a ``release``; prefer ``slot``.
+
+        Args:
+            user_id: User making the call
+            cost: Relative expected cost of the call, for fair queuing
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            SchedulerOverloadedError: If the request was shed
+        """
+        user = self._user(user_id)
+        if self.tokens_per_minute is not None and user.tokens <= 0:
+            raise self._shed(user_id, "token budget exhausted")
+        if len(user.queue) >= self.max_queued_per_user:
+            raise self._shed(user_id, f"{len(user.queue)} requests already queued for this user")
+        if self._queued >= self.max_queued:
+            raise self._shed(user_id, f"{self._queued} requests already queued")
+
+        # Weighted fair queuing tags, following the user's queued requests. The
+        # user's own finish tag only advances once a request is admitted.
+        start = max(self._virtual_time, user.queue[-1].finish if user.queue else user.last_finish)
+        enqueued_at = self._clock()
+        request = _Request(
+            start,
+            start + cost / user.weight,
+            asyncio.get_running_loop().create_future(),
+            enqueued_at,
+        )
+        user.queue.append(request)
+        self._queued += 1
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(request.future, self.max_queue_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:  # noqa: UP041
+            if request.future.done() and not request.future.cancelled():
+                self.release(user_id)  # Granted just as the caller gave up
+            else:
+                self._dequeue(user, request)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._shed(user_id, f"waited more than {self.max_queue_wait:g}s") from None
+
+        wait = self._clock() - enqueued_at
+        self._waits.append(wait)
+        if wait > 1.0:
+            logger.info(f"LLM request from {user_id} waited {wait:.2f}s in the queue")
+        return wait
+
+    def _dequeue(self, user: _User, request: _Request) -> None:
+        """Remove a request that gave up waiting, moving the user's later requests up.
+
+        Does nothing if the request already left the queue (``_dispatch`` drops
+        requests whose waiter gave up before it woke up).
+        """
+        try:
+            index = user.queue.index(request)
+        except ValueError:
+            return
+        del user.queue[index]
+        self._queued -= 1
+        shift = request.finish - request.start
+        for later in list(user.queue)[index:]:
+            later.start -= shift
+            later.finish -= shift
+
+    def release(self, user_id: Hashable) -> None:
+        """Finish an LLM call, letting the next queued request start.
+
+        Args:
+            user_id: User whose call finished
+        """
+        user = self._users[user_id]
+        user.in_flight -= 1
+        self._in_flight -= 1
+        self.completed += 1
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, user_id: Hashable, cost: float = 1.0) -> AsyncIterator[Slot]:
+        """Hold permission for one LLM call for the duration of the block.
+
+        Args:
+            user_id: User making the call
+            cost: Relative expected cost of the call, for fair queuing
+
+        Yields:
+            The slot, for charging token usage
+
+        Raises:
+            SchedulerOverloadedError: If the request was shed
+        """
+        wait = await self.acquire(user_id, cost)
+        try:
+            yield Slot(self, user_id, wait)
+        finally:
+            self.release(user_id)
+
+    def model(self, model: str | BaseLlm, user_id: Hashable, cost: float = 1.0) -> "ScheduledLlm":
+        """Wrap a model so each of its calls is scheduled for a user.
+
+        Args:
+            model: Model name or instance to schedule calls to
+            user_id: User (and budget) the calls belong to
+            cost: Relative expected cost of each call, for fair queuing
+
+        Returns:
+            Model for use as an ADK agent's ``model``
+        """
+        name = model if isinstance(model, str) else model.model
+        return ScheduledLlm(model=name, inner=model, scheduler=self, user_id=user_id, cost=cost)
+
+    def metrics(self) -> dict[str, float]:
+        """Concurrency, queueing and shedding metrics, for monitoring.
+
+        Returns:
+            Dictionary of metric name to value
+        """
+        waits = sorted(self._waits)
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "users": len(self._users),
+            "completed": self.completed,
+            "shed": self.shed,
+            "queue_wait_p50": statistics.median(waits) if waits else 0.0,
+            "queue_wait_p99": waits[int(0.99 * (len(waits) - 1))] if waits else 0.0,
+        }
+
+
+class ScheduledLlm(BaseLlm):
+    """ADK model whose calls wait for a scheduler slot, charging the tokens they use."""
+
+    inner: str | BaseLlm  # Model names are resolved on the first call
+    scheduler: LLMScheduler
+    user_id: Hashable
+    cost: float = 1.0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Generate content with the wrapped model once a slot is free.
+
+        The responses are collected while the slot is held and yielded after it
+        is released, so the slot never stays held while ADK runs tools (or
+        while the caller stops consuming). Streamed responses therefore arrive
+        together when the call finishes.
+
+        Args:
+            llm_request: Request to send to the model
+            stream: Whether to stream partial responses
+
+        Yields:
+            Model responses
+
+        Raises:
+            SchedulerOverloadedError: If the call was shed
+        """
+        if isinstance(self.inner, str):
+            self.inner = LLMRegistry.new_llm(self.inner)
+        responses = []
+        async with self.scheduler.slot(self.user_id, self.cost) as slot:
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                usage = response.usage_metadata
+                if usage is not None and usage.total_token_count:
+                    slot.charge(usage.total_token_count)
+                responses.append(response)
+        for response in responses:
+            yield response
+
+
+# Global scheduler instance - created lazily
+_llm_scheduler: LLMScheduler | None = None
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Get or create the process-wide LLM scheduler.
+
+    Returns:
+        Scheduler configured from settings
+    """
+    global _llm_scheduler
+
+    if _llm_scheduler is None:
+        settings = get_settings()
+        _llm_scheduler = LLMScheduler(
+            max_in_flight=settings.llm_max_in_flight,
+            max_in_flight_per_user=settings.llm_max_in_flight_per_user,
+            tokens_per_minute=settings.llm_user_tokens_per_minute or None,
+        )
+    return _llm_scheduler
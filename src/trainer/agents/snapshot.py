@@ -0,0 +1,680 @@
+"""Precomputed athlete context injected into the agent's instruction."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+
+from trainer.models import Workout
+from trainer.models.ingest import parse_mcp_content, tool_result_text
+from trainer.sync import ActivityChange, ActivityStore, get_activity_store
+from trainer.tools import get_athlete_profile, get_athlete_stats, get_recent_activities
+from trainer.utils.cache import SQLiteCache, get_shared_cache, lease
+from trainer.utils.formatters import format_distance, format_duration, format_pace
+
+logger = logging.getLogger(__name__)
+
+_UTC = timezone.utc  # noqa: UP017 - datetime.UTC requires Python 3.11
+
+# Profile fields worth spending prompt tokens on
+PROFILE_FIELDS = (
+    "id",
+    "firstname",
+    "lastname",
+    "sex",
+    "city",
+    "country",
+    "weight",
+    "ftp",
+    "measurement_preference",
+)
+
+# Raw (non-JSON) tool output is truncated to this many characters
+MAX_TEXT_LENGTH = 2000
+
+# Seconds one process may take to fetch a snapshot before another one fetches it too
+SNAPSHOT_FETCH_LEASE = 60.0
+
+
+class TrainingLoad(BaseModel):
+    """Training volume over a trailing window."""
+
+    days: int
+    activities: int
+    distance: float = Field(..., description="Distance in meters")
+    duration: int = Field(..., description="Duration in seconds")
+    load: float = Field(..., description="Sum of Workout.training_load")
+
+
+class AthleteSnapshot(BaseModel):
+    """Compact, versioned summary of the athlete's current Strava data."""
+
+    model_config = ConfigDict(frozen=True)
+
+    version: str = Field(..., description="Content hash; changes only when the data changes")
+    created_at: datetime
+    athlete_id: int | None = None
+    profile: dict[str, Any] | str | None = None
+    stats: dict[str, Any] | str | None = None
+    recent_load: list[TrainingLoad] = Field(default_factory=list)
+    recent_activities: list[str] = Field(
+        default_factory=list, description="One-line summaries, most recent first"
+    )
+
+    def to_prompt(self) -> str:
+        """Render the snapshot as compact text for the agent's instruction.
+
+        Returns:
+            Multi-line snapshot text
+        """
+        lines = [
+            f"ATHLETE SNAPSHOT (version {self.version}, "
+            f"as of {self.created_at.strftime('%Y-%m-%d %H:%M')} UTC)"
+        ]
+        if self.profile is not None:
+            lines.append(f"Profile: {_compact(self.profile)}")
+        if self.stats is not None:
+            lines.append(f"Stats: {_compact(self.stats)}")
+        for window in self.recent_load:
+            lines.append(
+                f"Last {window.days} days: {window.activities} activities, "
+                f"{format_distance(window.distance)}, {format_duration(window.duration)}, "
+                f"load {window.load:.0f}"
+            )
+        if len(self.recent_load) == 2 and self.recent_load[1].load > 0:
+            # Acute (7-day) load relative to the weekly average of the chronic window
+            acute, chronic = self.recent_load
+            ratio = acute.load / (chronic.load * acute.days / chronic.days)
+            lines.append(f"Acute:chronic load ratio: {ratio:.2f}")
+        if self.recent_activities:
+            lines.append(f"Last {len(self.recent_activities)} activities:")
+            lines.extend(f"- {summary}" for summary in self.recent_activities)
+        return "\n".join(lines)
+
+
+def _compact(value: Any) -> str:
+    """Render a value as compact JSON, passing text through unchanged."""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _parse_content(result: dict[str, Any]) -> dict[str, Any] | str | None:
+    """Decode a tool result as a JSON object, falling back to truncated text."""
+    text = tool_result_text(result)
+    if not text:
+        return None
+    try:
+        value = json.loads(text)
+    except json.JSONDecodeError:
+        return text[:MAX_TEXT_LENGTH]
+    return value if isinstance(value, dict) else text[:MAX_TEXT_LENGTH]
+
+
+def summarize_workout(workout: Workout) -> str:
+    """Summarize a workout in a single line.
+
+    Args:
+        workout: Workout to summarize
+
+    Returns:
+        One-line summary (date, type, name, distance, time, pace, heart rate)
+    """
+    parts = [
+        f"{workout.start_date.strftime('%Y-%m-%d')} {workout.type} {workout.name!r} "
+        f"(id {workout.id}): {format_distance(workout.distance)} "
+        f"in {format_duration(workout.duration)}"
+    ]
+    if workout.distance > 0 and workout.type in ("Run", "Walk", "Hike"):
+        parts.append(format_pace(workout.distance, workout.duration))
+    if workout.average_heartrate is not None:
+        parts.append(f"avg HR {workout.average_heartrate:.0f}")
+    if workout.elevation_gain:
+        parts.append(f"+{workout.elevation_gain:.0f} m")
+    return ", ".join(parts)
+
+
+def summarize_load(workouts: Sequence[Workout], now: datetime, days: int) -> TrainingLoad:
+    """Total the training volume over a trailing window.
+
+    Args:
+        workouts: Workouts to consider
+        now: End of the window
+        days: Length of the window in days
+
+    Returns:
+        Training load for the window
+    """
+    since = now - timedelta(days=days)
+    in_window = [
+        workout
+        for workout in workouts
+        if (workout.start_date.replace(tzinfo=workout.start_date.tzinfo or _UTC)) >= since
+    ]
+    return TrainingLoad(
+        days=days,
+        activities=len(in_window),
+        distance=sum(workout.distance for workout in in_window),
+        duration=sum(workout.duration for workout in in_window),
+        load=sum(workout.training_load for workout in in_window),
+    )
+
+
+def build_athlete_snapshot(
+    profile: dict[str, Any],
+    stats: dict[str, Any] | None,
+    activities: dict[str, Any],
+    activity_count: int = 10,
+    now: datetime | None = None,
+) -> AthleteSnapshot:
+    """Build a snapshot from raw Strava tool results.
+
+    Args:
+        profile: Result of get_athlete_profile
+        stats: Result of get_athlete_stats, if it was fetched
+        activities: Result of get_recent_activities
+        activity_count: Number of recent activities to summarize
+        now: Current time (defaults to now, in UTC)
+
+    Returns:
+        The athlete snapshot
+    """
+    now = now or datetime.now(_UTC)
+
+    profile_data = _parse_content(profile)
+    athlete_id = None
+    if isinstance(profile_data, dict):
+        athlete_id = profile_data.get("id")
+        profile_data = {key: profile_data[key] for key in PROFILE_FIELDS if key in profile_data}
+    stats_data = _parse_content(stats) if stats else None
+
+    recent_load: list[TrainingLoad] = []
+    summaries: list[str] = []
+    try:
+        workouts = parse_mcp_content(activities.get("data") or [])
+    except ValueError:
+        text = tool_result_text(activities)
+        if text:
+            summaries.append(text[:MAX_TEXT_LENGTH])
+    else:
+        workouts.sort(key=lambda workout: workout.start_date, reverse=True)
+        recent_load = [summarize_load(workouts, now, days) for days in (7, 28)]
+        summaries = [summarize_workout(workout) for workout in workouts[:activity_count]]
+
+    snapshot = AthleteSnapshot(
+        version="",
+        created_at=now,
+        athlete_id=athlete_id,
+        profile=profile_data,
+        stats=stats_data,
+        recent_load=recent_load,
+        recent_activities=summaries,
+    )
+    # Version by content only, so re-fetching unchanged data keeps the same version
+    content = snapshot.model_dump(mode="json", exclude={"version", "created_at"})
+    digest = hashlib.sha256(_compact(content).encode()).hexdigest()[:12]
+    return snapshot.model_copy(update={"version": digest})
+
+
+async def fetch_athlete_snapshot(activity_count: int = 10, per_page: int = 30) -> AthleteSnapshot:
+    """Fetch the athlete's profile, stats and recent activities from Strava.
+
+    Args:
+        activity_count: Number of recent activities to summarize
+        per_page: Number of recent activities to fetch for the load summary
+
+    Returns:
+        The athlete snapshot
+    """
+    # As of when the fetch started, so changes made during it make the snapshot stale
+    now = datetime.now(_UTC)
+    profile, activities = await asyncio.gather(
+        get_athlete_profile(), get_recent_activities(per_page=per_page)
+    )
+
+    stats = None
+    profile_data = _parse_content(profile)
+    if isinstance(profile_data, dict) and isinstance(profile_data.get("id"), int):
+        stats = await get_athlete_stats(athlete_id=profile_data["id"])
+
+    snapshot = build_athlete_snapshot(profile, stats, activities, activity_count, now)
+    logger.info(f"Built athlete snapshot version {snapshot.version}")
+    return snapshot
+
+
+@dataclass
+class _SharedSnapshot:
+    """The snapshot of one athlete, shared by the sessions of every user seeing them."""
+
+    snapshot: AthleteSnapshot | None = None
+    fetched_at: float | None = None
+    users: int = 0
+
+
+@dataclass
+class _UserSessions:
+    """A user's sessions, and the athlete their snapshot was fetched for."""
+
+    references: int = 0
+    athlete: Hashable | None = None
+    fetching: asyncio.Future[AthleteSnapshot | None] | None = None
+
+
+def _predates(snapshot: AthleteSnapshot | None, changed_at: float | None) -> bool:
+    """Whether a snapshot was fetched before a change (assumed so if either is unknown)."""
+    return snapshot is None or changed_at is None or snapshot.created_at.timestamp() < changed_at
+
+
+class SharedSnapshots:
+    """Athlete snapshots shared between processes, and the changes that make them stale.
+
+    Snapshots, and the athlete each user's snapshot is for, are kept in a
+    ``SQLiteCache`` shared with the other processes (e.g. serving workers),
+    with a lease per athlete so that one process at a time fetches their
+    snapshot. Changes to an ``ActivityStore`` make the snapshots fetched
+    before them stale. Every SQLite call runs in a worker thread; the store
+    listener cannot wait, so the shared snapshots it makes stale are deleted
+    in the background, and at the latest by the next ``sync``.
+    """
+
+    def __init__(self, cache: SQLiteCache | None = None, store: ActivityStore | None = None):
+        """Initialize the shared snapshots.
+
+        Args:
+            cache: Cache shared with other processes (nothing is shared if None)
+            store: Activity store whose changes, including other processes', make
+                snapshots stale (its listener must call ``changed``)
+        """
+        self.cache = cache
+        self.store = store
+        self._changed: dict[Hashable, float] = {}  # Latest activity change per athlete
+        self._stale: dict[Hashable, float] = {}  # Shared snapshots to delete, if stored before
+        self._deleting: asyncio.Task[None] | None = None
+
+    async def sync(self) -> None:
+        """Apply other processes' activity changes and delete the snapshots they made stale."""
+        if self.store is not None:
+            try:
+                await self.store.sync_async()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not apply activity changes: {e}")
+        await self._delete_stale()
+
+    def changed(self, athlete: Hashable, changed_at: float | None) -> None:
+        """Record a change to an athlete's activities, deleting their older shared snapshot.
+
+        Args:
+            athlete: Owner of the changed activity
+            changed_at: When the change was made (None deletes the snapshot whenever stored)
+        """
+        if changed_at is not None:
+            self._changed[athlete] = max(self._changed.get(athlete, 0.0), changed_at)
+        if self.cache is None:
+            return
+        stored_before = changed_at or time.time()
+        self._stale[athlete] = max(self._stale.get(athlete, 0.0), stored_before)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Deleted by the next sync
+        deleting = self._deleting
+        if deleting is None or deleting.done() or deleting.get_loop() is not loop:
+            self._deleting = loop.create_task(self._delete_stale())
+
+    async def _delete_stale(self) -> None:
+        while self._stale:
+            athlete, stored_before = self._stale.popitem()
+            await self.delete(athlete, stored_before)
+
+    async def athlete(self, user: Hashable) -> int | None:
+        """Return the ID of the athlete any process fetched a user's snapshot for, if known."""
+        if self.cache is None:
+            return None
+        try:
+            alias = await asyncio.to_thread(self.cache.get, f"snapshot-athlete:{user}")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read shared athlete snapshot: {e}")
+            return None
+        return int(alias.value) if alias is not None else None
+
+    async def read(self, athlete: int) -> tuple[AthleteSnapshot, float] | None:
+        """Return an athlete's shared snapshot and its age, unless missing or stale."""
+        if self.cache is None:
+            return None
+        try:
+            cached = await asyncio.to_thread(self.cache.get, f"snapshot:{athlete}")
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read shared athlete snapshot: {e}")
+            return None
+        if cached is None:
+            return None
+        snapshot = AthleteSnapshot.model_validate_json(cached.value)
+        changed_at = self._changed.get(athlete)
+        if changed_at is not None and _predates(snapshot, changed_at):
+            return None  # Written by a fetch that started before a change applied here
+        return snapshot, cached.age
+
+    async def write(self, user: Hashable, snapshot: AthleteSnapshot, max_age: float) -> None:
+        """Share a snapshot fetched for a user for max_age seconds."""
+        # Only snapshots of known athletes can be invalidated by their activity changes
+        if self.cache is None or snapshot.athlete_id is None:
+            return
+        athlete, value = snapshot.athlete_id, snapshot.model_dump_json()
+        try:
+            await asyncio.to_thread(self.cache.set, f"snapshot:{athlete}", value, max_age)
+            alias = f"snapshot-athlete:{user}"
+            await asyncio.to_thread(self.cache.set, alias, str(athlete), max_age)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not share athlete snapshot: {e}")
+
+    async def delete(self, athlete: Hashable, stored_before: float | None = None) -> None:
+        """Delete an athlete's shared snapshot (only if stored before a time, if given)."""
+        if self.cache is None:
+            return
+        try:
+            await asyncio.to_thread(self.cache.delete, f"snapshot:{athlete}", stored_before)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not invalidate shared athlete snapshot: {e}")
+
+    def lease(
+        self, key: str, done: Callable[[], Awaitable[bool]]
+    ) -> AbstractAsyncContextManager[bool]:
+        """Fetch a snapshot in one process at a time, see ``trainer.utils.cache.lease``.
+
+        Args:
+            key: The athlete ID, or the user key if no process knows the athlete yet
+            done: Returns whether another process shared the snapshot meanwhile
+        """
+        return lease(self.cache, f"snapshot-fetch:{key}", SNAPSHOT_FETCH_LEASE, done)
+
+
+class SnapshotCache:
+    """Process-wide athlete snapshots, shared by all sessions of each athlete.
+
+    Sessions ``attach`` to their user's entry and ``detach`` when they end.
+    Snapshots are kept per athlete, keyed by the athlete ID in the fetched
+    profile (the Strava MCP server returns the athlete it is authenticated as,
+    whichever user asks), so users seeing the same athlete share one snapshot.
+    A snapshot is dropped when the last session using it detaches, so memory
+    grows with active athletes rather than sessions. Snapshots are immutable
+    and replaced whole, so every session sees one consistent version, and
+    concurrent refreshes for a user share a single fetch.
+
+    With a ``shared`` cache, snapshots are also shared between processes (e.g.
+    serving workers) through ``SharedSnapshots``: a refresh uses another
+    process's snapshot while it is fresh, and every fetched snapshot is
+    written back for the others. With a ``store``, every refresh first applies
+    activity changes made by other processes (such as the webhook receiver),
+    which invalidate the snapshots fetched before them here and in the shared
+    cache.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.monotonic,
+        shared: SQLiteCache | None = None,
+        store: ActivityStore | None = None,
+    ):
+        """Initialize the cache.
+
+        Args:
+            clock: Monotonic time source
+            shared: Cache shared with other processes, if any
+            store: Activity store whose changes invalidate snapshots (the caller
+                registers ``on_activity_change`` as its listener)
+        """
+        self._users: dict[Hashable, _UserSessions] = {}
+        self._snapshots: dict[Hashable, _SharedSnapshot] = {}
+        self._generation = 0  # Bumped on invalidation, so in-flight fetches don't count as fresh
+        self._clock = clock
+        self.shared = SharedSnapshots(shared, store)
+        self.fetches = 0
+        self.joined_fetches = 0
+        self.shared_hits = 0
+
+    def attach(self, user: Hashable) -> None:
+        """Start sharing a user's snapshot with a new session.
+
+        Args:
+            user: User key
+        """
+        self._users.setdefault(user, _UserSessions()).references += 1
+
+    def detach(self, user: Hashable) -> None:
+        """Stop sharing a user's snapshot, dropping it after the last session.
+
+        Args:
+            user: User key
+        """
+        entry = self._users.get(user)
+        if entry is None:
+            return
+        entry.references -= 1
+        if entry.references <= 0:
+            del self._users[user]
+            self._unlink(entry)
+
+    def _unlink(self, entry: _UserSessions) -> None:
+        """Stop a user's sessions using their athlete's snapshot."""
+        athlete, entry.athlete = entry.athlete, None
+        shared = self._snapshots.get(athlete) if athlete is not None else None
+        if shared is None:
+            return
+        shared.users -= 1
+        if shared.users <= 0:
+            del self._snapshots[athlete]
+            logger.debug(f"Dropped athlete snapshot for {athlete}: no sessions left")
+
+    def _link(self, user: Hashable, entry: _UserSessions, athlete: Hashable) -> _SharedSnapshot:
+        """Point a user's sessions at an athlete's snapshot, returning it."""
+        if self._users.get(user) is not entry:
+            # No sessions attached, so nothing to share
+            return self._snapshots.get(athlete) or _SharedSnapshot()
+        if entry.athlete != athlete:
+            self._unlink(entry)
+            entry.athlete = athlete
+            self._snapshots.setdefault(athlete, _SharedSnapshot()).users += 1
+        return self._snapshots[athlete]
+
+    def _shared_entry(self, user: Hashable) -> _SharedSnapshot | None:
+        entry = self._users.get(user)
+        if entry is None or entry.athlete is None:
+            return None
+        return self._snapshots.get(entry.athlete)
+
+    def get(self, user: Hashable) -> AthleteSnapshot | None:
+        """Return the snapshot of a user's athlete, if one has been fetched."""
+        shared = self._shared_entry(user)
+        return shared.snapshot if shared is not None else None
+
+    async def invalidate(self, user: Hashable) -> None:
+        """Mark a user's snapshot as stale, so the next refresh in any process re-fetches it."""
+        self._generation += 1
+        shared = self._shared_entry(user)
+        if shared is not None:
+            shared.fetched_at = None
+        athlete = self._linked_athlete(user)
+        if athlete is None:
+            athlete = await self.shared.athlete(user)
+        if athlete is not None:
+            await self.shared.delete(athlete)
+
+    def on_activity_change(self, change: ActivityChange) -> None:
+        """Invalidate snapshots fetched before a change to the athlete's activities.
+
+        Registered as an ``ActivityStore`` listener, so webhook updates reach
+        every session's next message. Snapshots of athletes whose ID is unknown
+        (the profile was not JSON) are invalidated by any change.
+
+        Args:
+            change: The activity change
+        """
+        self._generation += 1
+        athlete = change.athlete_id
+        for key, shared in self._snapshots.items():
+            unknown = isinstance(key, tuple)  # Keyed by user, see _fetch
+            if (key == athlete or unknown) and _predates(shared.snapshot, change.changed_at):
+                shared.fetched_at = None
+        self.shared.changed(athlete, change.changed_at)
+
+    async def refresh(
+        self,
+        user: Hashable,
+        fetch: Callable[[], Awaitable[AthleteSnapshot]],
+        max_age: float,
+        force: bool = False,
+    ) -> AthleteSnapshot | None:
+        """Fetch a new snapshot for a user if their athlete's is missing or stale.
+
+        Sessions refreshing at the same time wait for the same fetch. A fetched
+        snapshot only replaces the shared one when its version (a hash of its
+        content) changes, so unchanged data keeps prompts stable.
+
+        Args:
+            user: User key
+            fetch: Builds a new snapshot from Strava
+            max_age: Seconds before the snapshot is re-fetched
+            force: Re-fetch even if the snapshot is still fresh
+
+        Returns:
+            The current snapshot, or None if none could be built
+        """
+        await self.shared.sync()  # Invalidates snapshots other processes' changes made stale
+
+        entry = self._users.get(user)
+        if entry is None:
+            entry = _UserSessions()  # No sessions attached, so nothing to share
+        shared = self._snapshots.get(entry.athlete) if entry.athlete is not None else None
+        if (
+            shared is not None
+            and shared.fetched_at is not None
+            and self._clock() - shared.fetched_at < max_age
+            and not force
+        ):
+            return shared.snapshot
+
+        if entry.fetching is None:
+            fetching = self._fetch(user, entry, fetch, self._generation, max_age, force)
+            entry.fetching = asyncio.ensure_future(fetching)
+        else:
+            self.joined_fetches += 1
+        # Shielded so one session giving up does not cancel the others' fetch
+        return await asyncio.shield(entry.fetching)
+
+    async def _fetch(
+        self,
+        user: Hashable,
+        entry: _UserSessions,
+        fetch: Callable[[], Awaitable[AthleteSnapshot]],
+        generation: int,
+        max_age: float,
+        force: bool,
+    ) -> AthleteSnapshot | None:
+        try:
+            snapshot, age = await self._fetch_or_share(user, fetch, max_age, force)
+        except Exception as e:
+            logger.warning(f"Could not build athlete snapshot for {user}: {e}")
+            return self.get(user)
+        finally:
+            entry.fetching = None
+
+        # Athletes are only known by ID when the profile was JSON
+        athlete: Hashable = snapshot.athlete_id
+        if athlete is None:
+            athlete = ("user", user)
+        shared = self._link(user, entry, athlete)
+        if self._generation == generation:
+            # A snapshot from another process is as old as when that process fetched it
+            shared.fetched_at = self._clock() - age
+        if shared.snapshot is not None and snapshot.version == shared.snapshot.version:
+            logger.debug(f"Athlete snapshot for {user} unchanged (version {snapshot.version})")
+        else:
+            shared.snapshot = snapshot
+            logger.info(f"Athlete snapshot for {user} updated to version {snapshot.version}")
+        return shared.snapshot
+
+    async def _fetch_or_share(
+        self,
+        user: Hashable,
+        fetch: Callable[[], Awaitable[AthleteSnapshot]],
+        max_age: float,
+        force: bool,
+    ) -> tuple[AthleteSnapshot, float]:
+        """Fetch a snapshot, unless another process shares a fresh one (returned with its age)."""
+        shared: list[tuple[AthleteSnapshot, float]] = []
+
+        async def is_shared() -> bool:
+            cached = None if force else await self._read_shared(user)
+            shared[:] = [cached] if cached is not None else []
+            return bool(shared)
+
+        if await is_shared():
+            self.shared_hits += 1
+            return shared[0]
+        # Processes that don't know the athlete yet coordinate per user
+        athlete = self._linked_athlete(user)
+        key = str(athlete) if athlete is not None else f"user:{user}"
+        async with self.shared.lease(key, is_shared) as fetching:
+            if not fetching and shared:
+                self.shared_hits += 1
+                return shared[0]
+            self.fetches += 1
+            snapshot = await fetch()
+            await self.shared.write(user, snapshot, max_age)
+            return snapshot, 0.0
+
+    def _linked_athlete(self, user: Hashable) -> int | None:
+        """Return the ID of the athlete a user's snapshot here is for, if known."""
+        entry = self._users.get(user)
+        return entry.athlete if entry is not None and isinstance(entry.athlete, int) else None
+
+    async def _read_shared(self, user: Hashable) -> tuple[AthleteSnapshot, float] | None:
+        """Return another process's fresh snapshot for a user's athlete and its age, if any."""
+        athlete = self._linked_athlete(user)
+        if athlete is None:
+            athlete = await self.shared.athlete(user)
+        return await self.shared.read(athlete) if athlete is not None else None
+
+    def metrics(self) -> dict[str, float]:
+        """Shared snapshot counts, for monitoring.
+
+        Returns:
+            Dictionary of metric name to value
+        """
+        return {
+            "athletes": len(self._snapshots),
+            "users": len(self._users),
+            "sessions": sum(entry.references for entry in self._users.values()),
+            "fetches": self.fetches,
+            "joined_fetches": self.joined_fetches,
+            "shared_hits": self.shared_hits,
+        }
+
+
+# Global snapshot cache - created lazily
+_snapshot_cache: SnapshotCache | None = None
+
+
+def get_snapshot_cache() -> SnapshotCache:
+    """Get or create the process-wide athlete snapshot cache.
+
+    Returns:
+        Snapshot cache shared with other processes through the state directory,
+        and invalidated by changes to the activity store
+    """
+    global _snapshot_cache
+
+    if _snapshot_cache is None:
+        store = get_activity_store()
+        _snapshot_cache = SnapshotCache(shared=get_shared_cache(), store=store)
+        store.add_listener(_snapshot_cache.on_activity_change)
+    return _snapshot_cache
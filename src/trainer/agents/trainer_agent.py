@@ -1,28 +1,105 @@
 """Main trainer agent using Google ADK."""
 
+import asyncio
 import logging
 import os
+import time
+import weakref
 from typing import Any
 
 from google.adk.agents import Agent
+from google.adk.agents.readonly_context import ReadonlyContext
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
+from google.adk.sessions import BaseSessionService, InMemorySessionService
 from google.genai import types
 
-from trainer.tools import get_athlete_profile, get_athlete_stats, get_recent_activities
+from trainer.agents.router import ModelRouter, Route
+from trainer.agents.scheduler import LLMScheduler, SchedulerOverloadedError, get_llm_scheduler
+from trainer.agents.snapshot import (
+    AthleteSnapshot,
+    SnapshotCache,
+    fetch_athlete_snapshot,
+    get_snapshot_cache,
+)
+from trainer.models.ingest import tool_result_text
+from trainer.routes import get_repeated_routes, get_route_efforts
+from trainer.sync import get_training_rollups
+from trainer.tools import (
+    get_activity_details,
+    get_athlete_profile,
+    get_athlete_stats,
+    get_cassette,
+    get_recent_activities,
+)
 from trainer.utils.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+INSTRUCTION = """You are an expert personal trainer and coach specializing in \
+endurance sports.
+
+You have access to the athlete's Strava data through tools. Use this data to:
+- Analyze workout performance and training patterns
+- Provide personalized coaching feedback
+- Identify areas for improvement
+- Create structured training plans
+- Answer questions about training, recovery, and performance
+
+An ATHLETE SNAPSHOT with their profile, stats, recent training load and latest \
+activities may be included below. Answer from the snapshot first, and only call tools \
+for data it does not contain, such as the details of an activity or older activities. \
+Do not call get_athlete_profile or get_athlete_stats when the snapshot has the profile \
+and stats.
+
+If there is no snapshot and you need the athlete's statistics, call get_athlete_profile \
+to obtain the athlete's ID, then call get_athlete_stats with that ID.
+
+For weekly or monthly volume, and comparisons between recent weeks or months, call \
+get_training_rollups with the athlete's ID rather than adding up individual activities.
+
+To compare efforts on the same course over time, call get_repeated_routes to find the \
+routes the athlete repeats, then get_route_efforts with a route or activity ID.
+
+Be encouraging, data-driven, and specific in your recommendations. Consider:
+- Training load and recovery
+- Progressive overload principles
+- Sport-specific training zones
+- Injury prevention
+- Goal-oriented planning
+
+Always ground your advice in the actual data from Strava when available."""
+
+# Relative cost of a request on each route, for fair queuing between users
+ROUTE_COSTS = {Route.FAST: 1.0, Route.HEAVY: 4.0}
+
 
 class TrainerAgent:
     """AI personal trainer agent that uses Strava data to provide coaching."""
 
-    def __init__(self, model_name: str = "gemini-2.0-flash-exp"):
+    def __init__(
+        self,
+        model_name: str = "gemini-2.0-flash-exp",
+        snapshot_max_age: float = 900.0,
+        heavy_model_name: str | None = "gemini-2.5-pro",
+        scheduler: LLMScheduler | None = None,
+        user_id: str = "default_user",
+        session_id: str = "default_session",
+        snapshots: SnapshotCache | None = None,
+        session_service: BaseSessionService | None = None,
+    ):
         """Initialize the trainer agent.
 
         Args:
-            model_name: The LLM to use for the agent
+            model_name: The LLM to use for the agent (quick lookups when routing)
+            snapshot_max_age: Seconds before the athlete snapshot is re-fetched
+            heavy_model_name: Larger LLM for planning and analysis (None disables routing)
+            scheduler: Scheduler shared with other users' agents (process-wide by default)
+            user_id: User (athlete) the conversation is with
+            session_id: Conversation session
+            snapshots: Athlete snapshots shared with the user's other sessions
+                (process-wide by default)
+            session_service: Store of conversation sessions (in memory by default;
+                serving workers share a database so any worker can continue a session)
         """
         logger.info(f"Initializing TrainerAgent with model: {model_name}")
 
@@ -33,56 +110,132 @@ class TrainerAgent:
         else:
             logger.warning("No API key found in GOOGLE_API_KEY or GEMINI_API_KEY")
 
-        # Create the ADK agent with tools and instructions
-        agent = Agent(
+        # Requests are routed between a fast and a larger model when both are given
+        self.router: ModelRouter | None = None
+        if heavy_model_name and heavy_model_name != model_name:
+            self.router = ModelRouter(fast_model=model_name, heavy_model=heavy_model_name)
+            logger.info(f"Routing planning and analysis requests to {heavy_model_name}")
+
+        # One runner per model. They share the session service, and the agents
+        # share a name, so the conversation continues seamlessly across models.
+        self.session_service = (
+            InMemorySessionService() if session_service is None else session_service
+        )
+        self.scheduler = get_llm_scheduler() if scheduler is None else scheduler
+        self.user_id = user_id
+        self.session_id = session_id
+        models = self.router.models if self.router else {Route.FAST: model_name}
+        self.runners = {
+            route: Runner(
+                app_name="trainer",
+                agent=self._create_agent(model, ROUTE_COSTS[route]),
+                session_service=self.session_service,
+            )
+            for route, model in models.items()
+        }
+        self.runner = self.runners[Route.FAST]
+
+        # Athlete snapshot injected into the instruction, refreshed when stale. It
+        # is shared by all of the user's sessions until the last one is closed.
+        self.snapshots = get_snapshot_cache() if snapshots is None else snapshots
+        self.snapshot_max_age = snapshot_max_age
+        self.snapshots.attach(user_id)
+        self._detach = weakref.finalize(self, self.snapshots.detach, user_id)
+        logger.debug("TrainerAgent instance created with ADK Agent and Runner")
+
+    def _create_agent(self, model_name: str, cost: float) -> Agent:
+        """Create the ADK agent with tools and instructions.
+
+        Args:
+            model_name: The LLM the agent uses
+            cost: Relative cost of each of its model calls, for fair queuing
+        """
+        # Model exchanges are recorded to or replayed from a cassette when one is in use
+        cassette = get_cassette()
+        model = model_name if cassette is None else cassette.model(model_name)
+        return Agent(
             name="personal_trainer",
-            model=model_name,
+            # Each model call is queued fairly against other users sharing the process
+            model=self.scheduler.model(model, self.user_id, cost),
             description=(
                 "An AI personal trainer that analyzes Strava workout data "
                 "and provides personalized coaching and training plans."
             ),
-            instruction="""You are an expert personal trainer and coach specializing in \
-endurance sports.
+            instruction=self._instruction,
+            tools=[
+                get_athlete_profile,
+                get_athlete_stats,
+                get_recent_activities,
+                get_training_rollups,
+                get_repeated_routes,
+                get_route_efforts,
+            ],
+        )
 
-You have access to the athlete's Strava data through tools. Use this data to:
-- Analyze workout performance and training patterns
-- Provide personalized coaching feedback
-- Identify areas for improvement
-- Create structured training plans
-- Answer questions about training, recovery, and performance
+    @property
+    def snapshot(self) -> AthleteSnapshot | None:
+        """The athlete snapshot shared by the user's sessions, if fetched."""
+        return self.snapshots.get(self.user_id)
 
-IMPORTANT: To get athlete statistics, you must FIRST call get_athlete_profile to obtain \
-the athlete's ID, then use that ID to call get_athlete_stats. Always follow this two-step \
-process when stats are needed.
+    def close(self) -> None:
+        """Stop sharing the athlete snapshot (also done when the agent is collected)."""
+        self._detach()
 
-Be encouraging, data-driven, and specific in your recommendations. Consider:
-- Training load and recovery
-- Progressive overload principles
-- Sport-specific training zones
-- Injury prevention
-- Goal-oriented planning
+    def _instruction(self, context: ReadonlyContext) -> str:
+        """Build the agent instruction, including the current athlete snapshot."""
+        if self.snapshot is None:
+            return INSTRUCTION
+        return f"{INSTRUCTION}\n\n{self.snapshot.to_prompt()}"
+
+    async def refresh_snapshot(self, force: bool = False) -> AthleteSnapshot | None:
+        """Fetch a new athlete snapshot if the shared one is missing or stale.
+
+        The user's other sessions refreshing at the same time share the fetch.
+        The instruction only changes when the snapshot version (a hash of its
+        content) changes, so unchanged data keeps the prompt stable.
 
-Always ground your advice in the actual data from Strava when available.""",
-            tools=[get_athlete_profile, get_athlete_stats, get_recent_activities],
+        Args:
+            force: Re-fetch even if the current snapshot is still fresh
+
+        Returns:
+            The current snapshot, or None if it could not be built
+        """
+        return await self.snapshots.refresh(
+            self.user_id, fetch_athlete_snapshot, self.snapshot_max_age, force=force
         )
 
-        # Create the runner to manage agent execution
-        self.session_service = InMemorySessionService()
-        self.runner = Runner(app_name="trainer", agent=agent, session_service=self.session_service)
-        self.user_id = "default_user"
-        self.session_id = "default_session"
-        logger.debug("TrainerAgent instance created with ADK Agent and Runner")
+    async def invalidate_snapshot(self) -> None:
+        """Mark the athlete snapshot as stale so the user's next message re-fetches it."""
+        await self.snapshots.invalidate(self.user_id)
+
+    def _select_runner(self, message: str, route: Route | None) -> tuple[Route, Runner]:
+        """Choose the runner for a message, logging the routing decision."""
+        if self.router is None:
+            return Route.FAST, self.runner
+        if route is None:
+            decision = self.router.classify(message)
+            route = decision.route
+            logger.info(
+                f"Routing to {route.value} model {self.router.model_for(route)} "
+                f"(score {decision.score:+.1f}: {decision.reason})"
+            )
+        else:
+            logger.info(f"Routing to {route.value} model {self.router.model_for(route)} (explicit)")
+        return route, self.runners[route]
 
-    async def process_message(self, message: str) -> str:
+    async def process_message(self, message: str, route: Route | None = None) -> str:
         """Process a user message and return a response.
 
         Args:
             message: User's message or question
+            route: Model route to use (classified from the message if not given)
 
         Returns:
             Agent's response
         """
         logger.debug(f"Processing message: {message[:50]}...")
+        route, runner = self._select_runner(message, route)
+        started = time.perf_counter()
 
         try:
             # Ensure session exists
@@ -93,16 +246,15 @@ Always ground your advice in the actual data from Strava when available.""",
                 await self.session_service.create_session(
                     app_name="trainer", user_id=self.user_id, session_id=self.session_id
                 )
+            await self.refresh_snapshot()
 
             # Convert message to Content object
             content = types.Content(role="user", parts=[types.Part(text=message)])
 
             # Use the runner to process the message
             response_parts = []
-            async for event in self.runner.run_async(
-                user_id=self.user_id,
-                session_id=self.session_id,
-                new_message=content,
+            async for event in runner.run_async(
+                user_id=self.user_id, session_id=self.session_id, new_message=content
             ):
                 # Collect text from events with content
                 if event.content and event.content.parts:
@@ -111,7 +263,12 @@ Always ground your advice in the actual data from Strava when available.""",
                         if hasattr(part, "text") and part.text:
                             response_parts.append(part.text)
 
+            if self.router is not None:
+                self.router.record(route, time.perf_counter() - started)
             return "".join(response_parts) if response_parts else "No response generated"
+        except SchedulerOverloadedError as e:
+            logger.warning(f"Message not processed: {e}")
+            return "I'm handling a lot of requests right now. Please try again shortly."
         except Exception as e:
             logger.error(f"Error processing message: {e}", exc_info=True)
             return f"I encountered an error processing your message: {e}"
@@ -127,7 +284,17 @@ Always ground your advice in the actual data from Strava when available.""",
         """
         logger.info(f"Analyzing workout: {workout_id}")
 
-        prompt = f"""Analyze the Strava activity with ID {workout_id}.
+        # The analysis always needs these, so fetch them up front and concurrently
+        # instead of waiting for the model to ask for them
+        details, _ = await asyncio.gather(get_activity_details(workout_id), self.refresh_snapshot())
+        details_text = tool_result_text(details)
+        prefetched = (
+            f"\n\nActivity details (already fetched from Strava):\n{details_text}"
+            if details_text
+            else ""
+        )
+
+        prompt = f"""Analyze the Strava activity with ID {workout_id}.{prefetched}
 
 Please provide:
 1. Summary of the workout (distance, duration, pace/power, heart rate)
@@ -137,7 +304,7 @@ Please provide:
 5. Recovery recommendations
 6. How this fits into their overall training plan"""
 
-        response = await self.process_message(prompt)
+        response = await self.process_message(prompt, route=Route.HEAVY)
 
         # Return structured response
         return {"workout_id": workout_id, "analysis": response, "status": "success"}
@@ -154,9 +321,12 @@ Please provide:
         """
         logger.info(f"Creating {weeks}-week training plan for goal: {goal}")
 
+        # Profile, stats and recent activities arrive via the athlete snapshot
+        await self.refresh_snapshot()
+
         prompt = f"""Create a {weeks}-week personalized training plan for the following goal: {goal}
 
-Based on the athlete's recent Strava data:
+Based on the athlete's recent Strava data (see the athlete snapshot):
 1. Assess their current fitness level and training history
 2. Design a progressive training plan with weekly structure
 3. Include specific workouts (easy runs, tempo, intervals, long runs/rides, etc.)
@@ -167,7 +337,7 @@ Based on the athlete's recent Strava data:
 
 Format the plan with week-by-week breakdown."""
 
-        response = await self.process_message(prompt)
+        response = await self.process_message(prompt, route=Route.HEAVY)
 
         return {"goal": goal, "weeks": weeks, "plan": response, "status": "success"}
 
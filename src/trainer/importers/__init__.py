@@ -0,0 +1,30 @@
+"""Importers for activity files recorded outside Strava."""
+
+from .fit import FitError, parse_fit
+from .gpx import parse_gpx, parse_tcx
+from .pipeline import (
+    ImportResult,
+    ImportSource,
+    ImportStats,
+    import_file,
+    import_files,
+    iter_sources,
+    run_import,
+)
+from .track import Track, build_workout
+
+__all__ = [
+    "FitError",
+    "parse_fit",
+    "parse_gpx",
+    "parse_tcx",
+    "Track",
+    "build_workout",
+    "ImportResult",
+    "ImportSource",
+    "ImportStats",
+    "import_file",
+    "import_files",
+    "iter_sources",
+    "run_import",
+]
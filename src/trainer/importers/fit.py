@@ -0,0 +1,261 @@
+"""Streaming reader for Garmin FIT activity files.
+
+Only the messages and fields needed for a workout are decoded: ``record``
+messages become samples and ``session`` messages supply the summary. Every
+other message is skipped without being decoded. Each message definition is
+compiled to a single ``struct.Struct`` so a data message is decoded with one
+``unpack`` call.
+
+See the FIT protocol description in the Garmin FIT SDK.
+"""
+
+import math
+import struct
+from dataclasses import dataclass
+from typing import IO
+
+from trainer.importers.track import Track, sport_type
+
+# Seconds between the Unix epoch and the FIT epoch (1989-12-31T00:00:00Z)
+FIT_EPOCH = 631_065_600
+
+_SEMICIRCLES_TO_DEGREES = 180 / 2**31
+
+# Base type number -> (struct format, invalid value)
+_BASE_TYPES: dict[int, tuple[str, int | None]] = {
+    0x00: ("B", 0xFF),  # enum
+    0x01: ("b", 0x7F),  # sint8
+    0x02: ("B", 0xFF),  # uint8
+    0x03: ("h", 0x7FFF),  # sint16
+    0x04: ("H", 0xFFFF),  # uint16
+    0x05: ("i", 0x7FFFFFFF),  # sint32
+    0x06: ("I", 0xFFFFFFFF),  # uint32
+    0x08: ("f", None),  # float32 (invalid is NaN)
+    0x09: ("d", None),  # float64
+    0x0A: ("B", 0x00),  # uint8z
+    0x0B: ("H", 0x0000),  # uint16z
+    0x0C: ("I", 0x00000000),  # uint32z
+    0x0E: ("q", 0x7FFFFFFFFFFFFFFF),  # sint64
+    0x0F: ("Q", 0xFFFFFFFFFFFFFFFF),  # uint64
+    0x10: ("Q", 0x0000000000000000),  # uint64z
+}
+
+_RECORD = 20
+_SESSION = 18
+_TIMESTAMP = 253
+
+# (global message, field number) -> (name, scale, offset)
+_FIELDS: dict[tuple[int, int], tuple[str, float, float]] = {
+    (_RECORD, 0): ("latitude", _SEMICIRCLES_TO_DEGREES, 0),
+    (_RECORD, 1): ("longitude", _SEMICIRCLES_TO_DEGREES, 0),
+    (_RECORD, 2): ("altitude", 1 / 5, -500),
+    (_RECORD, 3): ("heartrate", 1, 0),
+    (_RECORD, 4): ("cadence", 1, 0),
+    (_RECORD, 5): ("distance", 1 / 100, 0),
+    (_RECORD, 6): ("speed", 1 / 1000, 0),
+    (_RECORD, 7): ("power", 1, 0),
+    (_RECORD, 73): ("enhanced_speed", 1 / 1000, 0),
+    (_RECORD, 78): ("enhanced_altitude", 1 / 5, -500),
+    (_SESSION, 2): ("start_time", 1, FIT_EPOCH),
+    (_SESSION, 5): ("sport", 1, 0),
+    (_SESSION, 8): ("total_timer_time", 1 / 1000, 0),
+    (_SESSION, 9): ("total_distance", 1 / 100, 0),
+    (_SESSION, 11): ("total_calories", 1, 0),
+    (_SESSION, 16): ("avg_heart_rate", 1, 0),
+    (_SESSION, 17): ("max_heart_rate", 1, 0),
+    (_SESSION, 22): ("total_ascent", 1, 0),
+}
+
+# FIT sport enum values -> sport names understood by sport_type
+SPORTS = {
+    1: "running",
+    2: "cycling",
+    5: "swimming",
+    11: "walking",
+    13: "alpine_skiing",
+    12: "cross_country_skiing",
+    15: "rowing",
+    17: "hiking",
+}
+
+
+class FitError(ValueError):
+    """Raised when a file is not a valid FIT file."""
+
+
+@dataclass
+class _Definition:
+    """A compiled message definition."""
+
+    global_number: int
+    struct: struct.Struct
+    # (name, scale, offset, invalid) for each decoded field, in unpack order
+    fields: list[tuple[str, float, float, int | None]]
+    developer_size: int
+
+
+def _compile(
+    global_number: int,
+    big_endian: bool,
+    raw_fields: list[tuple[int, int, int]],
+    developer_size: int,
+) -> _Definition:
+    """Compile a definition into a struct that unpacks only the wanted fields."""
+    fmt = [">" if big_endian else "<"]
+    fields = []
+    for number, size, base_type in raw_fields:
+        base = _BASE_TYPES.get(base_type & 0x1F)
+        wanted = _FIELDS.get((global_number, number))
+        if number == _TIMESTAMP:
+            wanted = ("timestamp", 1, FIT_EPOCH)
+        if wanted is None or base is None or struct.calcsize("<" + base[0]) != size:
+            fmt.append(f"{size}x")  # Skipped, or an array field
+            continue
+        fmt.append(base[0])
+        fields.append((*wanted, base[1]))
+    return _Definition(global_number, struct.Struct("".join(fmt)), fields, developer_size)
+
+
+def _read(stream: IO[bytes], size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise FitError("unexpected end of file")
+    return data
+
+
+def _decode(definition: _Definition, data: bytes) -> dict[str, float]:
+    """Decode the wanted fields of a data message, omitting invalid values."""
+    message = {}
+    for (name, scale, offset, invalid), raw in zip(
+        definition.fields, definition.struct.unpack(data), strict=True
+    ):
+        if raw == invalid or (invalid is None and math.isnan(raw)):
+            continue
+        message[name] = raw * scale + offset
+    return message
+
+
+def parse_fit(stream: IO[bytes]) -> Track:
+    """Read a FIT activity file.
+
+    Args:
+        stream: Binary file object positioned at the start of the file
+
+    Returns:
+        The recorded track
+
+    Raises:
+        FitError: If the file is not a valid FIT file
+    """
+    track = Track()
+    nan = math.nan
+    sessions: list[dict[str, float]] = []
+
+    while header_size := stream.read(1):
+        # A file may hold several chained FIT files
+        header = header_size + _read(stream, header_size[0] - 1)
+        if len(header) < 12 or header[8:12] != b".FIT":
+            raise FitError("missing FIT file header")
+        remaining = int.from_bytes(header[4:8], "little")
+
+        definitions: dict[int, _Definition] = {}
+        last_timestamp = 0
+        while remaining > 0:
+            record_header = _read(stream, 1)[0]
+            remaining -= 1
+
+            if record_header & 0x80:
+                # Compressed timestamp header: a data message with a 5-bit time offset
+                local = (record_header >> 5) & 0x03
+                offset = record_header & 0x1F
+                timestamp = (last_timestamp & ~0x1F) + offset
+                if offset < (last_timestamp & 0x1F):
+                    timestamp += 0x20
+                last_timestamp = timestamp
+            elif record_header & 0x40:
+                # Definition message
+                local = record_header & 0x0F
+                fixed = _read(stream, 5)
+                big_endian = fixed[1] == 1
+                global_number = int.from_bytes(fixed[2:4], "big" if big_endian else "little")
+                field_data = _read(stream, 3 * fixed[4])
+                raw_fields = [
+                    (field_data[i], field_data[i + 1], field_data[i + 2])
+                    for i in range(0, len(field_data), 3)
+                ]
+                remaining -= 5 + len(field_data)
+                developer_size = 0
+                if record_header & 0x20:
+                    count = _read(stream, 1)[0]
+                    developer_data = _read(stream, 3 * count)
+                    developer_size = sum(developer_data[i + 1] for i in range(0, 3 * count, 3))
+                    remaining -= 1 + len(developer_data)
+                definitions[local] = _compile(global_number, big_endian, raw_fields, developer_size)
+                continue
+            else:
+                local = record_header & 0x0F
+                timestamp = None
+
+            definition = definitions.get(local)
+            if definition is None:
+                raise FitError(f"data message for undefined local type {local}")
+            data = _read(stream, definition.struct.size)
+            if definition.developer_size:
+                _read(stream, definition.developer_size)
+            remaining -= definition.struct.size + definition.developer_size
+            if not definition.fields:
+                continue
+
+            message = _decode(definition, data)
+            if "timestamp" in message:
+                last_timestamp = int(message["timestamp"]) - FIT_EPOCH
+            elif timestamp is not None:
+                message["timestamp"] = timestamp + FIT_EPOCH
+
+            if definition.global_number == _RECORD and "timestamp" in message:
+                get = message.get
+                track.add(
+                    message["timestamp"],
+                    (
+                        get("latitude", nan),
+                        get("longitude", nan),
+                        get("enhanced_altitude", get("altitude", nan)),
+                        get("distance", nan),
+                        get("heartrate", nan),
+                        get("cadence", nan),
+                        get("power", nan),
+                        get("enhanced_speed", get("speed", nan)),
+                    ),
+                )
+            elif definition.global_number == _SESSION:
+                sessions.append(message)
+
+        _read(stream, 2)  # File CRC
+
+    if sessions:
+        _summarize_sessions(track, sessions)
+    return track
+
+
+def _summarize_sessions(track: Track, sessions: list[dict[str, float]]) -> None:
+    """Fill the track summary from its session messages."""
+    first = sessions[0]
+    sports = {session.get("sport") for session in sessions}
+    if len(sports) == 1 and "sport" in first:
+        track.sport = sport_type(SPORTS.get(int(first["sport"])))
+    track.start_time = min(session.get("start_time", math.inf) for session in sessions)
+    if math.isinf(track.start_time):
+        track.start_time = None
+
+    def total(name: str) -> float | None:
+        values = [session[name] for session in sessions if name in session]
+        return sum(values) if values else None
+
+    track.duration = total("total_timer_time")
+    track.distance = total("total_distance")
+    track.elevation_gain = total("total_ascent")
+    track.calories = total("total_calories")
+    heartrates = [session.get("max_heart_rate") for session in sessions]
+    track.max_heartrate = max((hr for hr in heartrates if hr is not None), default=None)
+    if len(sessions) == 1:
+        track.average_heartrate = first.get("avg_heart_rate")
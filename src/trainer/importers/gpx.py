@@ -0,0 +1,159 @@
+"""Streaming readers for GPX and TCX activity files.
+
+Both formats are parsed incrementally with ``iterparse``; each track point is
+converted to a sample as soon as it has been read and then removed from the
+tree, so memory use does not grow with the number of points.
+"""
+
+import functools
+import math
+import xml.etree.ElementTree as ET
+from collections.abc import Iterator
+from typing import IO
+
+from trainer.importers.track import Track, parse_time, sport_type
+
+
+@functools.cache
+def _local_name(tag: str) -> str:
+    """Strip the namespace from an element tag."""
+    return tag.rpartition("}")[2]
+
+
+def _float(text: str | None) -> float:
+    try:
+        return float(text) if text else math.nan
+    except ValueError:
+        return math.nan
+
+
+def _iter_elements(
+    stream: IO[bytes], discard: frozenset[str] = frozenset()
+) -> Iterator[tuple[str, ET.Element]]:
+    """Yield (local tag name, element) as each element is completed.
+
+    Elements with a local name in ``discard`` are removed from their parent
+    once the caller has read them, so the partial tree stays small.
+    """
+    parents: list[ET.Element] = []
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+        parents.pop()
+        tag = _local_name(element.tag)
+        yield tag, element
+        if tag in discard and parents:
+            parents[-1].remove(element)
+
+
+def _child_text(element: ET.Element) -> dict[str, str | None]:
+    """Text of an element's descendants, by local tag name."""
+    return {_local_name(child.tag): child.text for child in element.iter()}
+
+
+def parse_gpx(stream: IO[bytes]) -> Track:
+    """Read a GPX track.
+
+    Heart rate, cadence and power are read from Garmin's TrackPointExtension
+    and the common ``power`` extension when present.
+
+    Args:
+        stream: Binary file object positioned at the start of the file
+
+    Returns:
+        The recorded track
+    """
+    track = Track()
+    in_points = False
+
+    for tag, element in _iter_elements(stream, frozenset({"trkpt"})):
+        if tag == "trkpt":
+            in_points = True
+            values = _child_text(element)
+            time = values.get("time")
+            if time:
+                track.add(
+                    parse_time(time),
+                    (
+                        _float(element.get("lat")),
+                        _float(element.get("lon")),
+                        _float(values.get("ele")),
+                        math.nan,
+                        _float(values.get("hr")),
+                        _float(values.get("cad")),
+                        _float(values.get("power")),
+                        _float(values.get("speed")),
+                    ),
+                )
+        elif in_points:
+            continue
+        elif tag == "name" and track.name is None:
+            track.name = (element.text or "").strip() or None
+        elif tag == "type":
+            track.sport = sport_type(element.text)
+
+    return track
+
+
+def parse_tcx(stream: IO[bytes]) -> Track:
+    """Read a Garmin Training Center (TCX) activity.
+
+    Summary values are totalled over the activity's laps.
+
+    Args:
+        stream: Binary file object positioned at the start of the file
+
+    Returns:
+        The recorded track
+    """
+    track = Track()
+    duration = distance = calories = 0.0
+    max_heartrate = math.nan
+    laps = 0
+
+    for tag, element in _iter_elements(stream, frozenset({"Trackpoint", "Lap"})):
+        if tag == "Trackpoint":
+            values = _child_text(element)
+            time = values.get("Time")
+            if time:
+                track.add(
+                    parse_time(time),
+                    (
+                        _float(values.get("LatitudeDegrees")),
+                        _float(values.get("LongitudeDegrees")),
+                        _float(values.get("AltitudeMeters")),
+                        _float(values.get("DistanceMeters")),
+                        _float(values.get("Value")),  # HeartRateBpm/Value
+                        _float(values.get("Cadence") or values.get("RunCadence")),
+                        _float(values.get("Watts")),
+                        _float(values.get("Speed")),
+                    ),
+                )
+        elif tag == "Lap":
+            laps += 1
+            if element.get("StartTime") and track.start_time is None:
+                track.start_time = parse_time(element.get("StartTime", ""))
+            for child in element:
+                name = _local_name(child.tag)
+                if name == "TotalTimeSeconds":
+                    duration += _float(child.text)
+                elif name == "DistanceMeters":
+                    distance += _float(child.text)
+                elif name == "Calories":
+                    calories += _float(child.text)
+                elif name == "MaximumHeartRateBpm":
+                    value = _float(child.findtext("{*}Value"))
+                    if math.isnan(max_heartrate) or value > max_heartrate:
+                        max_heartrate = value
+        elif tag == "Notes" and track.name is None:
+            track.name = (element.text or "").strip() or None
+        elif tag == "Activity":
+            track.sport = sport_type(element.get("Sport"))
+
+    if laps:
+        track.duration = None if math.isnan(duration) else duration
+        track.distance = None if math.isnan(distance) else distance
+        track.calories = None if math.isnan(calories) or calories == 0 else calories
+        track.max_heartrate = None if math.isnan(max_heartrate) else max_heartrate
+    return track
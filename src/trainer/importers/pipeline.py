@@ -0,0 +1,351 @@
+"""Bulk import pipeline for activity files and archives.
+
+Files are discovered lazily (directories are walked and ``.zip`` archives,
+such as a Strava bulk export, are listed member by member), parsed in a pool
+of worker processes and yielded as they finish. Only a bounded number of files
+are in flight at once, so memory use does not depend on how many files there
+are or how large an archive is. A worker process dying (e.g. killed for running
+out of memory on a huge file) fails only the file it was parsing.
+"""
+
+import contextlib
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+import zipfile
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, NamedTuple, cast
+
+from trainer.importers.fit import parse_fit
+from trainer.importers.gpx import parse_gpx, parse_tcx
+from trainer.importers.track import Track, build_workout
+from trainer.models import Workout
+from trainer.models.streams import WorkoutStreams
+
+logger = logging.getLogger(__name__)
+
+PARSERS: dict[str, Callable[[IO[bytes]], Track]] = {
+    ".fit": parse_fit,
+    ".gpx": parse_gpx,
+    ".tcx": parse_tcx,
+}
+
+# Most zip archives each process keeps open between member reads
+MAX_OPEN_ARCHIVES = 8
+
+# Archives opened by this process, by path, modification time and size
+_archives: OrderedDict[tuple[str, int, int], zipfile.ZipFile] = OrderedDict()
+_archives_pid: int | None = None
+
+
+class ImportSource(NamedTuple):
+    """A file to import: a path on disk, or a member of a zip archive."""
+
+    path: str
+    member: str | None = None
+
+    @property
+    def name(self) -> str:
+        """File name, without any ``.gz`` suffix."""
+        name = self.member or self.path
+        return name[:-3] if name.lower().endswith(".gz") else name
+
+    @property
+    def format(self) -> str:
+        """Lower-case file extension identifying the format (e.g. ``.fit``)."""
+        return os.path.splitext(self.name)[1].lower()
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.member}" if self.member else self.path
+
+
+@dataclass
+class ImportResult:
+    """Outcome of importing one file."""
+
+    source: ImportSource
+    workout: Workout | None = None
+    streams: WorkoutStreams | None = None
+    error: str | None = None
+
+
+@dataclass
+class ImportStats:
+    """Progress counters for an import."""
+
+    files: int = 0
+    imported: int = 0
+    failed: int = 0
+    duplicates: int = 0  # Imported before, or in another file of this import
+    started: float = 0.0
+    finished: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds the import took, or has taken so far."""
+        end = time.perf_counter() if self.finished is None else self.finished
+        return end - self.started
+
+    @property
+    def files_per_second(self) -> float:
+        """Average throughput so far."""
+        elapsed = self.elapsed
+        return self.files / elapsed if elapsed > 0 else 0.0
+
+
+def _is_supported(name: str) -> bool:
+    return ImportSource(name).format in PARSERS
+
+
+def iter_sources(paths: Iterable[str | os.PathLike[str]]) -> Iterator[ImportSource]:
+    """Find importable files, lazily.
+
+    Args:
+        paths: Files, directories (searched recursively) and zip archives
+
+    Yields:
+        Each FIT, GPX or TCX file found, optionally gzip-compressed
+    """
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                yield from iter_sources(Path(root) / name for name in sorted(files))
+        elif path.suffix.lower() == ".zip":
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and _is_supported(info.filename):
+                        yield ImportSource(str(path), info.filename)
+        elif _is_supported(path.name):
+            yield ImportSource(str(path))
+
+
+def _open_archive(path: str) -> zipfile.ZipFile:
+    """Return an open zip archive, reusing the one this process opened before.
+
+    Opening an archive reads its whole central directory, so reopening it for
+    every member would make importing an archive quadratic in its size.
+    """
+    global _archives_pid
+
+    if _archives_pid != os.getpid():
+        # File positions are shared with the parent after a fork, so don't reuse its archives
+        _archives.clear()
+        _archives_pid = os.getpid()
+
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    archive = _archives.get(key)
+    if archive is not None:
+        _archives.move_to_end(key)
+        return archive
+
+    archive = zipfile.ZipFile(path)
+    _archives[key] = archive
+    if len(_archives) > MAX_OPEN_ARCHIVES:
+        _archives.popitem(last=False)[1].close()
+    return archive
+
+
+@contextlib.contextmanager
+def open_source(source: ImportSource) -> Iterator[IO[bytes]]:
+    """Open a source for streaming reads, decompressing as needed.
+
+    Args:
+        source: File to open
+
+    Yields:
+        Binary file object
+    """
+    with contextlib.ExitStack() as stack:
+        if source.member is not None:
+            archive = _open_archive(source.path)
+            stream: IO[bytes] = stack.enter_context(archive.open(source.member))
+        else:
+            stream = stack.enter_context(open(source.path, "rb"))
+        if (source.member or source.path).lower().endswith(".gz"):
+            stream = cast(IO[bytes], stack.enter_context(gzip.GzipFile(fileobj=stream)))
+        yield stream
+
+
+def import_file(source: ImportSource) -> ImportResult:
+    """Parse one file into a workout and its streams.
+
+    Errors are captured in the result rather than raised, so one bad file
+    does not stop a bulk import.
+
+    Args:
+        source: File to import
+
+    Returns:
+        The import result
+    """
+    try:
+        with open_source(source) as stream:
+            track = PARSERS[source.format](stream)
+        workout, streams = build_workout(track, source.name)
+    except Exception as e:
+        return ImportResult(source, error=f"{type(e).__name__}: {e}")
+    return ImportResult(source, workout, streams)
+
+
+def import_files(
+    paths: Iterable[str | os.PathLike[str]],
+    workers: int | None = None,
+    max_pending: int | None = None,
+) -> Iterator[ImportResult]:
+    """Import many files in parallel.
+
+    Args:
+        paths: Files, directories and zip archives to import
+        workers: Number of worker processes (defaults to the CPU count; 1 parses in-process)
+        max_pending: Most files in flight at once (defaults to four per worker)
+
+    Yields:
+        A result for every file, in completion order
+    """
+    workers = workers or os.cpu_count() or 1
+    sources = iter_sources(paths)
+    if workers == 1:
+        yield from map(import_file, sources)
+        return
+
+    max_pending = max_pending or 4 * workers
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending: dict[Future[ImportResult], ImportSource] = {}
+        # Files in flight when a worker process died, any of which may have killed it
+        suspects: list[ImportSource] = []
+        exhausted = False
+        while pending or suspects or not exhausted:
+            if suspects:
+                # Parse them one at a time in a new pool, so only the culprit fails
+                source = suspects.pop(0)
+                try:
+                    result = pool.submit(import_file, source).result()
+                except BrokenProcessPool:
+                    logger.warning(f"Worker process died parsing {source}; restarting the pool")
+                    result = ImportResult(source, error="Worker process died (out of memory?)")
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=workers)
+                yield result
+                continue
+
+            while not exhausted and len(pending) < max_pending:
+                next_source = next(sources, None)
+                if next_source is None:
+                    exhausted = True
+                    break
+                try:
+                    pending[pool.submit(import_file, next_source)] = next_source
+                except BrokenProcessPool:
+                    suspects.append(next_source)
+                    break
+            if pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        suspects.append(source)
+                    else:
+                        yield result
+            if suspects:
+                # Every file still in flight failed with the pool
+                suspects.extend(pending.values())
+                pending.clear()
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        pool.shutdown()
+
+
+def run_import(
+    paths: Iterable[str | os.PathLike[str]],
+    output: str | os.PathLike[str] | None = None,
+    workers: int | None = None,
+    progress_interval: float = 5.0,
+) -> ImportStats:
+    """Import files, optionally saving the results, and report progress.
+
+    With an output directory, workouts are merged into ``workouts.jsonl`` by
+    ID, so re-importing the same files replaces their workouts rather than
+    duplicating them, and each workout's streams are saved to
+    ``streams/<workout id>.npz``. The merged file and the streams are written
+    alongside (to ``workouts.jsonl.tmp`` and ``streams.tmp/``) and replace the
+    old ones when the import finishes, so an interrupted import leaves them
+    unchanged.
+
+    Args:
+        paths: Files, directories and zip archives to import
+        output: Directory to save results in (None only parses and validates)
+        workers: Number of worker processes (defaults to the CPU count)
+        progress_interval: Seconds between progress log messages
+
+    Returns:
+        Final import statistics
+    """
+    stats = ImportStats(started=time.perf_counter())
+    last_report = stats.started
+    imported_ids: set[str] = set()
+
+    with contextlib.ExitStack() as stack:
+        workouts_file = None
+        if output is not None:
+            output = Path(output)
+            (output / "streams").mkdir(parents=True, exist_ok=True)
+            # Left over from an interrupted import
+            shutil.rmtree(output / "streams.tmp", ignore_errors=True)
+            (output / "streams.tmp").mkdir()
+            workouts_file = stack.enter_context(open(output / "workouts.jsonl.tmp", "w"))
+
+        for result in import_files(paths, workers):
+            stats.files += 1
+            if result.workout is None or result.streams is None:
+                stats.failed += 1
+                logger.warning(f"Could not import {result.source}: {result.error}")
+            else:
+                stats.imported += 1
+                if workouts_file is not None and output is not None:
+                    if result.workout.id in imported_ids:
+                        # The same activity in another file (e.g. as FIT and GPX); keep the first
+                        stats.duplicates += 1
+                    else:
+                        imported_ids.add(result.workout.id)
+                        workouts_file.write(result.workout.model_dump_json() + "\n")
+                        result.streams.save(output / "streams.tmp" / f"{result.workout.id}.npz")
+
+            if time.perf_counter() - last_report >= progress_interval:
+                last_report = time.perf_counter()
+                logger.info(
+                    f"Imported {stats.files:,} files ({stats.files_per_second:,.1f} files/s)"
+                )
+
+        if workouts_file is not None and output is not None:
+            # Keep previously imported workouts, unless they were imported again
+            with contextlib.suppress(FileNotFoundError), open(output / "workouts.jsonl") as old:
+                for line in old:
+                    if not line.strip():
+                        continue
+                    if json.loads(line)["id"] in imported_ids:
+                        stats.duplicates += 1
+                    else:
+                        workouts_file.write(line)
+            workouts_file.close()
+            os.replace(output / "workouts.jsonl.tmp", output / "workouts.jsonl")
+            for path in (output / "streams.tmp").iterdir():
+                os.replace(path, output / "streams" / path.name)
+            (output / "streams.tmp").rmdir()
+
+    stats.finished = time.perf_counter()
+    return stats
@@ -0,0 +1,193 @@
+"""Conversion of raw recorded tracks into workouts and streams."""
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import numpy as np
+
+from trainer.models import Workout
+from trainer.models.streams import MAX_GAP, STREAM_CHANNELS, WorkoutStreams
+from trainer.routes.polyline import downsample_path, encode_polyline
+
+_UTC = timezone.utc  # noqa: UP017 - datetime.UTC requires Python 3.11
+
+_EARTH_RADIUS = 6_371_000.0
+
+# Below this speed (m/s) a recording interval does not count as moving time
+MIN_MOVING_SPEED = 0.5
+
+# Spacing of the points kept in a workout's summary polyline, in meters
+POLYLINE_SPACING = 25.0
+
+# Sport names used by devices and exports, mapped to Strava activity types
+SPORT_TYPES = {
+    "running": "Run",
+    "run": "Run",
+    "cycling": "Ride",
+    "biking": "Ride",
+    "ride": "Ride",
+    "swimming": "Swim",
+    "swim": "Swim",
+    "walking": "Walk",
+    "walk": "Walk",
+    "hiking": "Hike",
+    "hike": "Hike",
+    "rowing": "Rowing",
+    "alpine_skiing": "AlpineSki",
+    "cross_country_skiing": "NordicSki",
+}
+
+
+def sport_type(sport: str | None) -> str:
+    """Map a device or export sport name to a Strava activity type."""
+    if not sport:
+        return "Workout"
+    return SPORT_TYPES.get(sport.strip().lower(), "Workout")
+
+
+def parse_time(text: str) -> float:
+    """Parse an ISO 8601 timestamp into Unix seconds (naive times are UTC)."""
+    text = text.strip()
+    if text.endswith("Z"):
+        # fromisoformat only accepts "Z" from Python 3.11
+        text = text[:-1] + "+00:00"
+    value = datetime.fromisoformat(text)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=_UTC)
+    return value.timestamp()
+
+
+@dataclass
+class Track:
+    """Samples and summary values read from one activity file.
+
+    ``samples`` holds one tuple per recorded point, in ``STREAM_CHANNELS``
+    order, with NaN for values that were not recorded. Summary values are
+    those the file states itself; anything missing is derived from the samples.
+    """
+
+    sport: str = "Workout"  # Strava activity type, see sport_type
+    name: str | None = None
+    start_time: float | None = None
+    timestamps: list[float] = field(default_factory=list)
+    samples: list[tuple[float, ...]] = field(default_factory=list)
+    distance: float | None = None
+    duration: float | None = None
+    elevation_gain: float | None = None
+    calories: float | None = None
+    average_heartrate: float | None = None
+    max_heartrate: float | None = None
+
+    def add(self, timestamp: float, sample: tuple[float, ...]) -> None:
+        """Record one sample (values in ``STREAM_CHANNELS`` order)."""
+        self.timestamps.append(timestamp)
+        self.samples.append(sample)
+
+
+def _haversine_distances(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Distances in meters between consecutive points (NaN where a point is missing)."""
+    lat, lng = np.radians(latitude), np.radians(longitude)
+    a = (
+        np.sin(np.diff(lat) / 2) ** 2
+        + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lng) / 2) ** 2
+    )
+    distances: np.ndarray = 2 * _EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return distances
+
+
+def _cumulative_distance(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Running distance along the track, skipping points without a position."""
+    distance = np.full(len(latitude), np.nan)
+    located = np.flatnonzero(~np.isnan(latitude) & ~np.isnan(longitude))
+    if len(located):
+        steps = _haversine_distances(latitude[located], longitude[located])
+        distance[located] = np.concatenate(([0.0], np.cumsum(steps)))
+    return distance
+
+
+def build_workout(track: Track, source: str) -> tuple[Workout, WorkoutStreams]:
+    """Build a workout and its per-second streams from a recorded track.
+
+    Args:
+        track: Track read from an activity file
+        source: Name of the file, used when the track has no name of its own
+
+    Returns:
+        The workout and its streams
+
+    Raises:
+        ValueError: If the track has no timestamped samples
+    """
+    if not track.timestamps:
+        raise ValueError(f"{source}: no timestamped samples")
+
+    order = np.argsort(track.timestamps, kind="stable")
+    timestamps = np.asarray(track.timestamps, dtype=np.float64)[order]
+    values = np.asarray(track.samples, dtype=np.float64).reshape(len(order), -1)[order]
+    columns = dict(zip(STREAM_CHANNELS, values.T, strict=True))
+
+    start = track.start_time if track.start_time is not None else float(timestamps[0])
+    seconds = timestamps - start
+
+    distance = columns["distance"]
+    if np.isnan(distance).all():
+        distance = columns["distance"] = _cumulative_distance(
+            columns["latitude"], columns["longitude"]
+        )
+    has_distance = not np.isnan(distance).all()
+    total_distance = track.distance
+    if total_distance is None:
+        total_distance = float(np.nanmax(distance) - np.nanmin(distance)) if has_distance else 0.0
+
+    duration = track.duration
+    if duration is None:
+        # Moving time: recording intervals that are neither pauses nor standing still
+        dt = np.diff(seconds)
+        moving = dt <= MAX_GAP
+        if has_distance:
+            step = np.diff(distance)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                moving &= ~(step / dt < MIN_MOVING_SPEED)
+        duration = float(dt[moving].sum())
+
+    elevation_gain = track.elevation_gain
+    if elevation_gain is None and not np.isnan(columns["altitude"]).all():
+        climbs = np.diff(columns["altitude"][~np.isnan(columns["altitude"])])
+        elevation_gain = float(climbs[climbs > 0].sum())
+
+    heartrate = columns["heartrate"]
+    has_heartrate = not np.isnan(heartrate).all()
+    average_heartrate = track.average_heartrate
+    max_heartrate = track.max_heartrate
+    if average_heartrate is None and has_heartrate:
+        average_heartrate = float(np.nanmean(heartrate))
+    if max_heartrate is None and has_heartrate:
+        max_heartrate = float(np.nanmax(heartrate))
+
+    polyline = None
+    located = ~(np.isnan(columns["latitude"]) | np.isnan(columns["longitude"]))
+    if located.sum() >= 2:
+        latitude, longitude = columns["latitude"][located], columns["longitude"][located]
+        kept = downsample_path(latitude, longitude, POLYLINE_SPACING)
+        polyline = encode_polyline(latitude[kept], longitude[kept])
+
+    start_date = datetime.fromtimestamp(start, _UTC)
+    # Deterministic ID, so the same activity imported from several files deduplicates
+    digest = hashlib.sha1(f"{start_date.isoformat()}|{track.sport}".encode()).hexdigest()
+
+    workout = Workout(
+        id=f"import-{digest[:16]}",
+        name=track.name or source.rsplit("/", 1)[-1].split(".", 1)[0],
+        type=track.sport,
+        start_date=start_date,
+        distance=total_distance,
+        duration=round(duration),
+        elevation_gain=elevation_gain,
+        average_heartrate=average_heartrate,
+        max_heartrate=max_heartrate,
+        average_speed=total_distance / duration if duration > 0 else None,
+        calories=track.calories,
+        polyline=polyline,
+    )
+    return workout, WorkoutStreams.resample(seconds, columns)
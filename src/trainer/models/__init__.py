@@ -1,6 +1,15 @@
 """Data models and schemas."""
 
+from .streams import WorkoutStreams
 from .training_plan import TrainingPlan, TrainingWeek
 from .workout import Workout, WorkoutAnalysis
+from .workout_table import WorkoutTable
 
-__all__ = ["Workout", "WorkoutAnalysis", "TrainingPlan", "TrainingWeek"]
+__all__ = [
+    "Workout",
+    "WorkoutAnalysis",
+    "WorkoutTable",
+    "WorkoutStreams",
+    "TrainingPlan",
+    "TrainingWeek",
+]
@@ -0,0 +1,204 @@
+"""Bulk ingestion of Strava activity JSON into Workout models."""
+
+import codecs
+import json
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from typing import Any, BinaryIO, TextIO
+
+from pydantic import TypeAdapter
+
+from .workout import Workout
+
+# Validates a whole JSON array in one call to pydantic-core
+WORKOUT_LIST_ADAPTER: TypeAdapter[list[Workout]] = TypeAdapter(list[Workout])
+
+_READ_SIZE = 64 * 1024
+_WHITESPACE = " \t\n\r"
+
+
+def parse_workouts(data: str | bytes) -> list[Workout]:
+    """Validate a JSON array of activities into Workout models.
+
+    Parsing and validation both happen in pydantic-core, which is much faster
+    than decoding with ``json`` and building each Workout individually.
+
+    Args:
+        data: JSON array of Strava activities
+
+    Returns:
+        List of validated workouts
+    """
+    return WORKOUT_LIST_ADAPTER.validate_json(data)
+
+
+def construct_workouts(records: Iterable[Mapping[str, Any]]) -> list[Workout]:
+    """Build Workout models from trusted records without validation.
+
+    Only use this for data that has already been validated, such as the output
+    of ``Workout.model_dump()``: values are stored as-is, so records must
+    already hold the right field types (e.g. ``datetime`` start dates).
+
+    Args:
+        records: Previously validated workout records
+
+    Returns:
+        List of workouts
+    """
+    return [Workout.model_construct(**record) for record in records]
+
+
+def content_text(content: Sequence[Any]) -> str:
+    """Join the text blocks of MCP tool result content.
+
+    Args:
+        content: ``result.content`` from ``session.call_tool``
+
+    Returns:
+        The concatenated text
+    """
+    return "".join(getattr(block, "text", None) or "" for block in content)
+
+
+def tool_result_text(result: Mapping[str, Any]) -> str | None:
+    """Join the text blocks of a successful Strava tool result.
+
+    Args:
+        result: Dictionary returned by one of the Strava tools
+
+    Returns:
+        The result text, or None if the tool call failed
+    """
+    if result.get("status") != "success":
+        return None
+    return content_text(result.get("data") or [])
+
+
+class NonJSONContentError(ValueError):
+    """Raised when an MCP tool result is text rather than JSON activities."""
+
+
+def parse_mcp_content(content: Sequence[Any]) -> list[Workout]:
+    """Parse workouts from the content blocks of an MCP tool result.
+
+    Args:
+        content: ``result.content`` from ``session.call_tool``, holding a JSON
+            array of activities or a single activity (e.g. activity details)
+
+    Returns:
+        List of validated workouts
+
+    Raises:
+        NonJSONContentError: If the content is not a JSON array or object
+        ValueError: If the JSON does not validate as activities
+    """
+    text = content_text(content)
+    start = text.lstrip()[:1]
+    if start == "{":
+        return [Workout.model_validate_json(text)]
+    if start != "[":
+        raise NonJSONContentError("MCP result does not contain JSON activities")
+    return parse_workouts(text)
+
+
+def _iter_text(source: Iterable[str | bytes] | BinaryIO | TextIO) -> Iterator[str]:
+    """Yield text chunks from a file object or an iterable of str/bytes chunks."""
+    if hasattr(source, "read"):
+        read = source.read
+        chunks: Iterable[str | bytes] = iter(lambda: read(_READ_SIZE), read(0))
+    else:
+        chunks = source
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for chunk in chunks:
+        yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+    yield decoder.decode(b"", final=True)
+
+
+def iter_activity_records(
+    source: Iterable[str | bytes] | BinaryIO | TextIO,
+) -> Iterator[dict[str, Any]]:
+    """Incrementally decode the elements of a JSON array.
+
+    Only one element (plus the current read chunk) is held in memory at a
+    time, so arbitrarily large responses can be processed.
+
+    Args:
+        source: A file object, or an iterable of str/bytes chunks, holding a JSON array
+
+    Yields:
+        Each element of the array
+
+    Raises:
+        ValueError: If the input is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    finished = False
+    exhausted = False
+    chunks = _iter_text(source)
+
+    while True:
+        # Skip separators up to the start of the next element
+        while position < len(buffer) and not finished:
+            char = buffer[position]
+            if char in _WHITESPACE:
+                position += 1
+            elif not started:
+                if char != "[":
+                    raise ValueError(f"Expected a JSON array, found {char!r}")
+                started = True
+                position += 1
+            elif char == ",":
+                position += 1
+            elif char == "]":
+                finished = True
+            else:
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if exhausted:
+                        raise ValueError("Malformed JSON array") from None
+                    break  # Element continues in the next chunk
+                if end == len(buffer) and not exhausted:
+                    break  # A number may continue in the next chunk
+                yield record
+                position = end
+
+        if finished:
+            return
+
+        if exhausted:
+            raise ValueError("Unexpected end of input while decoding JSON array")
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+            chunk = ""
+        buffer = buffer[position:] + chunk
+        position = 0
+
+
+def iter_workouts(
+    source: Iterable[str | bytes] | BinaryIO | TextIO, batch_size: int = 1000
+) -> Iterator[Workout]:
+    """Stream Workout models out of a large JSON array of activities.
+
+    Elements are decoded incrementally and validated in batches, so memory
+    use is bounded by ``batch_size`` rather than the size of the response.
+
+    Args:
+        source: A file object, or an iterable of str/bytes chunks, holding a JSON array
+        batch_size: Number of activities to validate at once
+
+    Yields:
+        Validated workouts in input order
+    """
+    batch: list[dict[str, Any]] = []
+    for record in iter_activity_records(source):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield from WORKOUT_LIST_ADAPTER.validate_python(batch)
+            batch = []
+    if batch:
+        yield from WORKOUT_LIST_ADAPTER.validate_python(batch)
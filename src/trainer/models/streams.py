@@ -0,0 +1,126 @@
+"""Per-second sample streams for a single workout."""
+
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+# Sample channels, in the order importers record them
+STREAM_CHANNELS = (
+    "latitude",
+    "longitude",
+    "altitude",
+    "distance",
+    "heartrate",
+    "cadence",
+    "power",
+    "speed",
+)
+
+# Samples further apart than this (in seconds) are a pause, not interpolated across
+MAX_GAP = 10.0
+
+
+class WorkoutStreams:
+    """Per-second samples recorded during a workout.
+
+    ``time`` holds whole seconds since the start of the workout and each
+    channel is a float64 array of the same length, with NaN where nothing was
+    recorded (before the first sample, after the last and during pauses).
+    Channels the device never recorded are left out entirely.
+    """
+
+    def __init__(self, time: np.ndarray, channels: Mapping[str, np.ndarray]):
+        """Create streams from pre-built arrays.
+
+        Most callers should use ``resample`` instead.
+
+        Args:
+            time: Seconds since the start of the workout (int64)
+            channels: Channel name to float64 array, each the same length as ``time``
+        """
+        self.time = time
+        self.channels = dict(channels)
+
+    @classmethod
+    def resample(
+        cls,
+        seconds: np.ndarray,
+        samples: Mapping[str, np.ndarray],
+        max_gap: float = MAX_GAP,
+    ) -> "WorkoutStreams":
+        """Resample irregular recordings onto a one-second grid.
+
+        Values are linearly interpolated between recorded samples that are at
+        most ``max_gap`` seconds apart.
+
+        Args:
+            seconds: Sample times in seconds since the start, in ascending order
+            samples: Channel name to sample values (NaN where not recorded)
+            max_gap: Longest gap between samples to interpolate across
+
+        Returns:
+            The resampled streams
+        """
+        seconds = np.asarray(seconds, dtype=np.float64)
+        end = int(np.ceil(seconds[-1])) if len(seconds) else -1
+        grid = np.arange(end + 1, dtype=np.int64)
+
+        channels: dict[str, np.ndarray] = {}
+        for name, values in samples.items():
+            values = np.asarray(values, dtype=np.float64)
+            valid = ~np.isnan(values)
+            if not valid.any():
+                continue
+            known_times, known_values = seconds[valid], values[valid]
+            resampled = np.interp(grid, known_times, known_values, left=np.nan, right=np.nan)
+
+            # Blank out seconds that fall inside a pause
+            after = np.clip(np.searchsorted(known_times, grid), 1, len(known_times) - 1)
+            gap = known_times[after] - known_times[after - 1]
+            in_pause = (
+                (gap > max_gap) & (grid > known_times[after - 1]) & (grid < known_times[after])
+            )
+            resampled[in_pause] = np.nan
+            channels[name] = resampled
+        return cls(grid, channels)
+
+    def __len__(self) -> int:
+        """Number of seconds covered."""
+        return len(self.time)
+
+    def __getitem__(self, channel: str) -> np.ndarray:
+        """Return one channel's samples."""
+        return self.channels[channel]
+
+    def __contains__(self, channel: object) -> bool:
+        """Whether the channel was recorded."""
+        return channel in self.channels
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the arrays in bytes."""
+        return self.time.nbytes + sum(values.nbytes for values in self.channels.values())
+
+    def save(self, path: str | os.PathLike[str]) -> None:
+        """Save the streams as a compressed ``.npz`` file.
+
+        Args:
+            path: Destination file
+        """
+        # Channel names are fixed (STREAM_CHANNELS), so they cannot clash with allow_pickle
+        np.savez_compressed(path, time=self.time, **self.channels)  # type: ignore[arg-type]
+
+    @classmethod
+    def load(cls, path: str | os.PathLike[str]) -> "WorkoutStreams":
+        """Load streams saved with ``save``.
+
+        Args:
+            path: Source file
+
+        Returns:
+            The loaded streams
+        """
+        with np.load(path) as data:
+            channels = {name: data[name] for name in data.files if name != "time"}
+            return cls(data["time"], channels)
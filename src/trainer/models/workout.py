@@ -1,24 +1,70 @@
 """Workout data models."""
 
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, AliasPath, BaseModel, ConfigDict, Field
 
 
 class Workout(BaseModel):
-    """Represents a workout/activity from Strava."""
+    """Represents a workout/activity from Strava.
+
+    Raw Strava activity JSON validates directly: numeric IDs are coerced to
+    strings, ``moving_time``/``total_elevation_gain`` are accepted as aliases
+    for ``duration``/``elevation_gain`` and the route is read from
+    ``map.summary_polyline``.
+    """
+
+    model_config = ConfigDict(coerce_numbers_to_str=True)
 
     id: str
     name: str
     type: str  # e.g., "Run", "Ride", "Swim"
     start_date: datetime
+    start_date_local: datetime | None = Field(
+        default=None,
+        description="Start in the athlete's local time (Strava gives the wall-clock "
+        "time with a UTC offset of zero)",
+    )
     distance: float = Field(..., description="Distance in meters")
-    duration: int = Field(..., description="Duration in seconds")
-    elevation_gain: float | None = Field(None, description="Elevation gain in meters")
+    duration: int = Field(
+        ...,
+        validation_alias=AliasChoices("duration", "moving_time"),
+        description="Duration in seconds",
+    )
+    elevation_gain: float | None = Field(
+        None,
+        validation_alias=AliasChoices("elevation_gain", "total_elevation_gain"),
+        description="Elevation gain in meters",
+    )
     average_heartrate: float | None = None
     max_heartrate: float | None = None
     average_speed: float | None = Field(None, description="Speed in m/s")
     calories: float | None = None
+    polyline: str | None = Field(
+        None,
+        validation_alias=AliasChoices("polyline", AliasPath("map", "summary_polyline")),
+        description="Route as an encoded polyline",
+    )
+
+    @property
+    def local_date(self) -> date:
+        """Day the workout started on in the athlete's time zone (UTC if unknown)."""
+        return (self.start_date_local or self.start_date).date()
+
+    @property
+    def utc_offset(self) -> timedelta | None:
+        """The athlete's UTC offset when the workout started (None if unknown)."""
+        if self.start_date_local is None:
+            return None
+        start_utc = self.start_date.replace(tzinfo=None) - (
+            self.start_date.utcoffset() or timedelta()
+        )
+        return self.start_date_local.replace(tzinfo=None) - start_utc
+
+    @property
+    def training_load(self) -> float:
+        """Time-based training load: moving time in minutes."""
+        return self.duration / 60
 
 
 class WorkoutAnalysis(BaseModel):
@@ -0,0 +1,299 @@
+"""Column-oriented storage for large collections of workouts."""
+
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime, timezone
+from typing import Any, overload
+
+import numpy as np
+from numpy.dtypes import StringDType
+
+from .workout import Workout
+
+# Optional float fields of Workout, stored as float64 columns with NaN for None
+OPTIONAL_FLOAT_COLUMNS = (
+    "elevation_gain",
+    "average_heartrate",
+    "max_heartrate",
+    "average_speed",
+    "calories",
+)
+
+_EPOCH = np.datetime64(0, "s")
+_UTC = timezone.utc  # noqa: UP017 - datetime.UTC requires Python 3.11
+
+
+def _to_datetime64(value: datetime) -> np.datetime64:
+    """Convert a datetime to a naive UTC datetime64 with second resolution."""
+    if value.tzinfo is not None:
+        value = value.astimezone(_UTC).replace(tzinfo=None)
+    return np.datetime64(value, "s")
+
+
+class WorkoutTable:
+    """Compact, column-oriented container for many workouts.
+
+    Each Workout field is stored as a typed NumPy array: strings use the
+    variable-width StringDType, activity types are interned as small integer
+    codes into ``types``, start dates are ``datetime64[s]`` in UTC and missing
+    optional values are stored as NaN. Rows are only turned back into Workout
+    models when they are accessed.
+    """
+
+    def __init__(
+        self,
+        *,
+        id: np.ndarray,
+        name: np.ndarray,
+        type_code: np.ndarray,
+        types: Sequence[str],
+        start_date: np.ndarray,
+        distance: np.ndarray,
+        duration: np.ndarray,
+        elevation_gain: np.ndarray,
+        average_heartrate: np.ndarray,
+        max_heartrate: np.ndarray,
+        average_speed: np.ndarray,
+        calories: np.ndarray,
+    ):
+        """Create a table from pre-built column arrays.
+
+        Most callers should use ``from_workouts`` instead.
+
+        Args:
+            id: Activity IDs (StringDType)
+            name: Activity names (StringDType)
+            type_code: Index of each row's activity type in ``types``
+            types: Interned activity type names
+            start_date: Start times as UTC ``datetime64[s]``
+            distance: Distance in meters
+            duration: Duration in seconds
+            elevation_gain: Elevation gain in meters (NaN if missing)
+            average_heartrate: Average heart rate (NaN if missing)
+            max_heartrate: Maximum heart rate (NaN if missing)
+            average_speed: Speed in m/s (NaN if missing)
+            calories: Calories (NaN if missing)
+        """
+        self.id = id
+        self.name = name
+        self.type_code = type_code
+        self.types = tuple(types)
+        self.start_date = start_date
+        self.distance = distance
+        self.duration = duration
+        self.elevation_gain = elevation_gain
+        self.average_heartrate = average_heartrate
+        self.max_heartrate = max_heartrate
+        self.average_speed = average_speed
+        self.calories = calories
+
+        lengths = {len(column) for column in self._columns().values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All columns must have the same length, got {sorted(lengths)}")
+
+    @classmethod
+    def from_workouts(cls, workouts: Iterable[Workout]) -> "WorkoutTable":
+        """Build a table from Workout models.
+
+        Args:
+            workouts: Workouts to store
+
+        Returns:
+            A new table holding one row per workout
+        """
+        ids: list[str] = []
+        names: list[str] = []
+        type_codes: list[int] = []
+        type_index: dict[str, int] = {}
+        start_dates: list[np.datetime64] = []
+        distances: list[float] = []
+        durations: list[int] = []
+        optional: dict[str, list[float]] = {column: [] for column in OPTIONAL_FLOAT_COLUMNS}
+
+        for workout in workouts:
+            ids.append(workout.id)
+            names.append(workout.name)
+            type_codes.append(type_index.setdefault(workout.type, len(type_index)))
+            start_dates.append(_to_datetime64(workout.start_date))
+            distances.append(workout.distance)
+            durations.append(workout.duration)
+            for column, values in optional.items():
+                value = getattr(workout, column)
+                values.append(np.nan if value is None else value)
+
+        return cls(
+            id=np.array(ids, dtype=StringDType()),
+            name=np.array(names, dtype=StringDType()),
+            type_code=np.array(type_codes, dtype=np.uint16),
+            types=list(type_index),
+            start_date=np.array(start_dates, dtype="datetime64[s]"),
+            distance=np.array(distances, dtype=np.float64),
+            duration=np.array(durations, dtype=np.int64),
+            **{column: np.array(values, dtype=np.float64) for column, values in optional.items()},
+        )
+
+    def _columns(self) -> dict[str, np.ndarray]:
+        """Return the per-row column arrays keyed by field name."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "type_code": self.type_code,
+            "start_date": self.start_date,
+            "distance": self.distance,
+            "duration": self.duration,
+            **{column: getattr(self, column) for column in OPTIONAL_FLOAT_COLUMNS},
+        }
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    @overload
+    def __getitem__(self, key: int) -> Workout: ...
+
+    @overload
+    def __getitem__(self, key: slice | np.ndarray | Sequence[int]) -> "WorkoutTable": ...
+
+    def __getitem__(self, key: Any) -> "Workout | WorkoutTable":
+        """Return a single row as a Workout, or a sub-table.
+
+        Args:
+            key: Row index, slice, boolean mask or integer index array
+
+        Returns:
+            A Workout for an integer key, otherwise a new WorkoutTable
+        """
+        if isinstance(key, (int, np.integer)):
+            return self.row(int(key))
+        columns = {name: column[key] for name, column in self._columns().items()}
+        return WorkoutTable(types=self.types, **columns)
+
+    def __iter__(self) -> Iterator[Workout]:
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def __repr__(self) -> str:
+        return f"WorkoutTable(rows={len(self)}, types={list(self.types)})"
+
+    @property
+    def type(self) -> np.ndarray:
+        """Activity type name of every row."""
+        return np.take(np.array(self.types, dtype=StringDType()), self.type_code)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the column arrays, in bytes."""
+        return sum(column.nbytes for column in self._columns().values())
+
+    def row(self, index: int) -> Workout:
+        """Materialize a single row as a Workout.
+
+        Values were validated when the table was built, so the model is
+        constructed without re-running validation.
+
+        Args:
+            index: Row index (negative indices count from the end)
+
+        Returns:
+            The Workout stored at that row
+        """
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"Row index {index} out of range for table of length {len(self)}")
+
+        seconds = int((self.start_date[index] - _EPOCH) // np.timedelta64(1, "s"))
+        fields: dict[str, Any] = {
+            "id": str(self.id[index]),
+            "name": str(self.name[index]),
+            "type": self.types[self.type_code[index]],
+            "start_date": datetime.fromtimestamp(seconds, tz=_UTC),
+            "distance": float(self.distance[index]),
+            "duration": int(self.duration[index]),
+        }
+        for column in OPTIONAL_FLOAT_COLUMNS:
+            value = getattr(self, column)[index]
+            fields[column] = None if np.isnan(value) else float(value)
+        return Workout.model_construct(**fields)
+
+    def to_workouts(self) -> list[Workout]:
+        """Materialize every row as a Workout.
+
+        Returns:
+            List of Workout models in table order
+        """
+        return list(self)
+
+    def filter(
+        self,
+        *,
+        type: str | Iterable[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> "WorkoutTable":
+        """Select rows by activity type and start date.
+
+        Args:
+            type: Activity type, or several types, to keep
+            start: Keep workouts starting at or after this time
+            end: Keep workouts starting before this time
+
+        Returns:
+            A new table containing only the matching rows
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if type is not None:
+            wanted = {type} if isinstance(type, str) else set(type)
+            codes = [code for code, name in enumerate(self.types) if name in wanted]
+            mask &= np.isin(self.type_code, codes)
+        if start is not None:
+            mask &= self.start_date >= _to_datetime64(start)
+        if end is not None:
+            mask &= self.start_date < _to_datetime64(end)
+        return self[mask]
+
+    def total(self, column: str) -> float:
+        """Sum a numeric column, ignoring missing values.
+
+        Args:
+            column: Name of a numeric column (e.g. "distance", "duration")
+
+        Returns:
+            The column total
+        """
+        return float(np.nansum(getattr(self, column)))
+
+    def mean(self, column: str) -> float | None:
+        """Average a numeric column, ignoring missing values.
+
+        Args:
+            column: Name of a numeric column
+
+        Returns:
+            The column mean, or None if there are no values
+        """
+        values = np.asarray(getattr(self, column), dtype=np.float64)
+        present = ~np.isnan(values)
+        if not present.any():
+            return None
+        return float(values[present].mean())
+
+    def summary_by_type(self) -> dict[str, dict[str, float]]:
+        """Aggregate count, distance, duration and elevation per activity type.
+
+        Returns:
+            Mapping of activity type to its totals
+        """
+        bins = len(self.types)
+        counts = np.bincount(self.type_code, minlength=bins)
+        distance = np.bincount(self.type_code, weights=self.distance, minlength=bins)
+        duration = np.bincount(self.type_code, weights=self.duration, minlength=bins)
+        elevation = np.bincount(
+            self.type_code, weights=np.nan_to_num(self.elevation_gain), minlength=bins
+        )
+        return {
+            name: {
+                "count": int(counts[code]),
+                "distance": float(distance[code]),
+                "duration": float(duration[code]),
+                "elevation_gain": float(elevation[code]),
+            }
+            for code, name in enumerate(self.types)
+            if counts[code]
+        }
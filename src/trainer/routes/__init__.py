@@ -0,0 +1,27 @@
+"""Finding the routes athletes repeat and comparing their efforts on them."""
+
+from .clustering import (
+    AthleteRoutes,
+    RepeatedRoute,
+    RouteIndex,
+    format_route_efforts,
+    format_routes,
+    get_athlete_routes,
+    get_repeated_routes,
+    get_route_efforts,
+)
+from .polyline import decode_polyline, decode_polylines, encode_polyline
+
+__all__ = [
+    "AthleteRoutes",
+    "RepeatedRoute",
+    "RouteIndex",
+    "format_route_efforts",
+    "format_routes",
+    "get_athlete_routes",
+    "get_repeated_routes",
+    "get_route_efforts",
+    "decode_polyline",
+    "decode_polylines",
+    "encode_polyline",
+]
@@ -0,0 +1,589 @@
+"""Clustering activities into repeated routes and comparing efforts on them.
+
+Each activity's polyline is projected to meters and resampled to a fixed number
+of points spaced evenly along its length. Two activities follow the same route
+when, on average, the points of each lie close to the path of the other (a
+symmetric mean nearest-point distance), so a loop matches whichever way round
+and wherever on it the athlete started.
+
+Routes are found by leader clustering: an activity joins the closest existing
+route within the distance threshold, or starts a new one. Candidate routes are
+looked up in a grid keyed by the route's centroid and filtered by centroid
+distance and length (paths close to each other have close centroids), and the
+remaining candidates are compared in one vectorized NumPy operation, so adding
+an activity costs about the same whatever the size of the history.
+"""
+
+import bisect
+import logging
+import math
+from collections import defaultdict
+from collections.abc import Hashable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from trainer.models import Workout
+from trainer.routes.polyline import decode_polylines, path_lengths, project, resample_paths
+from trainer.sync.backfill import ensure_backfilled
+from trainer.sync.store import ActivityChange, ActivityStore, get_activity_store
+from trainer.utils.formatters import format_duration, format_pace
+
+logger = logging.getLogger(__name__)
+
+# Points each route is compared at
+ROUTE_SAMPLES = 32
+
+# Spacing and maximum number of points of the densely resampled path that the
+# sparse points of other activities are measured against
+_DENSE_SPACING = 40.0
+_MAX_DENSE_SAMPLES = 384
+
+# Routes shorter than this (e.g. treadmill runs with a stray GPS point) are not indexed
+MIN_ROUTE_LENGTH = 200.0
+
+# Activities decoded and resampled together when adding many
+_BATCH_SIZE = 1000
+
+# Sports shown as pace rather than speed
+_PACE_SPORTS = frozenset({"Run", "TrailRun", "VirtualRun", "Walk", "Hike"})
+
+# Days per trend step ("per month")
+_TREND_DAYS = 30
+
+
+@dataclass
+class _RouteShape:
+    """Resampled path of an activity, in meters."""
+
+    sparse: np.ndarray  # (ROUTE_SAMPLES, 2)
+    dense: np.ndarray  # (n, 2)
+    centroid: np.ndarray  # (2,)
+    length: float
+
+
+def _shapes(decoded: list[np.ndarray], samples: int) -> list[_RouteShape | None]:
+    """Build the shapes of decoded polylines, with None for those too short to compare."""
+    shapes: list[_RouteShape | None] = [None] * len(decoded)
+    usable = [i for i, points in enumerate(decoded) if len(points) >= 2]
+    if not usable:
+        return shapes
+    counts = np.array([len(decoded[i]) for i in usable])
+    points = project(np.concatenate([decoded[i] for i in usable]))
+    lengths = path_lengths(points, counts)
+    keep = lengths >= MIN_ROUTE_LENGTH
+    if not keep.any():
+        return shapes
+    # Drop the points of paths that are too short
+    points = points[np.repeat(keep, counts)]
+    counts, lengths = counts[keep], lengths[keep]
+
+    dense_counts = np.clip(lengths // _DENSE_SPACING, samples, _MAX_DENSE_SAMPLES).astype(int)
+    dense = resample_paths(points, counts, dense_counts)
+    sparse = resample_paths(points, counts, np.full(len(counts), samples))
+    dense_starts = np.cumsum(dense_counts) - dense_counts
+    dense_paths = np.split(dense, dense_starts[1:])
+    centroids = np.add.reduceat(dense, dense_starts) / dense_counts[:, None]
+    for n, i in enumerate(np.asarray(usable)[keep]):
+        shapes[i] = _RouteShape(
+            sparse=sparse[n * samples : (n + 1) * samples],
+            dense=dense_paths[n],
+            centroid=centroids[n],
+            length=float(lengths[n]),
+        )
+    return shapes
+
+
+def _nearest_distances(points: np.ndarray, paths: np.ndarray) -> np.ndarray:
+    """Mean distance from each set of points to the nearest point of its path.
+
+    Args:
+        points: (m, k, 2) points, or (k, 2) to measure against every path
+        paths: (m, n, 2) paths
+
+    Returns:
+        (m,) mean nearest-point distance in meters
+    """
+    # |p - q|^2 = |p|^2 + |q|^2 - 2 p.q, as one batched matrix product
+    squared = (
+        (points**2).sum(axis=-1)[..., :, None]
+        + (paths**2).sum(axis=-1)[:, None, :]
+        - 2 * points @ paths.transpose(0, 2, 1)
+    )
+    distances: np.ndarray = np.sqrt(np.maximum(squared.min(axis=-1), 0.0)).mean(axis=-1)
+    return distances
+
+
+def _stack(arrays: list[np.ndarray]) -> np.ndarray:
+    """Stack paths of different lengths, padding with each path's last point.
+
+    Repeating a point does not change nearest-point distances.
+    """
+    size = max(len(array) for array in arrays)
+    return np.stack([np.concatenate([a, np.repeat(a[-1:], size - len(a), axis=0)]) for a in arrays])
+
+
+@dataclass
+class RepeatedRoute:
+    """A route and the activities that followed it, oldest first."""
+
+    id: str  # ID of the first activity indexed on the route
+    sport_type: str
+    efforts: list[Workout] = field(default_factory=list)
+
+    def add(self, workout: Workout) -> None:
+        """Add an effort, keeping efforts in date order."""
+        bisect.insort(self.efforts, workout, key=lambda effort: effort.start_date)
+
+    @property
+    def distance(self) -> float:
+        """Median distance of the efforts, in meters."""
+        return float(np.median([effort.distance for effort in self.efforts]))
+
+    def speeds(self) -> np.ndarray:
+        """Average speed of each effort, in m/s (NaN without a moving time)."""
+        distance = np.array([effort.distance for effort in self.efforts])
+        duration = np.array([effort.duration for effort in self.efforts], dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(duration > 0, distance / duration, np.nan)
+
+    def _days(self) -> np.ndarray:
+        first = self.efforts[0].start_date
+        return np.array(
+            [(effort.start_date - first).total_seconds() / 86400 for effort in self.efforts]
+        )
+
+    def speed_trend(self) -> float | None:
+        """Change in speed per month, as a percentage of the mean (positive is faster).
+
+        Returns:
+            The trend, or None with fewer than three efforts on different days
+        """
+        return _trend(self._days(), self.speeds(), relative=True)
+
+    def heartrate_trend(self) -> float | None:
+        """Change in average heart rate per month, in bpm.
+
+        Returns:
+            The trend, or None with fewer than three efforts with heart rate
+        """
+        heartrates = np.array(
+            [
+                effort.average_heartrate if effort.average_heartrate is not None else np.nan
+                for effort in self.efforts
+            ]
+        )
+        return _trend(self._days(), heartrates)
+
+
+def _trend(days: np.ndarray, values: np.ndarray, relative: bool = False) -> float | None:
+    """Least-squares slope of values per month, ignoring NaNs."""
+    valid = ~np.isnan(values)
+    days, values = days[valid], values[valid]
+    if len(values) < 3 or np.ptp(days) < 1:
+        return None
+    slope = float(np.polyfit(days, values, 1)[0]) * _TREND_DAYS
+    return slope / float(values.mean()) * 100 if relative else slope
+
+
+class RouteIndex:
+    """An athlete's activities, clustered into routes as they are added."""
+
+    def __init__(
+        self,
+        threshold: float = 60.0,
+        length_tolerance: float = 0.15,
+        cell_size: float = 500.0,
+        samples: int = ROUTE_SAMPLES,
+    ) -> None:
+        """Create an empty index.
+
+        Args:
+            threshold: Largest mean distance between two activities on the same route, in meters
+            length_tolerance: Largest relative difference in length between them
+            cell_size: Size of the grid cells routes are indexed by, in meters
+            samples: Points each activity is compared at
+        """
+        self.threshold = threshold
+        self.length_tolerance = length_tolerance
+        self.cell_size = cell_size
+        self.samples = samples
+        self._routes: list[RepeatedRoute] = []
+        self._leaders: list[_RouteShape] = []
+        self._cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self._route_of: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._route_of)
+
+    def __contains__(self, activity_id: object) -> bool:
+        return activity_id in self._route_of
+
+    def _cell(self, centroid: np.ndarray) -> tuple[int, int]:
+        return (
+            math.floor(centroid[0] / self.cell_size),
+            math.floor(centroid[1] / self.cell_size),
+        )
+
+    def _candidates(self, shape: _RouteShape, sport_type: str) -> list[int]:
+        x, y = self._cell(shape.centroid)
+        candidates = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for index in self._cells.get((x + dx, y + dy), ()):
+                    leader = self._leaders[index]
+                    offset = leader.centroid - shape.centroid
+                    ratio = max(leader.length, shape.length) / min(leader.length, shape.length)
+                    if (
+                        math.hypot(offset[0], offset[1]) <= self.threshold
+                        and ratio <= 1 + self.length_tolerance
+                        and self._routes[index].sport_type == sport_type
+                    ):
+                        candidates.append(index)
+        return candidates
+
+    def _match(self, shape: _RouteShape, sport_type: str) -> int | None:
+        """Return the closest route within the threshold, if any."""
+        candidates = self._candidates(shape, sport_type)
+        if not candidates:
+            return None
+        leaders = [self._leaders[index] for index in candidates]
+        # Center on the activity so squared coordinates stay small
+        origin = shape.centroid
+        # From this activity to each route, then back from the routes still close
+        forward = _nearest_distances(
+            shape.sparse - origin, _stack([leader.dense for leader in leaders]) - origin
+        )
+        close = np.flatnonzero(forward <= self.threshold)
+        if not len(close):
+            return None
+        backward = _nearest_distances(
+            np.stack([leaders[i].sparse for i in close]) - origin, (shape.dense - origin)[None]
+        )
+        distance = np.maximum(forward[close], backward)
+        best = int(distance.argmin())
+        return candidates[close[best]] if distance[best] <= self.threshold else None
+
+    def _assign(self, workout: Workout, shape: _RouteShape) -> None:
+        index = self._match(shape, workout.type)
+        if index is not None:
+            self._routes[index].add(workout)
+            self._route_of[workout.id] = index
+            return
+
+        index = len(self._routes)
+        self._routes.append(RepeatedRoute(workout.id, workout.type, [workout]))
+        self._leaders.append(shape)
+        self._cells[self._cell(shape.centroid)].append(index)
+        self._route_of[workout.id] = index
+
+    def add(self, workouts: Iterable[Workout]) -> int:
+        """Add activities to the routes they follow, starting new routes as needed.
+
+        Activities without a usable polyline, or already indexed, are skipped.
+        Adding activities oldest first makes each route's shape that of its first effort.
+
+        Args:
+            workouts: Activities to add
+
+        Returns:
+            Number of activities indexed
+        """
+        pending = [w for w in workouts if w.polyline and w.id not in self._route_of]
+        added = 0
+        for start in range(0, len(pending), _BATCH_SIZE):
+            batch = pending[start : start + _BATCH_SIZE]
+            shapes = _shapes(self._decode(batch), self.samples)
+            for workout, shape in zip(batch, shapes, strict=True):
+                if shape is not None:
+                    self._assign(workout, shape)
+                    added += 1
+        return added
+
+    @staticmethod
+    def _decode(workouts: list[Workout]) -> list[np.ndarray]:
+        try:
+            return decode_polylines([w.polyline or "" for w in workouts])
+        except ValueError:
+            pass
+        # Decode one at a time so a corrupt polyline only skips its own activity
+        decoded = []
+        for workout in workouts:
+            try:
+                decoded.extend(decode_polylines([workout.polyline or ""]))
+            except ValueError as e:
+                logger.warning(f"Skipping activity {workout.id} with invalid polyline: {e}")
+                decoded.append(np.empty((0, 2)))
+        return decoded
+
+    def replace(self, workout: Workout) -> bool:
+        """Update an indexed activity whose route has not changed (e.g. renamed).
+
+        Args:
+            workout: The activity's current data
+
+        Returns:
+            Whether the activity was indexed
+        """
+        index = self._route_of.get(workout.id)
+        if index is None:
+            return False
+        route = self._routes[index]
+        route.efforts = [effort for effort in route.efforts if effort.id != workout.id]
+        route.add(workout)
+        return True
+
+    def route_of(self, activity_id: str) -> RepeatedRoute | None:
+        """Return the route an activity followed, if indexed."""
+        index = self._route_of.get(activity_id)
+        return self._routes[index] if index is not None else None
+
+    def routes(self, min_efforts: int = 2, sport_type: str | None = None) -> list[RepeatedRoute]:
+        """Return routes followed at least ``min_efforts`` times, most efforts first.
+
+        Args:
+            min_efforts: Fewest efforts a route must have
+            sport_type: Only include routes of this sport type, if given
+
+        Returns:
+            Matching routes
+        """
+        routes = [
+            route
+            for route in self._routes
+            if len(route.efforts) >= min_efforts
+            and (sport_type is None or route.sport_type == sport_type)
+        ]
+        return sorted(routes, key=lambda route: (-len(route.efforts), route.efforts[-1].start_date))
+
+
+def _format_effort_speed(sport_type: str, meters: float, seconds: float) -> str:
+    if sport_type in _PACE_SPORTS:
+        return format_pace(meters, int(seconds)).replace(" ", "")
+    if seconds <= 0:
+        return "N/A"
+    return f"{meters / seconds * 3.6:.1f}km/h"
+
+
+def _format_trend(value: float | None, unit: str) -> str:
+    return "-" if value is None else f"{value:+.1f}{unit}"
+
+
+def format_routes(routes: list[RepeatedRoute]) -> str:
+    """Render repeated routes as a compact, fixed-width text table.
+
+    Best, median and latest are pace for foot sports and speed otherwise; the
+    trends are the change per month in speed (percent, positive is faster) and
+    in average heart rate (bpm).
+
+    Args:
+        routes: Routes from ``RouteIndex.routes``
+
+    Returns:
+        Table with a header line and one line per route
+    """
+    lines = [
+        f"{'route':<12} {'sport':<10} {'efforts':>7} {'km':>6} {'first':<10} {'last':<10} "
+        f"{'best':>9} {'median':>9} {'latest':>9} {'trend':>9} {'hr_trend':>8}"
+    ]
+    for route in routes:
+        speeds = route.speeds()
+        distance = route.distance
+        valid = speeds[~np.isnan(speeds)]
+
+        def pace(speed: float, route: RepeatedRoute = route, distance: float = distance) -> str:
+            if np.isnan(speed) or speed <= 0:
+                return "N/A"
+            return _format_effort_speed(route.sport_type, distance, distance / speed)
+
+        lines.append(
+            f"{route.id:<12} {route.sport_type:<10} {len(route.efforts):>7} "
+            f"{distance / 1000:>6.1f} {route.efforts[0].start_date.date().isoformat():<10} "
+            f"{route.efforts[-1].start_date.date().isoformat():<10} "
+            f"{pace(valid.max() if len(valid) else np.nan):>9} "
+            f"{pace(float(np.median(valid)) if len(valid) else np.nan):>9} "
+            f"{pace(speeds[-1]):>9} {_format_trend(route.speed_trend(), '%/mo'):>9} "
+            f"{_format_trend(route.heartrate_trend(), '/mo'):>8}"
+        )
+    return "\n".join(lines)
+
+
+def format_route_efforts(route: RepeatedRoute) -> str:
+    """Render each effort on a route as a compact, fixed-width text table.
+
+    Args:
+        route: The route
+
+    Returns:
+        Table with a header line and one line per effort, oldest first
+    """
+    lines = [f"{'date':<10} {'activity':<12} {'km':>6} {'time':>10} {'pace':>9} {'hr':>4}"]
+    for effort in route.efforts:
+        heartrate = f"{effort.average_heartrate:.0f}" if effort.average_heartrate else "-"
+        lines.append(
+            f"{effort.start_date.date().isoformat():<10} {effort.id:<12} "
+            f"{effort.distance / 1000:>6.2f} {format_duration(effort.duration):>10} "
+            f"{_format_effort_speed(route.sport_type, effort.distance, effort.duration):>9} "
+            f"{heartrate:>4}"
+        )
+    return "\n".join(lines)
+
+
+class AthleteRoutes:
+    """Route indexes per athlete, built on first use and kept up to date with the store.
+
+    New activities are clustered as they sync. An edit that keeps the route
+    updates the effort in place; anything else (a changed route or a deletion)
+    drops the athlete's index, to be rebuilt from the store on next use.
+    """
+
+    def __init__(self, store: ActivityStore) -> None:
+        self.store = store
+        self._indexes: dict[Hashable, RouteIndex] = {}
+
+    def index(self, athlete_id: Hashable) -> RouteIndex:
+        """Return an athlete's route index, building it if needed.
+
+        The index reflects the changes applied to the store so far; sync the
+        store first to include other processes' changes.
+        """
+        index = self._indexes.get(athlete_id)
+        if index is None:
+            index = RouteIndex()
+            added = index.add(self.store.activities(athlete_id))
+            logger.info(
+                f"Indexed {added} activities into {len(index.routes(min_efforts=1))} "
+                f"routes for athlete {athlete_id}"
+            )
+            self._indexes[athlete_id] = index
+        return index
+
+    def on_activity_change(self, change: ActivityChange) -> None:
+        """Update the athlete's route index, if built.
+
+        Registered as an ``ActivityStore`` listener.
+
+        Args:
+            change: The activity change
+        """
+        index = self._indexes.get(change.athlete_id)
+        if index is None:
+            return
+        previous, current = change.previous, change.current
+        if previous is not None and previous.id in index:
+            if current is not None and (current.polyline, current.type) == (
+                previous.polyline,
+                previous.type,
+            ):
+                index.replace(current)
+            else:
+                del self._indexes[change.athlete_id]
+        elif current is not None:
+            index.add([current])
+
+
+# Global route indexes - created lazily
+_athlete_routes: AthleteRoutes | None = None
+
+
+def get_athlete_routes() -> AthleteRoutes:
+    """Get or create the process-wide route indexes over the activity store.
+
+    Returns:
+        Route indexes kept up to date with the activity store
+    """
+    global _athlete_routes
+
+    if _athlete_routes is None:
+        store = get_activity_store()
+        _athlete_routes = AthleteRoutes(store)
+        store.add_listener(_athlete_routes.on_activity_change)
+    return _athlete_routes
+
+
+async def get_repeated_routes(
+    athlete_id: int, sport_type: str = "", min_efforts: int = 3, limit: int = 10
+) -> dict[str, Any]:
+    """Find routes the athlete has done repeatedly and compare their efforts on each.
+
+    Activities are grouped by the path they followed (from their GPS route),
+    so progress can be measured on like-for-like courses: best, median and
+    latest pace or speed, and monthly trends in speed and heart rate.
+
+    Args:
+        athlete_id: The athlete's ID (from get_athlete_profile)
+        sport_type: Only include one sport type, e.g. "Run" or "Ride" (all sports if empty)
+        min_efforts: Fewest efforts a route needs to be included (default: 3)
+        limit: Maximum number of routes, most frequent first (default: 10)
+
+    Returns:
+        Dictionary with status and a table of routes (identified by their first
+        activity ID), or error message
+    """
+    logger.info(
+        f"Tool called: get_repeated_routes(athlete_id={athlete_id}, "
+        f"sport_type={sport_type!r}, min_efforts={min_efforts}, limit={limit})"
+    )
+
+    try:
+        await ensure_backfilled(athlete_id)
+        athlete_routes = get_athlete_routes()
+        await athlete_routes.store.sync_async()  # Apply changes made by other processes
+        index = athlete_routes.index(athlete_id)
+        if not len(index):
+            return {
+                "status": "error",
+                "error_message": "No synced activities with GPS routes for this athlete.",
+            }
+        routes = index.routes(max(2, min_efforts), sport_type or None)
+        return {
+            "status": "success",
+            "count": len(routes),
+            "table": format_routes(routes[: max(1, limit)]),
+        }
+    except Exception as e:
+        logger.error(f"Error finding repeated routes: {e}")
+        return {
+            "status": "error",
+            "error_message": f"Failed to find repeated routes: {str(e)}",
+        }
+
+
+async def get_route_efforts(athlete_id: int, activity_id: str) -> dict[str, Any]:
+    """List every effort on the same route as an activity, to compare them.
+
+    Args:
+        athlete_id: The athlete's ID (from get_athlete_profile)
+        activity_id: Any activity on the route, e.g. a route ID from get_repeated_routes
+
+    Returns:
+        Dictionary with status, a one-line route summary and a table of efforts
+        (date, distance, moving time, pace or speed, average heart rate), or error message
+    """
+    logger.info(
+        f"Tool called: get_route_efforts(athlete_id={athlete_id}, activity_id={activity_id})"
+    )
+
+    try:
+        await ensure_backfilled(athlete_id)
+        athlete_routes = get_athlete_routes()
+        await athlete_routes.store.sync_async()  # Apply changes made by other processes
+        route = athlete_routes.index(athlete_id).route_of(str(activity_id))
+        if route is None:
+            return {
+                "status": "error",
+                "error_message": f"Activity {activity_id} is not a synced activity with a "
+                "GPS route.",
+            }
+        return {
+            "status": "success",
+            "route": format_routes([route]),
+            "efforts": format_route_efforts(route),
+        }
+    except Exception as e:
+        logger.error(f"Error getting route efforts: {e}")
+        return {
+            "status": "error",
+            "error_message": f"Failed to get route efforts: {str(e)}",
+        }
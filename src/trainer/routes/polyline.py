@@ -0,0 +1,200 @@
+"""Encoded polyline decoding, encoding and resampling.
+
+Strava summarizes each activity's route as an encoded polyline (Google's
+format: zigzag-encoded coordinate deltas at 1e-5 degree precision, in 5-bit
+chunks offset into printable ASCII). The decoder works on many polylines at
+once with NumPy, so decoding an athlete's whole history is a handful of array
+operations rather than a Python loop per character.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+_EARTH_RADIUS = 6_371_000.0
+
+# Coordinates are stored as integers in units of 1e-5 degrees
+_PRECISION = 1e5
+
+# Zigzag-encoded values of latitudes and longitudes fit in six 5-bit chunks
+_MAX_CHUNKS = 7
+
+
+def decode_polylines(encoded: Sequence[str]) -> list[np.ndarray]:
+    """Decode many encoded polylines at once.
+
+    Args:
+        encoded: Encoded polylines (empty strings decode to no points)
+
+    Returns:
+        One (n, 2) float64 array of latitude and longitude in degrees per polyline
+
+    Raises:
+        ValueError: If a polyline is malformed
+    """
+    if not encoded:
+        return []
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    if not lengths.any():
+        return [np.empty((0, 2)) for _ in encoded]
+    try:
+        raw = np.frombuffer("".join(encoded).encode("ascii"), dtype=np.uint8)
+    except UnicodeEncodeError as e:
+        raise ValueError(f"Invalid polyline character: {e}") from e
+    data = raw.astype(np.int64) - 63
+    if data.min() < 0 or data.max() >= 64:
+        raise ValueError("Invalid polyline character")
+
+    # Each value is a run of 5-bit chunks, least significant first, ending with
+    # a chunk whose continuation bit (0x20) is clear
+    last = (data & 0x20) == 0
+    ends = np.cumsum(lengths)
+    if not last[ends[lengths > 0] - 1].all():
+        raise ValueError("Truncated polyline")
+    value_ends = np.flatnonzero(last)
+    value_starts = np.concatenate(([0], value_ends[:-1] + 1))
+    position = np.arange(len(data)) - np.repeat(value_starts, value_ends - value_starts + 1)
+    if position.max() >= _MAX_CHUNKS:
+        raise ValueError("Polyline value out of range")
+    values = np.add.reduceat((data & 0x1F) << (5 * position), value_starts)
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+
+    # Values per polyline, alternating latitude and longitude deltas
+    values_before = np.concatenate(([0], np.cumsum(last)[ends - 1]))
+    counts = np.diff(values_before)
+    if (counts % 2).any():
+        raise ValueError("Polyline has an odd number of values")
+    coordinates = np.cumsum(deltas.reshape(-1, 2), axis=0)
+    # Restart the running sums at the start of each polyline
+    points = counts // 2
+    first = values_before[:-1] // 2
+    offsets = np.zeros((len(encoded), 2), dtype=np.int64)
+    started = (first > 0) & (points > 0)
+    offsets[started] = coordinates[first[started] - 1]
+    coordinates -= np.repeat(offsets, points, axis=0)
+    return np.split(coordinates / _PRECISION, np.cumsum(points)[:-1])
+
+
+def decode_polyline(encoded: str) -> np.ndarray:
+    """Decode one encoded polyline.
+
+    Args:
+        encoded: Encoded polyline
+
+    Returns:
+        (n, 2) float64 array of latitude and longitude in degrees
+    """
+    return decode_polylines([encoded])[0]
+
+
+def encode_polyline(latitude: np.ndarray, longitude: np.ndarray) -> str:
+    """Encode coordinates as a polyline.
+
+    Args:
+        latitude: Latitudes in degrees
+        longitude: Longitudes in degrees (same length)
+
+    Returns:
+        Encoded polyline
+    """
+    coordinates = np.round(np.column_stack([latitude, longitude]) * _PRECISION).astype(np.int64)
+    deltas = np.diff(coordinates, axis=0, prepend=0).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    shifts = 5 * np.arange(_MAX_CHUNKS)
+    chunks = (values[:, None] >> shifts) & 0x1F
+    # Number of chunks needed per value: at least one, then one per remaining 5 bits
+    needed = 1 + ((values[:, None] >> shifts[1:]) > 0).sum(axis=1)
+    used = np.arange(_MAX_CHUNKS) < needed[:, None]
+    continued = np.arange(_MAX_CHUNKS) < needed[:, None] - 1
+    encoded = chunks + 0x20 * continued + 63
+    return str(encoded[used].astype(np.uint8).tobytes().decode("ascii"))
+
+
+def project(points: np.ndarray) -> np.ndarray:
+    """Project latitude/longitude points to meters on a local flat approximation.
+
+    Adequate for comparing routes within a few kilometers of each other.
+
+    Args:
+        points: (n, 2) latitude and longitude in degrees
+
+    Returns:
+        (n, 2) east and north coordinates in meters
+    """
+    latitude = np.radians(points[:, 0])
+    longitude = np.radians(points[:, 1])
+    return np.column_stack([_EARTH_RADIUS * longitude * np.cos(latitude), _EARTH_RADIUS * latitude])
+
+
+def _distance_along(points: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Distance of each point along its path, with paths laid end to end.
+
+    Consecutive paths are separated by a 1 m gap, so the result is increasing
+    across path boundaries and interpolation never mixes two paths.
+    """
+    steps = np.hypot(*np.diff(points, axis=0).T)
+    steps[np.cumsum(counts)[:-1] - 1] = 1.0
+    return np.concatenate(([0.0], np.cumsum(steps)))
+
+
+def path_lengths(points: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Lengths of projected paths, in meters.
+
+    Args:
+        points: (n, 2) points of all paths in meters, one path after another
+        counts: Number of points in each path (each at least 1)
+
+    Returns:
+        Length of each path
+    """
+    along = _distance_along(points, counts)
+    ends = np.cumsum(counts)
+    return np.asarray(along[ends - 1] - along[ends - counts])
+
+
+def resample_paths(points: np.ndarray, counts: np.ndarray, samples: np.ndarray) -> np.ndarray:
+    """Resample projected paths to points evenly spaced along their lengths.
+
+    All paths are resampled with one interpolation over their concatenation.
+
+    Args:
+        points: (n, 2) points of all paths in meters, one path after another
+        counts: Number of points in each path (each at least 1)
+        samples: Number of points to resample each path to (each at least 2)
+
+    Returns:
+        (samples.sum(), 2) resampled points in meters, one path after another
+    """
+    along = _distance_along(points, counts)
+    ends = np.cumsum(counts)
+    starts, lengths = along[ends - counts], along[ends - 1] - along[ends - counts]
+    # Position of each target within its path, as a fraction of the path's length
+    index = np.arange(samples.sum()) - np.repeat(np.cumsum(samples) - samples, samples)
+    fraction = index / np.repeat(samples - 1, samples)
+    targets = np.repeat(starts, samples) + fraction * np.repeat(lengths, samples)
+    return np.column_stack(
+        [np.interp(targets, along, points[:, 0]), np.interp(targets, along, points[:, 1])]
+    )
+
+
+def downsample_path(latitude: np.ndarray, longitude: np.ndarray, spacing: float) -> np.ndarray:
+    """Select indices of points at least roughly ``spacing`` meters apart along a track.
+
+    Used to summarize a full-resolution track as a compact polyline.
+
+    Args:
+        latitude: Latitudes in degrees (no NaNs)
+        longitude: Longitudes in degrees (no NaNs)
+        spacing: Distance between kept points, in meters
+
+    Returns:
+        Indices of the kept points, always including the first and last
+    """
+    if len(latitude) < 3:
+        return np.arange(len(latitude))
+    points = project(np.column_stack([latitude, longitude]))
+    along = np.concatenate(([0.0], np.cumsum(np.hypot(*np.diff(points, axis=0).T))))
+    marks = np.arange(0.0, along[-1], spacing)
+    indices = np.unique(np.searchsorted(along, marks))
+    return np.union1d(indices, [0, len(latitude) - 1])
@@ -0,0 +1,15 @@
+"""Serving the chat API from several worker processes."""
+
+from .app import AgentPool, ChatRequest, create_chat_app
+from .server import WorkerConfig, run_server, serve_worker
+from .supervisor import Supervisor
+
+__all__ = [
+    "AgentPool",
+    "ChatRequest",
+    "create_chat_app",
+    "WorkerConfig",
+    "run_server",
+    "serve_worker",
+    "Supervisor",
+]
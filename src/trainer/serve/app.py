@@ -0,0 +1,212 @@
+"""HTTP chat API served by each worker process."""
+
+import asyncio
+import contextlib
+import logging
+import os
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from dataclasses import asdict, dataclass, field
+
+from pydantic import BaseModel, Field, ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import BaseRoute, Mount, Route
+
+from trainer.agents.scheduler import get_llm_scheduler
+from trainer.agents.snapshot import get_snapshot_cache
+from trainer.agents.trainer_agent import TrainerAgent
+from trainer.utils.cache import SQLiteCache, lease
+
+logger = logging.getLogger(__name__)
+
+AgentFactory = Callable[[str, str], TrainerAgent]
+
+# Seconds one worker may take to answer a message before another worker may
+# start on the same session's next one
+SESSION_LEASE = 300.0
+
+
+class ChatRequest(BaseModel):
+    """A message from a user in one of their conversations."""
+
+    user_id: str
+    session_id: str = "default_session"
+    message: str = Field(..., min_length=1)
+
+
+@dataclass
+class _Conversation:
+    """A session's agent, used by one message at a time."""
+
+    agent: TrainerAgent
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class AgentPool:
+    """A worker's agents, one per conversation session.
+
+    Conversation history lives in the session service rather than the agent,
+    so when the least recently used agent is dropped to make room, or a
+    session's next message reaches another worker, the conversation continues
+    with a new agent where it left off.
+
+    ADK rejects events appended to a session that another worker changed
+    since it was read (a "stale session" error), so with a ``shared`` cache a
+    lease in it makes every worker answer a session's messages one at a
+    time. A message still being answered after ``SESSION_LEASE`` seconds
+    loses the lease, and the reply to one sent meanwhile may be that error.
+    """
+
+    def __init__(
+        self,
+        factory: AgentFactory,
+        max_sessions: int = 1000,
+        shared: SQLiteCache | None = None,
+    ):
+        """Initialize the pool.
+
+        Args:
+            factory: Creates the agent for a user ID and session ID
+            max_sessions: Most agents kept before the least recently used is dropped
+            shared: Cache shared with the other workers, holding session leases
+        """
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.shared = shared
+        self._conversations: OrderedDict[tuple[str, str], _Conversation] = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def _conversation(self, user_id: str, session_id: str) -> _Conversation:
+        key = (user_id, session_id)
+        conversation = self._conversations.get(key)
+        if conversation is not None:
+            self._conversations.move_to_end(key)
+            return conversation
+
+        conversation = _Conversation(self.factory(user_id, session_id))
+        self._conversations[key] = conversation
+        # Drop the least recently used idle agents beyond the limit
+        for old_key, old in list(self._conversations.items()):
+            if len(self._conversations) <= self.max_sessions:
+                break
+            if not old.lock.locked() and old is not conversation:
+                del self._conversations[old_key]
+                old.agent.close()
+                self.evicted += 1
+        return conversation
+
+    async def process_message(self, user_id: str, session_id: str, message: str) -> str:
+        """Answer a message, one message at a time per session across workers.
+
+        Args:
+            user_id: User sending the message
+            session_id: Conversation session
+            message: The message
+
+        Returns:
+            The agent's reply
+        """
+        conversation = self._conversation(user_id, session_id)
+        async with conversation.lock:
+            key = f"session:{user_id}:{session_id}"
+            async with lease(self.shared, key, SESSION_LEASE):
+                return await conversation.agent.process_message(message)
+
+    def close(self) -> None:
+        """Close every agent."""
+        for conversation in self._conversations.values():
+            conversation.agent.close()
+        self._conversations.clear()
+
+    def metrics(self) -> dict[str, float]:
+        """Agent counts, for monitoring.
+
+        Returns:
+            Dictionary of metric name to value
+        """
+        return {"sessions": len(self), "evicted_sessions": self.evicted}
+
+
+@dataclass
+class ChatStats:
+    """Counters for a worker's chat requests."""
+
+    requests: int = 0
+    in_flight: int = 0
+    failed: int = 0
+
+
+def create_chat_app(pool: AgentPool, webhook: Starlette | None = None) -> Starlette:
+    """Create the chat HTTP application.
+
+    Args:
+        pool: Agents that messages are answered by
+        webhook: Strava webhook receiver to serve under ``/strava``, started
+            and stopped with the chat application
+
+    Returns:
+        ASGI application serving ``/chat``, ``/health`` and ``/metrics``, and
+        ``/strava/webhook`` and ``/strava/metrics`` with a webhook receiver
+    """
+    stats = ChatStats()
+
+    async def chat(request: Request) -> JSONResponse:
+        try:
+            chat_request = ChatRequest.model_validate_json(await request.body())
+        except ValidationError as e:
+            return JSONResponse({"error": f"invalid request: {e}"}, status_code=400)
+
+        stats.requests += 1
+        stats.in_flight += 1
+        try:
+            reply = await pool.process_message(
+                chat_request.user_id, chat_request.session_id, chat_request.message
+            )
+        except Exception as e:
+            stats.failed += 1
+            logger.error(f"Error answering chat request: {e}", exc_info=True)
+            return JSONResponse({"error": "internal error"}, status_code=500)
+        finally:
+            stats.in_flight -= 1
+        return JSONResponse({"reply": reply, "worker": os.getpid()})
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({"status": "ok", "worker": os.getpid()})
+
+    async def metrics(request: Request) -> JSONResponse:
+        snapshots = get_snapshot_cache().metrics()
+        llm = get_llm_scheduler().metrics()
+        return JSONResponse(
+            {
+                "worker": os.getpid(),
+                **asdict(stats),
+                **pool.metrics(),
+                **{f"snapshot_{name}": value for name, value in snapshots.items()},
+                **{f"llm_{name}": value for name, value in llm.items()},
+            }
+        )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        try:
+            # Mounted applications' lifespans are not run by Starlette
+            async with contextlib.AsyncExitStack() as stack:
+                if webhook is not None:
+                    await stack.enter_async_context(webhook.router.lifespan_context(webhook))
+                yield
+        finally:
+            pool.close()
+
+    routes: list[BaseRoute] = [
+        Route("/chat", chat, methods=["POST"]),
+        Route("/health", health, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ]
+    if webhook is not None:
+        routes.append(Mount("/strava", app=webhook))
+    return Starlette(routes=routes, lifespan=lifespan)
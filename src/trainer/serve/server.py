@@ -0,0 +1,160 @@
+"""Multi-worker chat server: one supervisor, N worker processes.
+
+The supervisor binds the listening socket once and starts the workers, which
+all accept connections from it, so the kernel spreads requests across them.
+Each worker has its own event loop, Strava MCP session and agents, and also
+receives Strava webhook events. They share conversation sessions, athlete
+snapshots and synced activities through SQLite databases in a state
+directory, so any worker can continue any conversation.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import socket
+from dataclasses import dataclass
+from multiprocessing.synchronize import Event
+from pathlib import Path
+
+from google.adk.sessions import DatabaseSessionService
+
+from trainer.agents.snapshot import get_snapshot_cache
+from trainer.agents.trainer_agent import TrainerAgent
+from trainer.serve.app import AgentPool, create_chat_app
+from trainer.serve.supervisor import Supervisor
+from trainer.sync import create_webhook_receiver
+from trainer.tools import close_mcp_session
+from trainer.utils.cache import CACHE_DB, enable_wal, get_shared_cache
+from trainer.utils.config import get_settings
+from trainer.utils.logging import setup_logging
+
+logger = logging.getLogger(__name__)
+
+SESSIONS_DB = "sessions.db"
+
+
+@dataclass(frozen=True)
+class WorkerConfig:
+    """Settings passed from the supervisor to each worker."""
+
+    state_dir: Path
+    drain_timeout: int = 30
+    max_sessions: int = 1000
+
+
+def prepare_state_dir(state_dir: Path) -> None:
+    """Create the state directory and its databases in write-ahead logging mode.
+
+    Args:
+        state_dir: Directory for the shared session store and cache
+    """
+    state_dir.mkdir(parents=True, exist_ok=True)
+    for name in (SESSIONS_DB, CACHE_DB):
+        enable_wal(state_dir / name)
+
+
+async def serve_worker(
+    config: WorkerConfig, sock: socket.socket, ready: Event | None = None
+) -> None:
+    """Serve chat requests from a listening socket until told to stop.
+
+    On SIGTERM or SIGINT the worker stops accepting connections and waits up
+    to ``config.drain_timeout`` seconds for in-flight requests to finish.
+
+    Args:
+        config: Worker settings
+        sock: Listening socket shared with the other workers
+        ready: Set once the worker is accepting requests
+
+    Raises:
+        ValueError: If the settings name another state directory
+    """
+    import uvicorn
+
+    settings = get_settings()
+    # The activity store, shared cache and Strava quota live in the same state directory
+    if Path(settings.state_dir).resolve() != config.state_dir.resolve():
+        raise ValueError(
+            f"TRAINER_STATE_DIR ({settings.state_dir}) is not the worker state "
+            f"directory ({config.state_dir})"
+        )
+
+    session_service = DatabaseSessionService(
+        f"sqlite:///{config.state_dir / SESSIONS_DB}", connect_args={"timeout": 30}
+    )
+    cache = get_shared_cache()
+    get_snapshot_cache()  # Shares snapshots through the cache before the first request
+
+    def create_agent(user_id: str, session_id: str) -> TrainerAgent:
+        return TrainerAgent(user_id=user_id, session_id=session_id, session_service=session_service)
+
+    pool = AgentPool(create_agent, max_sessions=config.max_sessions, shared=cache)
+    webhook = create_webhook_receiver(settings.strava_webhook_verify_token)
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_chat_app(pool, webhook),
+            log_config=None,
+            timeout_graceful_shutdown=config.drain_timeout,
+        )
+    )
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    try:
+        while not server.started and not serving.done():
+            await asyncio.sleep(0.05)
+        if server.started:
+            logger.info(f"Worker {os.getpid()} ready")
+            if ready is not None:
+                ready.set()
+        await serving
+    finally:
+        with contextlib.suppress(Exception):
+            await close_mcp_session()
+        cache.close()
+        logger.info(f"Worker {os.getpid()} stopped")
+
+
+def run_worker(config: WorkerConfig, sock: socket.socket, ready: Event) -> None:
+    """Entry point of a worker process."""
+    if hasattr(signal, "SIGHUP"):
+        # Restarts are the supervisor's job, even when the whole process group is signalled
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    setup_logging()
+    asyncio.run(serve_worker(config, sock, ready))
+
+
+def run_server(
+    host: str,
+    port: int,
+    workers: int,
+    state_dir: str | Path,
+    drain_timeout: int = 30,
+    max_sessions: int = 1000,
+) -> None:
+    """Serve the chat API with several worker processes until interrupted.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on
+        workers: Number of worker processes
+        state_dir: Directory for the session store and cache shared by the workers
+        drain_timeout: Seconds workers may take to finish in-flight requests
+            when restarting (SIGHUP) or stopping (SIGTERM)
+        max_sessions: Most conversation agents each worker keeps
+    """
+    config = WorkerConfig(Path(state_dir), drain_timeout, max_sessions)
+    prepare_state_dir(config.state_dir)
+    # Workers are new processes that read their settings from the environment
+    os.environ["TRAINER_STATE_DIR"] = str(config.state_dir)
+
+    sock = socket.create_server((host, port), backlog=2048)
+    logger.info(
+        f"Serving chat on http://{host}:{port}/chat and Strava webhook events on "
+        f"http://{host}:{port}/strava/webhook with {workers} workers "
+        f"(supervisor {os.getpid()}, state in {config.state_dir})"
+    )
+    try:
+        Supervisor(run_worker, (config, sock), workers=workers, drain_timeout=drain_timeout).run()
+    finally:
+        sock.close()
@@ -0,0 +1,196 @@
+"""Supervisor process that keeps a fixed number of worker processes running.
+
+Workers are started with the ``spawn`` method by default, so each one is a
+fresh interpreter with its own event loop, MCP session and agents, and a
+restart picks up new code and configuration.
+
+Signals:
+    SIGHUP: Rolling restart. Each worker is replaced in turn; the replacement
+        is started and ready before the old worker is drained, so capacity
+        never drops by more than one worker.
+    SIGTERM, SIGINT: Drain every worker (they finish in-flight requests and
+        stop accepting new ones) and exit.
+"""
+
+import logging
+import multiprocessing
+import multiprocessing.connection
+import signal
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from multiprocessing.process import BaseProcess
+from multiprocessing.synchronize import Event
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Seconds a worker may take to exit after draining before it is killed
+SHUTDOWN_GRACE = 5.0
+
+# Workers that exit sooner than this after starting are replaced after a pause,
+# so a worker that cannot start does not restart in a tight loop
+MIN_WORKER_LIFETIME = 1.0
+
+
+@dataclass
+class _Worker:
+    """A worker process and the event it sets once it is ready for requests."""
+
+    process: BaseProcess
+    ready: Event
+    started_at: float
+
+
+class Supervisor:
+    """Runs worker processes, replacing any that exit, until stopped."""
+
+    def __init__(
+        self,
+        target: Callable[..., None],
+        args: tuple[Any, ...] = (),
+        workers: int = 1,
+        drain_timeout: float = 30.0,
+        startup_timeout: float = 120.0,
+        start_method: str = "spawn",
+    ):
+        """Initialize the supervisor.
+
+        Args:
+            target: Worker entry point, called with ``*args`` and an event to set when ready
+            args: Arguments for the worker (picklable with the ``spawn`` start method)
+            workers: Number of workers to keep running
+            drain_timeout: Seconds a worker may take to finish in-flight requests
+            startup_timeout: Seconds a replacement worker may take to become ready
+            start_method: ``multiprocessing`` start method
+        """
+        if workers < 1:
+            raise ValueError("At least one worker is required")
+        self.target = target
+        self.args = args
+        self.workers = workers
+        self.drain_timeout = drain_timeout
+        self.startup_timeout = startup_timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._workers: list[_Worker] = []
+        self._stopping = threading.Event()
+        self._restarting = threading.Event()
+        self.restarts = 0
+        self.replaced = 0
+
+    @property
+    def pids(self) -> list[int]:
+        """Process IDs of the current workers."""
+        return [worker.process.pid for worker in self._workers if worker.process.pid is not None]
+
+    def ready(self) -> bool:
+        """Whether every current worker is ready for requests."""
+        return len(self._workers) == self.workers and all(
+            worker.ready.is_set() for worker in self._workers
+        )
+
+    def request_restart(self) -> None:
+        """Ask for a rolling restart of every worker (what SIGHUP does)."""
+        self._restarting.set()
+
+    def request_stop(self) -> None:
+        """Ask for every worker to be drained and the supervisor to exit (what SIGTERM does)."""
+        self._stopping.set()
+
+    def _install_signal_handlers(self) -> None:
+        if threading.current_thread() is not threading.main_thread():
+            return  # Signal handlers can only be installed in the main thread
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.request_stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: self.request_stop())
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.request_restart())
+
+    def run(self) -> None:
+        """Start the workers and supervise them until stopped."""
+        self._install_signal_handlers()
+        self._workers = [self._spawn() for _ in range(self.workers)]
+        try:
+            while not self._stopping.is_set():
+                if self._restarting.is_set():
+                    self._restarting.clear()
+                    self._restart()
+                multiprocessing.connection.wait(
+                    [worker.process.sentinel for worker in self._workers], timeout=0.5
+                )
+                self._replace_exited()
+        finally:
+            self._stop_all()
+
+    def _spawn(self) -> _Worker:
+        ready = self._context.Event()
+        process = self._context.Process(  # type: ignore[attr-defined]
+            target=self.target, args=(*self.args, ready), name="trainer-worker"
+        )
+        process.start()
+        logger.info(f"Started worker {process.pid}")
+        return _Worker(process, ready, time.monotonic())
+
+    def _replace_exited(self) -> None:
+        for index, worker in enumerate(self._workers):
+            if worker.process.is_alive() or self._stopping.is_set():
+                continue
+            worker.process.join()
+            logger.warning(
+                f"Worker {worker.process.pid} exited with code {worker.process.exitcode}; "
+                "starting a replacement"
+            )
+            if time.monotonic() - worker.started_at < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self._workers[index] = self._spawn()
+            self.replaced += 1
+
+    def _wait_ready(self, worker: _Worker) -> bool:
+        deadline = time.monotonic() + self.startup_timeout
+        while not self._stopping.is_set() and time.monotonic() < deadline:
+            if worker.ready.wait(0.1):
+                return True
+            if not worker.process.is_alive():
+                return False
+        return False
+
+    def _restart(self) -> None:
+        logger.info(f"Restarting {len(self._workers)} workers")
+        for index, old in enumerate(list(self._workers)):
+            new = self._spawn()
+            if not self._wait_ready(new):
+                logger.error(
+                    f"Replacement worker {new.process.pid} did not become ready; "
+                    "keeping the remaining workers"
+                )
+                self._drain(new)
+                return
+            self._workers[index] = new
+            self._drain(old)
+        self.restarts += 1
+        logger.info("Restart complete")
+
+    def _drain(self, worker: _Worker) -> None:
+        """Stop a worker gracefully, killing it if it does not finish in time."""
+        if worker.process.is_alive():
+            worker.process.terminate()
+        worker.process.join(self.drain_timeout + SHUTDOWN_GRACE)
+        if worker.process.is_alive():
+            logger.warning(f"Worker {worker.process.pid} did not drain in time; killing it")
+            worker.process.kill()
+            worker.process.join()
+        logger.info(f"Worker {worker.process.pid} stopped")
+
+    def _stop_all(self) -> None:
+        logger.info(f"Draining {len(self._workers)} workers")
+        for worker in self._workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        deadline = time.monotonic() + self.drain_timeout + SHUTDOWN_GRACE
+        for worker in self._workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.process.pid} did not drain in time; killing it")
+                worker.process.kill()
+                worker.process.join()
+        self._workers = []
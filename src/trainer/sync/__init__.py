@@ -0,0 +1,44 @@
+"""Keeping local activity data in sync with Strava."""
+
+from .backfill import (
+    ActivityBackfill,
+    backfill_authenticated_athlete,
+    ensure_backfilled,
+    get_activity_backfill,
+)
+from .rollups import (
+    ActivityRollups,
+    Period,
+    format_rollups,
+    get_activity_rollups,
+    get_training_rollups,
+)
+from .store import ActivityChange, ActivityStore, ActivityTotals, get_activity_store
+from .webhook import (
+    WebhookEvent,
+    WebhookProcessor,
+    create_webhook_app,
+    create_webhook_receiver,
+    run_webhook_server,
+)
+
+__all__ = [
+    "ActivityChange",
+    "ActivityStore",
+    "ActivityTotals",
+    "get_activity_store",
+    "ActivityBackfill",
+    "backfill_authenticated_athlete",
+    "ensure_backfilled",
+    "get_activity_backfill",
+    "ActivityRollups",
+    "Period",
+    "format_rollups",
+    "get_activity_rollups",
+    "get_training_rollups",
+    "WebhookEvent",
+    "WebhookProcessor",
+    "create_webhook_app",
+    "create_webhook_receiver",
+    "run_webhook_server",
+]
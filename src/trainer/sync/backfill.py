@@ -0,0 +1,209 @@
+"""Backfilling the activity store with the athlete's recent activities.
+
+Webhook events only cover activities created or changed after the subscription
+started, and none arrive while no receiver is running. A backfill fetches the
+athlete's recent activities in one request and upserts them, so the store
+holds their history; unchanged activities are not rewritten.
+
+The webhook receiver backfills hourly. Tools reading the store call
+``ensure_backfilled`` first, so they also have data when no receiver runs;
+a marker in the shared cache tells every process when each athlete was last
+backfilled, and a lease in it lets one process at a time backfill an athlete.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from trainer.models.ingest import parse_mcp_content, tool_result_text
+from trainer.sync.store import ActivityStore, get_activity_store
+from trainer.tools import get_athlete_profile, get_recent_activities
+from trainer.utils.cache import SQLiteCache, get_shared_cache, lease
+
+logger = logging.getLogger(__name__)
+
+# Most activities the recent activities tool returns in one request
+RECENT_ACTIVITIES = 200
+
+# Seconds between scheduled backfills, and for which a backfill counts as recent
+BACKFILL_INTERVAL = 3600.0
+
+# Seconds before a failed backfill is tried again by tools reading the store
+BACKFILL_RETRY = 60.0
+
+# Seconds one process may take to backfill an athlete before another one starts too
+BACKFILL_LEASE = 300.0
+
+# The Strava MCP server is authenticated as one athlete, whose ID is only
+# known once their profile has been fetched
+AUTHENTICATED_ATHLETE = "authenticated"
+
+
+class ActivityBackfill:
+    """Fetches the authenticated athlete's recent activities into the activity store."""
+
+    def __init__(
+        self,
+        store: ActivityStore | None = None,
+        per_page: int = RECENT_ACTIVITIES,
+        fetch_profile: Callable[[], Awaitable[dict[str, Any]]] = get_athlete_profile,
+        fetch_activities: Callable[..., Awaitable[dict[str, Any]]] = get_recent_activities,
+        shared: SQLiteCache | None = None,
+    ):
+        """Initialize the backfill.
+
+        Args:
+            store: Activity store to update (defaults to the global one)
+            per_page: Number of recent activities to fetch
+            fetch_profile: Coroutine function returning the athlete profile tool result
+            fetch_activities: Coroutine function returning the recent activities tool result
+            shared: Cache recording each athlete's last backfill for every process
+        """
+        self.store = get_activity_store() if store is None else store
+        self.per_page = per_page
+        self.fetch_profile = fetch_profile
+        self.fetch_activities = fetch_activities
+        self.shared = shared
+        self._athlete_id: int | None = None
+
+    async def athlete_id(self) -> int:
+        """Return the ID of the athlete the Strava MCP server is authenticated as.
+
+        Raises:
+            ValueError: If the profile could not be fetched or has no ID
+        """
+        if self._athlete_id is None:
+            result = await self.fetch_profile()
+            text = tool_result_text(result)
+            if not text:
+                raise ValueError(result.get("error_message", "profile fetch failed"))
+            try:
+                profile = json.loads(text)
+            except json.JSONDecodeError:
+                raise ValueError("Athlete profile is not JSON") from None
+            if not isinstance(profile, dict) or not isinstance(profile.get("id"), int):
+                raise ValueError("Athlete profile has no ID")
+            self._athlete_id = profile["id"]
+        return self._athlete_id
+
+    async def run(self) -> int:
+        """Fetch the athlete's recent activities and store any new or changed ones.
+
+        Returns:
+            Number of activities added or changed
+
+        Raises:
+            ValueError: If the activities could not be fetched or parsed
+        """
+        athlete_id = await self.athlete_id()
+        result = await self.fetch_activities(per_page=self.per_page)
+        if result.get("status") != "success":
+            raise ValueError(result.get("error_message", "activities fetch failed"))
+        changed = 0
+        for workout in parse_mcp_content(result.get("data") or []):
+            if await self.store.upsert_async(athlete_id, workout) != workout:
+                changed += 1
+        logger.info(f"Backfilled {changed} new or changed activities for athlete {athlete_id}")
+        await asyncio.to_thread(self.mark, athlete_id, BACKFILL_INTERVAL)
+        return changed
+
+    def recent(self, athlete_id: int) -> bool:
+        """Whether any process backfilled (or tried to backfill) an athlete recently."""
+        if self.shared is None:
+            return False
+        try:
+            return self.shared.get(f"backfill:{athlete_id}") is not None
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read the last backfill time: {e}")
+            return False
+
+    def mark(self, athlete_id: int, ttl: float) -> None:
+        """Record that an athlete was backfilled, so no process repeats it for ttl seconds."""
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(f"backfill:{athlete_id}", str(time.time()), ttl)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not record the backfill time: {e}")
+
+
+# Global backfill instance - created lazily
+_activity_backfill: ActivityBackfill | None = None
+
+# Backfills running in this process, by athlete
+_running: dict[int, asyncio.Future[None]] = {}
+
+
+def get_activity_backfill() -> ActivityBackfill:
+    """Get or create the process-wide backfill of the global activity store.
+
+    Returns:
+        Backfill recording its runs in the shared cache
+    """
+    global _activity_backfill
+
+    if _activity_backfill is None:
+        _activity_backfill = ActivityBackfill(shared=get_shared_cache())
+    return _activity_backfill
+
+
+async def ensure_backfilled(athlete_id: int) -> None:
+    """Backfill recent activities unless an athlete was backfilled recently.
+
+    Calls made while a backfill for the athlete is running in this process
+    or another one wait for it. Failures are logged rather than raised, and
+    retried after ``BACKFILL_RETRY`` seconds, so callers can go on with the
+    data they have.
+
+    Args:
+        athlete_id: Athlete whose activities the caller is about to read
+    """
+    backfill = get_activity_backfill()
+    if await asyncio.to_thread(backfill.recent, athlete_id):
+        return
+    running = _running.get(athlete_id)
+    if running is None:
+        running = _running[athlete_id] = asyncio.ensure_future(_backfill(backfill, athlete_id))
+    # Shielded so one caller giving up does not cancel the others' backfill
+    await asyncio.shield(running)
+
+
+async def backfill_authenticated_athlete() -> None:
+    """Backfill the authenticated athlete unless any process did within the interval.
+
+    Scheduled hourly by every process receiving webhook events, including each
+    ``trainer serve`` worker; the marker and lease in the shared cache make
+    one of them run each backfill.
+
+    Raises:
+        ValueError: If the authenticated athlete's profile could not be fetched
+    """
+    backfill = get_activity_backfill()
+    await ensure_backfilled(await backfill.athlete_id())
+
+
+async def _backfill(backfill: ActivityBackfill, athlete_id: int) -> None:
+    async def recent() -> bool:
+        return await asyncio.to_thread(backfill.recent, athlete_id)
+
+    try:
+        key = f"backfill-lease:{athlete_id}"
+        async with lease(backfill.shared, key, BACKFILL_LEASE, recent) as backfilling:
+            if not backfilling:
+                return  # Another process backfilled the athlete meanwhile
+            try:
+                # Only the authenticated athlete can be backfilled; don't retry for others
+                if await backfill.athlete_id() == athlete_id:
+                    await backfill.run()
+                ttl = BACKFILL_INTERVAL
+            except Exception as e:
+                logger.warning(f"Could not backfill activities for athlete {athlete_id}: {e}")
+                ttl = BACKFILL_RETRY
+            # Marked before the lease is released, so waiting processes see it
+            await asyncio.to_thread(backfill.mark, athlete_id, ttl)
+    finally:
+        _running.pop(athlete_id, None)
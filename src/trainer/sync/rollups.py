@@ -0,0 +1,279 @@
+"""Weekly and monthly training rollups, maintained incrementally.
+
+Questions such as "compare my last 8 weeks" need per-period totals. Instead of
+aggregating the full activity history on every question, ``ActivityRollups``
+listens to the activity store and moves each added, edited or deleted activity
+in or out of its week and month buckets, per sport type and for all sports.
+Reading a table of the last N periods is then N dictionary lookups.
+
+Activities are bucketed by the day they started on in the athlete's local
+time (``Workout.local_date``), so a Monday morning run in Sydney, which
+started on Sunday in UTC, counts towards the week it was run in. The current
+period is likewise found from the athlete's local date, using the UTC offset
+of their latest workout.
+"""
+
+import logging
+from collections.abc import Hashable
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from typing import Any
+
+from trainer.models import Workout
+from trainer.sync.backfill import ensure_backfilled
+from trainer.sync.store import ActivityChange, ActivityStore, ActivityTotals, get_activity_store
+
+logger = logging.getLogger(__name__)
+
+_UTC = timezone.utc  # noqa: UP017 - datetime.UTC requires Python 3.11
+
+# Most periods a rollup table may cover
+MAX_PERIODS = 104
+
+
+class Period(str, Enum):
+    """Length of a rollup bucket."""
+
+    WEEK = "week"
+    MONTH = "month"
+
+
+def period_start(day: date, period: Period) -> date:
+    """Return the first day of the period containing a date.
+
+    Weeks start on Monday (ISO weeks); months on the 1st.
+    """
+    if period == Period.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def previous_period(start: date, period: Period) -> date:
+    """Return the first day of the period before the one starting on ``start``."""
+    if period == Period.WEEK:
+        return start - timedelta(days=7)
+    return (start - timedelta(days=1)).replace(day=1)
+
+
+@dataclass(frozen=True)
+class RollupRow:
+    """Totals for one period."""
+
+    start: date
+    totals: ActivityTotals
+
+
+# Bucket key: period length, period start and sport type (None for all sports)
+_BucketKey = tuple[Period, date, str | None]
+
+
+class ActivityRollups:
+    """Per-athlete weekly and monthly totals, overall and per sport type."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[Hashable, dict[_BucketKey, ActivityTotals]] = {}
+        # Start (in UTC) and UTC offset of each athlete's latest workout with a local time
+        self._offsets: dict[Hashable, tuple[datetime, timedelta]] = {}
+
+    def _keys(self, workout: Workout) -> list[_BucketKey]:
+        day = workout.local_date
+        return [
+            (period, period_start(day, period), sport)
+            for period in Period
+            for sport in (None, workout.type)
+        ]
+
+    def add(self, athlete_id: Hashable, workout: Workout, sign: int = 1) -> None:
+        """Add a workout to its buckets (or remove it, with sign=-1).
+
+        Args:
+            athlete_id: Owner of the workout
+            workout: The workout
+            sign: 1 to add, -1 to remove
+        """
+        buckets = self._buckets.setdefault(athlete_id, {})
+        for key in self._keys(workout):
+            totals = buckets.setdefault(key, ActivityTotals())
+            totals.add(workout, sign)
+            if totals.count <= 0:
+                del buckets[key]  # Also drops floating-point residue
+        if not buckets:
+            del self._buckets[athlete_id]
+            self._offsets.pop(athlete_id, None)
+        elif sign > 0 and workout.start_date_local is not None:
+            offset = workout.utc_offset or timedelta()
+            start = workout.start_date_local.replace(tzinfo=None) - offset
+            latest = self._offsets.get(athlete_id)
+            if latest is None or start >= latest[0]:
+                self._offsets[athlete_id] = (start, offset)
+
+    def today(self, athlete_id: Hashable, now: datetime | None = None) -> date:
+        """Return the athlete's current local date.
+
+        The athlete is assumed to still be in the time zone of their latest
+        workout (UTC if no workout has a local start time).
+
+        Args:
+            athlete_id: Athlete whose date to return
+            now: Current time, timezone-aware (defaults to now)
+        """
+        now = now or datetime.now(_UTC)
+        latest = self._offsets.get(athlete_id)
+        return (now.astimezone(_UTC) + (latest[1] if latest else timedelta())).date()
+
+    def on_activity_change(self, change: ActivityChange) -> None:
+        """Move a changed activity between buckets.
+
+        Registered as an ``ActivityStore`` listener.
+
+        Args:
+            change: The activity change
+        """
+        if change.previous is not None:
+            self.add(change.athlete_id, change.previous, sign=-1)
+        if change.current is not None:
+            self.add(change.athlete_id, change.current)
+
+    def load(self, store: ActivityStore) -> None:
+        """Add every activity already in a store, e.g. when first created.
+
+        Args:
+            store: Activity store to load
+        """
+        for athlete_id in store.athletes():
+            for workout in store.activities(athlete_id):
+                self.add(athlete_id, workout)
+
+    def table(
+        self,
+        athlete_id: Hashable,
+        period: Period = Period.WEEK,
+        periods: int = 8,
+        sport_type: str | None = None,
+        today: date | None = None,
+    ) -> list[RollupRow]:
+        """Return totals for the most recent periods, oldest first.
+
+        Periods without activities are included, with zero totals.
+
+        Args:
+            athlete_id: Athlete to report on
+            period: Week or month
+            periods: Number of periods, ending with the current one
+            sport_type: Only count this sport type (e.g. "Run"); all sports if None
+            today: Date in the current period (defaults to the athlete's current
+                local date, see ``today()``)
+
+        Returns:
+            One row per period
+        """
+        buckets = self._buckets.get(athlete_id, {})
+        start = period_start(today or self.today(athlete_id), period)
+        rows = []
+        for _ in range(periods):
+            totals = buckets.get((period, start, sport_type))
+            rows.append(RollupRow(start, replace(totals) if totals else ActivityTotals()))
+            start = previous_period(start, period)
+        rows.reverse()
+        return rows
+
+    def sport_types(self, athlete_id: Hashable) -> list[str]:
+        """Return the sport types an athlete has activities for."""
+        buckets = self._buckets.get(athlete_id, {})
+        return sorted({sport for _, _, sport in buckets if sport is not None})
+
+
+def format_rollups(rows: list[RollupRow], period: Period) -> str:
+    """Render rollup rows as a compact, fixed-width text table.
+
+    Args:
+        rows: Rows from ``ActivityRollups.table``
+        period: Period the rows cover
+
+    Returns:
+        Table with a header line and one line per period
+    """
+    lines = [f"{period.value:<10} {'count':>5} {'km':>7} {'hours':>6} {'elev_m':>6} {'load':>5}"]
+    for row in rows:
+        totals = row.totals
+        lines.append(
+            f"{row.start.isoformat():<10} {totals.count:>5} {totals.distance / 1000:>7.1f} "
+            f"{totals.duration / 3600:>6.1f} {totals.elevation:>6.0f} {totals.load:>5.0f}"
+        )
+    return "\n".join(lines)
+
+
+# Global rollups instance - created lazily
+_activity_rollups: ActivityRollups | None = None
+
+
+def get_activity_rollups() -> ActivityRollups:
+    """Get or create the process-wide rollups, kept up to date with the activity store.
+
+    Returns:
+        Rollups over the activity store
+    """
+    global _activity_rollups
+
+    if _activity_rollups is None:
+        store = get_activity_store()
+        _activity_rollups = ActivityRollups()
+        _activity_rollups.load(store)
+        store.add_listener(_activity_rollups.on_activity_change)
+    return _activity_rollups
+
+
+async def get_training_rollups(
+    athlete_id: int, period: str = "week", periods: int = 8, sport_type: str = ""
+) -> dict[str, Any]:
+    """Get the athlete's training totals per week or month as a compact table.
+
+    Much faster than fetching and adding up activities: totals are kept up to
+    date as activities sync. Use this to compare recent weeks or months, check
+    weekly volume or follow a sport's trend. Weeks and months follow the
+    athlete's local dates.
+
+    Args:
+        athlete_id: The athlete's ID (from get_athlete_profile)
+        period: "week" (Monday to Sunday) or "month"
+        periods: Number of periods to include, ending with the current one (max: 104)
+        sport_type: Only count one sport type, e.g. "Run" or "Ride" (all sports if empty)
+
+    Returns:
+        Dictionary with status and a table of count, distance (km), moving time
+        (hours), elevation gain (m) and load per period, or error message
+    """
+    logger.info(
+        f"Tool called: get_training_rollups(athlete_id={athlete_id}, period={period}, "
+        f"periods={periods}, sport_type={sport_type!r})"
+    )
+
+    try:
+        await ensure_backfilled(athlete_id)
+        rollups = get_activity_rollups()
+        await get_activity_store().sync_async()  # Apply changes made by other processes
+        sport_types = rollups.sport_types(athlete_id)
+        if not sport_types:
+            return {
+                "status": "error",
+                "error_message": "No synced activities for this athlete; use "
+                "get_recent_activities instead.",
+            }
+        rows = rollups.table(
+            athlete_id,
+            Period(period),
+            periods=max(1, min(periods, MAX_PERIODS)),
+            sport_type=sport_type or None,
+        )
+        return {
+            "status": "success",
+            "sport_types": sport_types,
+            "table": format_rollups(rows, Period(period)),
+        }
+    except Exception as e:
+        logger.error(f"Error building training rollups: {e}")
+        return {
+            "status": "error",
+            "error_message": f"Failed to build training rollups: {str(e)}",
+        }
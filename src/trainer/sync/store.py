@@ -0,0 +1,394 @@
+"""Local cache of athletes' activities."""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Hashable, Sequence
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+from trainer.models import Workout, WorkoutTable
+from trainer.utils.cache import connect_database
+from trainer.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Database file in the state directory
+ACTIVITIES_DB = "activities.db"
+
+# Each activity's latest version (NULL data once deleted), numbered in the order
+# changes were made so every process can apply the changes it has not seen yet
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS activities (
+        athlete_id TEXT NOT NULL,
+        activity_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        changed_at REAL NOT NULL,
+        data TEXT,
+        PRIMARY KEY (athlete_id, activity_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS activities_seq ON activities (seq)",
+)
+
+
+@dataclass(frozen=True)
+class ActivityChange:
+    """An activity being added, edited or removed.
+
+    ``previous`` is None for new activities and ``current`` is None for
+    deleted ones, so listeners can update derived data incrementally.
+    ``changed_at`` is when the change was made, which may be earlier than when
+    a process sharing the store applies it.
+    """
+
+    athlete_id: Hashable
+    activity_id: str
+    previous: Workout | None
+    current: Workout | None
+    changed_at: float | None = None  # Unix timestamp, if known
+
+
+ChangeListener = Callable[[ActivityChange], None]
+
+
+@dataclass
+class ActivityTotals:
+    """Totals over a set of activities (all of an athlete's, or one period's)."""
+
+    count: int = 0
+    distance: float = 0.0
+    duration: int = 0
+    load: float = 0.0
+    elevation: float = 0.0
+
+    def add(self, workout: Workout, sign: int = 1) -> None:
+        """Add a workout to the totals (or remove it, with sign=-1)."""
+        self.count += sign
+        self.distance += sign * workout.distance
+        self.duration += sign * workout.duration
+        self.load += sign * workout.training_load
+        self.elevation += sign * (workout.elevation_gain or 0.0)
+
+
+class ActivityStore:
+    """Cache of each athlete's activities, optionally persisted in SQLite.
+
+    Per-athlete totals are updated incrementally as activities change, and
+    listeners are notified of every change so other derived data can be kept
+    up to date the same way instead of being recomputed from the full history.
+
+    With a database ``path``, changes are written to the database and applied
+    in memory by ``sync()``. Processes sharing the database (e.g. the webhook
+    receiver and the agents) therefore see each other's changes, and their
+    listeners are notified of every change in the order it was made. Reads
+    only return what has been applied in memory, so they never touch the
+    database: sync first to see other processes' changes. Coroutines use the
+    ``*_async`` methods, which query the database in a worker thread but apply
+    changes (and notify listeners) in the calling thread. Athlete IDs must be
+    ints or strings to be persisted.
+    """
+
+    def __init__(self, path: str | Path | None = None, timeout: float = 5.0) -> None:
+        """Initialize the store.
+
+        Args:
+            path: Database shared with other processes (activities are only kept
+                in memory if None)
+            timeout: Seconds to wait for another process's write lock
+        """
+        self.path = Path(path) if path is not None else None
+        self.timeout = timeout
+        self._activities: dict[Hashable, dict[str, Workout]] = {}
+        self._totals: dict[Hashable, ActivityTotals] = {}
+        self._listeners: list[ChangeListener] = []
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._seq = 0  # Last database change applied
+        self._syncing = False
+        self._lock = threading.Lock()  # Serializes worker threads' use of the connection
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """Call listener with an ActivityChange whenever an activity changes."""
+        self._listeners.append(listener)
+
+    def _notify(self, change: ActivityChange) -> None:
+        totals = self._totals.setdefault(change.athlete_id, ActivityTotals())
+        if change.previous is not None:
+            totals.add(change.previous, sign=-1)
+        if change.current is not None:
+            totals.add(change.current)
+
+        for listener in self._listeners:
+            try:
+                listener(change)
+            except Exception as e:
+                logger.error(f"Activity change listener failed: {e}", exc_info=True)
+
+    def _apply(
+        self,
+        athlete_id: Hashable,
+        activity_id: str,
+        current: Workout | None,
+        changed_at: float | None = None,
+    ) -> Workout | None:
+        """Apply a change in memory, notifying listeners if the activity changed."""
+        activities = self._activities.setdefault(athlete_id, {})
+        previous = activities.get(activity_id)
+        if current is None:
+            activities.pop(activity_id, None)
+        else:
+            activities[activity_id] = current
+        if previous != current:
+            change = ActivityChange(
+                athlete_id, activity_id, previous, current, changed_at or time.time()
+            )
+            self._notify(change)
+        return previous
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            assert self.path is not None
+            self._connection = connect_database(self.path, self.timeout)
+            for statement in _SCHEMA:
+                self._connection.execute(statement)
+            self._pid = os.getpid()
+        return self._connection
+
+    def _record(self, athlete_id: Hashable, changes: Sequence[tuple[str, Workout | None]]) -> None:
+        """Record changes to an athlete's activities in the database (without applying them)."""
+        with self._lock:
+            connection = self._connect()
+            athlete_key = json.dumps(athlete_id)
+            # An immediate transaction takes the write lock, so change numbers are unique
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                (seq,) = connection.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM activities"
+                ).fetchone()
+                changed_at = time.time()
+                connection.executemany(
+                    "INSERT OR REPLACE INTO activities "
+                    "(athlete_id, activity_id, seq, changed_at, data) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            athlete_key,
+                            activity_id,
+                            seq + number,
+                            changed_at,
+                            None if workout is None else workout.model_dump_json(),
+                        )
+                        for number, (activity_id, workout) in enumerate(changes, start=1)
+                    ],
+                )
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+
+    def _changes(self, after: int) -> list[tuple[Hashable, str, int, float, Workout | None]]:
+        """Read and validate the database changes numbered after ``after``."""
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT athlete_id, activity_id, seq, changed_at, data FROM activities "
+                    "WHERE seq > ? ORDER BY seq",
+                    (after,),
+                )
+                .fetchall()
+            )
+        return [
+            (
+                json.loads(athlete_key),
+                activity_id,
+                seq,
+                changed_at,
+                None if data is None else Workout.model_validate_json(data),
+            )
+            for athlete_key, activity_id, seq, changed_at, data in rows
+        ]
+
+    def _apply_changes(
+        self, changes: Sequence[tuple[Hashable, str, int, float, Workout | None]]
+    ) -> int:
+        """Apply changes read from the database that have not been applied yet."""
+        # Another sync may have applied some of them while these were being read
+        changes = [change for change in changes if change[2] > self._seq]
+        self._syncing = True
+        try:
+            for athlete_id, activity_id, seq, changed_at, current in changes:
+                self._apply(athlete_id, activity_id, current, changed_at)
+                self._seq = seq
+        finally:
+            self._syncing = False
+        if changes:
+            logger.debug(f"Applied {len(changes)} activity changes from {self.path}")
+        return len(changes)
+
+    def sync(self) -> int:
+        """Apply changes written to the database since the last sync.
+
+        Writes sync too, but reads do not, so call this (or ``sync_async``)
+        before reading to see other processes' changes.
+
+        Returns:
+            Number of changes applied
+        """
+        if self.path is None or self._syncing:
+            return 0  # Listeners reading the store mid-sync see it as it is
+        return self._apply_changes(self._changes(self._seq))
+
+    async def sync_async(self) -> int:
+        """Like ``sync``, but reads the database in a worker thread.
+
+        Returns:
+            Number of changes applied
+        """
+        if self.path is None or self._syncing:
+            return 0
+        return self._apply_changes(await asyncio.to_thread(self._changes, self._seq))
+
+    def upsert(self, athlete_id: Hashable, workout: Workout) -> Workout | None:
+        """Add or replace an activity.
+
+        An activity identical to the stored version is not written again, and
+        listeners are not notified.
+
+        Args:
+            athlete_id: Owner of the activity
+            workout: The activity's current data
+
+        Returns:
+            The previously stored version, if any
+        """
+        if self.path is None:
+            return self._apply(athlete_id, workout.id, workout)
+        self.sync()
+        previous = self.get(athlete_id, workout.id)
+        if previous != workout:
+            self._record(athlete_id, [(workout.id, workout)])
+            self.sync()
+        return previous
+
+    async def upsert_async(self, athlete_id: Hashable, workout: Workout) -> Workout | None:
+        """Like ``upsert``, but queries the database in a worker thread."""
+        if self.path is None:
+            return self._apply(athlete_id, workout.id, workout)
+        await self.sync_async()
+        previous = self.get(athlete_id, workout.id)
+        if previous != workout:
+            await asyncio.to_thread(self._record, athlete_id, [(workout.id, workout)])
+            await self.sync_async()
+        return previous
+
+    def delete(self, athlete_id: Hashable, activity_id: str) -> Workout | None:
+        """Remove an activity.
+
+        Args:
+            athlete_id: Owner of the activity
+            activity_id: ID of the activity to remove
+
+        Returns:
+            The removed activity, or None if it was not stored
+        """
+        if self.path is None:
+            return self._apply(athlete_id, activity_id, None)
+        self.sync()
+        previous = self.get(athlete_id, activity_id)
+        if previous is not None:
+            self._record(athlete_id, [(activity_id, None)])
+            self.sync()
+        return previous
+
+    async def delete_async(self, athlete_id: Hashable, activity_id: str) -> Workout | None:
+        """Like ``delete``, but queries the database in a worker thread."""
+        if self.path is None:
+            return self._apply(athlete_id, activity_id, None)
+        await self.sync_async()
+        previous = self.get(athlete_id, activity_id)
+        if previous is not None:
+            await asyncio.to_thread(self._record, athlete_id, [(activity_id, None)])
+            await self.sync_async()
+        return previous
+
+    def forget(self, athlete_id: Hashable) -> None:
+        """Remove all of an athlete's activities (e.g. after deauthorization)."""
+        self.sync()
+        activity_ids = list(self._activities.get(athlete_id, {}))
+        if self.path is None:
+            for activity_id in activity_ids:
+                self._apply(athlete_id, activity_id, None)
+        elif activity_ids:
+            self._record(athlete_id, [(activity_id, None) for activity_id in activity_ids])
+            self.sync()
+        self._activities.pop(athlete_id, None)
+        self._totals.pop(athlete_id, None)
+
+    async def forget_async(self, athlete_id: Hashable) -> None:
+        """Like ``forget``, but queries the database in a worker thread."""
+        if self.path is None:
+            return self.forget(athlete_id)
+        await self.sync_async()
+        activity_ids = list(self._activities.get(athlete_id, {}))
+        if activity_ids:
+            changes = [(activity_id, None) for activity_id in activity_ids]
+            await asyncio.to_thread(self._record, athlete_id, changes)
+            await self.sync_async()
+        self._activities.pop(athlete_id, None)
+        self._totals.pop(athlete_id, None)
+
+    def totals(self, athlete_id: Hashable) -> ActivityTotals:
+        """Return a copy of an athlete's all-time totals."""
+        return replace(self._totals.get(athlete_id, ActivityTotals()))
+
+    def athletes(self) -> list[Hashable]:
+        """Return the IDs of athletes with stored activities."""
+        return [athlete_id for athlete_id, activities in self._activities.items() if activities]
+
+    def get(self, athlete_id: Hashable, activity_id: str) -> Workout | None:
+        """Return a stored activity, if present."""
+        return self._activities.get(athlete_id, {}).get(activity_id)
+
+    def activities(self, athlete_id: Hashable) -> list[Workout]:
+        """Return an athlete's stored activities, oldest first."""
+        workouts = self._activities.get(athlete_id, {}).values()
+        return sorted(workouts, key=lambda workout: workout.start_date)
+
+    def table(self, athlete_id: Hashable) -> WorkoutTable:
+        """Return an athlete's stored activities as a WorkoutTable, oldest first."""
+        return WorkoutTable.from_workouts(self.activities(athlete_id))
+
+    def close(self) -> None:
+        """Close this process's database connection."""
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+    def __len__(self) -> int:
+        return sum(len(activities) for activities in self._activities.values())
+
+
+# Global activity store instance - created lazily
+_activity_store: ActivityStore | None = None
+
+
+def get_activity_store() -> ActivityStore:
+    """Get or create the process-wide activity store.
+
+    Returns:
+        The activity store, persisted in the state directory so that every
+        process (webhook receiver, CLI and serving workers) shares it
+    """
+    global _activity_store
+
+    if _activity_store is None:
+        state_dir = Path(get_settings().state_dir)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        _activity_store = ActivityStore(state_dir / ACTIVITIES_DB)
+    return _activity_store
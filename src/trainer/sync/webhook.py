@@ -0,0 +1,289 @@
+"""Receiver for Strava webhook (push subscription) events.
+
+Strava POSTs an event whenever a subscribed athlete creates, updates or
+deletes an activity, or revokes access. Instead of polling for new activities,
+each event enqueues a fetch of just the affected activity, and the result is
+applied to the activity store incrementally.
+
+See https://developers.strava.com/docs/webhooks/
+"""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import asdict, dataclass
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field, ValidationError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from trainer.models.ingest import NonJSONContentError, parse_mcp_content
+from trainer.sync.backfill import (
+    AUTHENTICATED_ATHLETE,
+    BACKFILL_INTERVAL,
+    backfill_authenticated_athlete,
+)
+from trainer.sync.store import ActivityStore, get_activity_store
+from trainer.tools import get_activity_details
+from trainer.tools.rate_limit import SyncScheduler, background_requests
+
+logger = logging.getLogger(__name__)
+
+ActivityFetcher = Callable[[str], Awaitable[dict[str, Any]]]
+
+
+class WebhookEvent(BaseModel):
+    """A Strava push subscription event."""
+
+    object_type: Literal["activity", "athlete"]
+    object_id: int = Field(..., description="Activity ID, or athlete ID for athlete events")
+    aspect_type: Literal["create", "update", "delete"]
+    owner_id: int = Field(..., description="Athlete ID of the activity's owner")
+    subscription_id: int
+    event_time: int = Field(..., description="Unix timestamp of the event")
+    updates: dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def is_deauthorization(self) -> bool:
+        """Whether the athlete revoked the app's access."""
+        return self.object_type == "athlete" and str(self.updates.get("authorized")) == "false"
+
+
+@dataclass
+class WebhookStats:
+    """Counters for a webhook processor."""
+
+    received: int = 0
+    coalesced: int = 0
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0  # Processed, but the activity details were text rather than JSON
+
+
+class WebhookProcessor:
+    """Applies webhook events to the activity store in the background.
+
+    Events are queued so the HTTP handler can acknowledge Strava immediately.
+    Several events for the same activity that arrive before it is fetched are
+    coalesced into a single fetch.
+    """
+
+    def __init__(
+        self,
+        store: ActivityStore | None = None,
+        fetch_activity: ActivityFetcher = get_activity_details,
+    ):
+        """Initialize the processor.
+
+        Args:
+            store: Activity store to update (defaults to the global one)
+            fetch_activity: Coroutine function returning a Strava tool result for an activity ID
+        """
+        self.store = get_activity_store() if store is None else store
+        self.fetch_activity = fetch_activity
+        self.stats = WebhookStats()
+        self._queue: asyncio.Queue[tuple[str, int, int]] = asyncio.Queue()
+        self._pending: dict[tuple[str, int, int], WebhookEvent] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def submit(self, event: WebhookEvent) -> None:
+        """Queue an event for processing.
+
+        Args:
+            event: The received event
+        """
+        self.stats.received += 1
+        key = (event.object_type, event.owner_id, event.object_id)
+        pending = self._pending.get(key)
+        if pending is not None:
+            # A delete supersedes everything; otherwise one fetch picks up all edits
+            self.stats.coalesced += 1
+            if event.aspect_type == "delete" or event.is_deauthorization:
+                self._pending[key] = event
+            return
+        self._pending[key] = event
+        self._queue.put_nowait(key)
+
+    async def run(self) -> None:
+        """Process queued events one at a time, until cancelled."""
+        while True:
+            key = await self._queue.get()
+            event = self._pending.pop(key)
+            try:
+                await self.process(event)
+            except Exception as e:
+                self.stats.failed += 1
+                logger.warning(
+                    f"Failed to process {event.aspect_type} event for "
+                    f"{event.object_type} {event.object_id}: {e}"
+                )
+            else:
+                self.stats.processed += 1
+            finally:
+                self._queue.task_done()
+
+    async def process(self, event: WebhookEvent) -> None:
+        """Apply a single event to the activity store.
+
+        Args:
+            event: The event to apply
+
+        Raises:
+            ValueError: If the activity could not be fetched or validated
+        """
+        if event.object_type == "athlete":
+            if event.is_deauthorization:
+                logger.info(f"Athlete {event.owner_id} deauthorized; forgetting their activities")
+                await self.store.forget_async(event.owner_id)
+            return
+
+        activity_id = str(event.object_id)
+        if event.aspect_type == "delete":
+            await self.store.delete_async(event.owner_id, activity_id)
+            return
+
+        with background_requests():
+            result = await self.fetch_activity(activity_id)
+        if result.get("status") != "success":
+            raise ValueError(result.get("error_message", "fetch failed"))
+        try:
+            workouts = parse_mcp_content(result.get("data") or [])
+        except NonJSONContentError:
+            # The MCP server formatted the details as text, so there is nothing to store
+            self.stats.skipped += 1
+            logger.info(f"Activity {activity_id} details are not JSON; not syncing it")
+            return
+        for workout in workouts:
+            await self.store.upsert_async(event.owner_id, workout)
+        logger.debug(f"Synced activity {activity_id} for athlete {event.owner_id}")
+
+    async def join(self) -> None:
+        """Wait until every queued event has been processed."""
+        await self._queue.join()
+
+    def start(self) -> None:
+        """Start processing events in a background task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def metrics(self) -> dict[str, float]:
+        """Event counters and queue depth, for monitoring.
+
+        Returns:
+            Dictionary of metric name to value
+        """
+        return {**asdict(self.stats), "queue_depth": self._queue.qsize()}
+
+
+def create_webhook_app(
+    processor: WebhookProcessor,
+    verify_token: str | None,
+    scheduler: SyncScheduler | None = None,
+) -> Starlette:
+    """Create the webhook HTTP application.
+
+    Args:
+        processor: Processor that received events are submitted to
+        verify_token: Token Strava must echo when validating the subscription
+        scheduler: Background syncs (e.g. backfills) to run while serving
+
+    Returns:
+        ASGI application serving ``/webhook`` and ``/metrics``
+    """
+
+    async def validate_subscription(request: Request) -> JSONResponse:
+        params = request.query_params
+        if (
+            params.get("hub.mode") != "subscribe"
+            or verify_token is None
+            or params.get("hub.verify_token") != verify_token
+        ):
+            logger.warning("Rejected webhook subscription validation request")
+            return JSONResponse({"error": "verification failed"}, status_code=403)
+        return JSONResponse({"hub.challenge": params.get("hub.challenge")})
+
+    async def receive_event(request: Request) -> JSONResponse:
+        try:
+            event = WebhookEvent.model_validate_json(await request.body())
+        except ValidationError as e:
+            logger.warning(f"Ignoring malformed webhook event: {e}")
+            return JSONResponse({"error": "invalid event"}, status_code=400)
+        # Strava expects a 200 within two seconds, so fetching happens in the background
+        processor.submit(event)
+        return JSONResponse({"status": "accepted"})
+
+    async def metrics(request: Request) -> JSONResponse:
+        syncs = scheduler.metrics() if scheduler is not None else {}
+        return JSONResponse(
+            {**processor.metrics(), **{f"sync_{name}": value for name, value in syncs.items()}}
+        )
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        processor.start()
+        if scheduler is not None:
+            scheduler.start()
+        try:
+            yield
+        finally:
+            if scheduler is not None:
+                await scheduler.stop()
+            await processor.stop()
+
+    return Starlette(
+        routes=[
+            Route("/webhook", validate_subscription, methods=["GET"]),
+            Route("/webhook", receive_event, methods=["POST"]),
+            Route("/metrics", metrics, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def create_webhook_receiver(verify_token: str | None) -> Starlette:
+    """Create the webhook application for the global activity store.
+
+    The athlete's recent activities are also backfilled into the store at
+    startup and then hourly, so it holds their history and catches up on
+    events missed while no receiver was running.
+
+    Args:
+        verify_token: Token Strava must echo when validating the subscription
+
+    Returns:
+        ASGI application serving ``/webhook`` and ``/metrics``
+    """
+    if verify_token is None:
+        logger.warning("STRAVA_WEBHOOK_VERIFY_TOKEN is not set; subscription validation will fail")
+
+    scheduler = SyncScheduler(interval=BACKFILL_INTERVAL)
+    scheduler.register(AUTHENTICATED_ATHLETE, backfill_authenticated_athlete)
+    return create_webhook_app(WebhookProcessor(), verify_token, scheduler)
+
+
+async def run_webhook_server(host: str, port: int, verify_token: str | None) -> None:
+    """Serve the webhook receiver until interrupted.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on
+        verify_token: Token Strava must echo when validating the subscription
+    """
+    import uvicorn
+
+    app = create_webhook_receiver(verify_token)
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_config=None))
+    logger.info(f"Listening for Strava webhook events on http://{host}:{port}/webhook")
+    await server.serve()
@@ -1,5 +1,6 @@
 """MCP tools and integrations."""
 
+from .cassette import Cassette, CassetteMissError, CassetteMode, get_cassette, set_cassette
 from .strava_mcp import (
     close_mcp_session,
     get_activity_details,
@@ -18,4 +19,9 @@ __all__ = [
     "list_athlete_clubs",
     "get_segment",
     "close_mcp_session",
+    "Cassette",
+    "CassetteMode",
+    "CassetteMissError",
+    "get_cassette",
+    "set_cassette",
 ]
@@ -0,0 +1,384 @@
+"""Record and replay of MCP tool calls and LLM exchanges.
+
+A ``Cassette`` sits between the agent and its two network dependencies: the
+Strava MCP session (``session.call_tool``) and the Gemini model
+(``BaseLlm.generate_content_async``). When recording, calls go through to the
+real services and every request, response and latency is appended to a JSON
+Lines file. When replaying, responses come from the file instead, so a
+conversation can be re-run with no network or credentials.
+
+Replay is deterministic: interactions are matched by a hash of their request
+(tool name and arguments, or model and conversation contents), and repeated
+identical requests get their recorded responses in order. With ``realtime``
+enabled, replay also waits the recorded latencies, reproducing a production
+latency profile offline for benchmarks.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from collections.abc import AsyncGenerator
+from enum import Enum
+from pathlib import Path
+from typing import Any, Literal, Protocol
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from mcp.types import CallToolResult
+from pydantic import BaseModel, Field
+
+from trainer.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CassetteMode(str, Enum):
+    """Whether a cassette records live traffic or replays it."""
+
+    RECORD = "record"
+    REPLAY = "replay"
+
+
+class CassetteMissError(LookupError):
+    """Raised when replaying a request that was not recorded."""
+
+
+class ReplayedError(RuntimeError):
+    """A failure recorded from the live service, raised again on replay."""
+
+
+class Interaction(BaseModel):
+    """One recorded request and its responses."""
+
+    kind: Literal["tool", "llm"]
+    key: str
+    request: dict[str, Any]
+    responses: list[dict[str, Any]] = Field(default_factory=list)
+    # Seconds before each response arrived (since the request, then the previous response)
+    delays: list[float] = Field(default_factory=list)
+    error: str | None = None
+
+
+class ToolSession(Protocol):
+    """The part of ``mcp.ClientSession`` the Strava tools use."""
+
+    async def call_tool(
+        self, name: str, arguments: dict[str, Any] | None = None
+    ) -> CallToolResult: ...
+
+
+# Objects whose "id" ADK generates afresh on every run
+GENERATED_ID_PARENTS = frozenset({"function_call", "function_response"})
+
+
+def _strip_ids(value: Any, parent: str | None = None) -> Any:
+    """Remove ADK-generated function call and invocation ids, which differ on every run.
+
+    Other ids, such as activity ids in tool call arguments and results, are kept.
+    """
+    if isinstance(value, dict):
+        return {
+            key: _strip_ids(item, key)
+            for key, item in value.items()
+            if key != "invocation_id" and (key != "id" or parent not in GENERATED_ID_PARENTS)
+        }
+    if isinstance(value, list):
+        return [_strip_ids(item, parent) for item in value]
+    return value
+
+
+def request_key(kind: str, request: dict[str, Any]) -> str:
+    """Identify a request by a hash of its canonical JSON form.
+
+    Args:
+        kind: Interaction kind ("tool" or "llm")
+        request: JSON-compatible request
+
+    Returns:
+        Key used to match replayed requests with recorded ones
+    """
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"))
+    return f"{kind}:{hashlib.sha1(canonical.encode()).hexdigest()[:16]}"
+
+
+def _describe(request: dict[str, Any]) -> str:
+    """Short description of a request for error messages."""
+    if "name" in request:
+        return f"{request['name']}({json.dumps(request['arguments'])})"
+    return f"{request['model']} after {len(request['contents'])} contents"
+
+
+class Cassette:
+    """A file of recorded interactions, either being recorded or replayed."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: CassetteMode = CassetteMode.REPLAY,
+        realtime: bool = False,
+        speed: float = 1.0,
+        allow_repeats: bool = False,
+    ):
+        """Open a cassette.
+
+        Recording truncates the file; replaying loads it.
+
+        Args:
+            path: JSON Lines file of interactions
+            mode: Record live traffic or replay the file
+            realtime: Wait the recorded latencies when replaying
+            speed: Replay speed-up factor for realtime replay
+            allow_repeats: Replay the last recorded response again once a
+                request's recordings run out, rather than failing
+        """
+        self.path = Path(path)
+        self.mode = CassetteMode(mode)
+        self.realtime = realtime
+        self.speed = speed
+        self.allow_repeats = allow_repeats
+        self.interactions: list[Interaction] = []
+        self._pending: dict[str, deque[Interaction]] = defaultdict(deque)
+        self._last: dict[str, Interaction] = {}
+        self.hits = 0
+        self.misses = 0
+
+        if self.replaying:
+            with open(self.path, encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        interaction = Interaction.model_validate_json(line)
+                        self.interactions.append(interaction)
+                        self._pending[interaction.key].append(interaction)
+            logger.info(f"Replaying {len(self.interactions)} interactions from {self.path}")
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("", encoding="utf-8")
+            logger.info(f"Recording interactions to {self.path}")
+
+    @property
+    def replaying(self) -> bool:
+        """Whether responses come from the cassette rather than live services."""
+        return self.mode == CassetteMode.REPLAY
+
+    def record(self, interaction: Interaction) -> None:
+        """Append an interaction to the cassette file.
+
+        Args:
+            interaction: Completed interaction
+        """
+        self.interactions.append(interaction)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(interaction.model_dump_json() + "\n")
+
+    def next(self, kind: str, request: dict[str, Any]) -> Interaction:
+        """Take the next recorded interaction for a request.
+
+        Args:
+            kind: Interaction kind ("tool" or "llm")
+            request: JSON-compatible request
+
+        Returns:
+            The recorded interaction
+
+        Raises:
+            CassetteMissError: If the request was not recorded (or its recordings
+                are used up and repeats are not allowed)
+        """
+        key = request_key(kind, request)
+        pending = self._pending.get(key)
+        if pending:
+            interaction = self._last[key] = pending.popleft()
+        elif self.allow_repeats and key in self._last:
+            interaction = self._last[key]
+        else:
+            self.misses += 1
+            raise CassetteMissError(f"No recorded {kind} interaction for {_describe(request)}")
+        self.hits += 1
+        return interaction
+
+    async def play(self, interaction: Interaction) -> AsyncGenerator[dict[str, Any], None]:
+        """Yield an interaction's responses, at the recorded pace if realtime.
+
+        Args:
+            interaction: Recorded interaction
+
+        Yields:
+            Recorded JSON responses
+
+        Raises:
+            ReplayedError: If the live call failed when it was recorded
+        """
+        for index, delay in enumerate(interaction.delays):
+            if self.realtime and delay > 0:
+                await asyncio.sleep(delay / self.speed)
+            if index < len(interaction.responses):
+                yield interaction.responses[index]
+        if interaction.error is not None:
+            raise ReplayedError(interaction.error)
+
+    def session(self, inner: ToolSession | None = None) -> "CassetteSession":
+        """Wrap an MCP session (not needed when replaying).
+
+        Args:
+            inner: Live session to record calls to
+
+        Returns:
+            Session that records or replays tool calls
+        """
+        return CassetteSession(self, inner)
+
+    def model(self, model: str | BaseLlm) -> "CassetteLlm":
+        """Wrap a model for use as an ADK agent's ``model``.
+
+        Args:
+            model: Model name or instance to record exchanges with
+
+        Returns:
+            Model that records or replays exchanges
+        """
+        name = model if isinstance(model, str) else model.model
+        inner = None
+        if not self.replaying:
+            inner = LLMRegistry.new_llm(model) if isinstance(model, str) else model
+        return CassetteLlm(model=name, cassette=self, inner=inner)
+
+    def metrics(self) -> dict[str, float]:
+        """Interaction counts, for checking a replay went as recorded.
+
+        Returns:
+            Dictionary of metric name to value
+        """
+        return {"interactions": len(self.interactions), "hits": self.hits, "misses": self.misses}
+
+
+def _to_json(model: BaseModel) -> dict[str, Any]:
+    # Round trip through JSON so bytes are stored base64-encoded
+    result: dict[str, Any] = json.loads(model.model_dump_json(exclude_none=True))
+    return result
+
+
+class CassetteSession:
+    """MCP session stand-in that records or replays ``call_tool``."""
+
+    def __init__(self, cassette: Cassette, inner: ToolSession | None = None):
+        self.cassette = cassette
+        self.inner = inner
+
+    async def call_tool(self, name: str, arguments: dict[str, Any] | None = None) -> CallToolResult:
+        """Call an MCP tool, or replay its recorded result.
+
+        Args:
+            name: Tool name
+            arguments: Tool arguments
+
+        Returns:
+            The tool result
+        """
+        request = {"name": name, "arguments": arguments or {}}
+        if self.cassette.replaying:
+            interaction = self.cassette.next("tool", request)
+            responses = [response async for response in self.cassette.play(interaction)]
+            return CallToolResult.model_validate_json(json.dumps(responses[0]))
+
+        if self.inner is None:
+            raise ValueError("Recording tool calls needs a live MCP session")
+        interaction = Interaction(kind="tool", key=request_key("tool", request), request=request)
+        started = time.perf_counter()
+        try:
+            result = await self.inner.call_tool(name, arguments=arguments)
+        except Exception as e:
+            interaction.error = str(e)
+            raise
+        else:
+            interaction.responses.append(_to_json(result))
+            return result
+        finally:
+            interaction.delays.append(time.perf_counter() - started)
+            self.cassette.record(interaction)
+
+
+class CassetteLlm(BaseLlm):
+    """ADK model that records or replays exchanges with another model."""
+
+    cassette: Cassette
+    inner: BaseLlm | None = None
+
+    def _request(self, llm_request: LlmRequest) -> dict[str, Any]:
+        # The system instruction is left out: it embeds the athlete snapshot,
+        # whose freshness varies, while the conversation itself is deterministic.
+        contents = [_strip_ids(_to_json(content)) for content in llm_request.contents]
+        return {"model": self.model, "contents": contents}
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Generate content with the wrapped model, or replay a recorded exchange.
+
+        Args:
+            llm_request: Request to send to the model
+            stream: Whether to stream partial responses
+
+        Yields:
+            Model responses
+        """
+        request = self._request(llm_request)
+        if self.cassette.replaying:
+            interaction = self.cassette.next("llm", request)
+            async for response in self.cassette.play(interaction):
+                yield LlmResponse.model_validate_json(json.dumps(response))
+            return
+
+        if self.inner is None:
+            raise ValueError("Recording model exchanges needs a live model")
+        interaction = Interaction(kind="llm", key=request_key("llm", request), request=request)
+        last = time.perf_counter()
+        try:
+            async for chunk in self.inner.generate_content_async(llm_request, stream=stream):
+                now = time.perf_counter()
+                interaction.delays.append(now - last)
+                last = now
+                # Serialized before yielding, as ADK updates responses in place
+                interaction.responses.append(_to_json(chunk))
+                yield chunk
+        except Exception as e:
+            interaction.error = str(e)
+            raise
+        finally:
+            self.cassette.record(interaction)
+
+
+# Global cassette instance - created lazily from settings
+_cassette: Cassette | None = None
+
+
+def get_cassette() -> Cassette | None:
+    """Get the process-wide cassette, if one is configured.
+
+    Returns:
+        Cassette from ``TRAINER_CASSETTE`` settings, or the one set with
+        ``set_cassette``, or None when traffic goes straight to live services
+    """
+    global _cassette
+
+    if _cassette is None:
+        settings = get_settings()
+        if settings.cassette_path:
+            _cassette = Cassette(
+                settings.cassette_path,
+                mode=CassetteMode(settings.cassette_mode),
+                realtime=settings.cassette_realtime,
+            )
+    return _cassette
+
+
+def set_cassette(cassette: Cassette | None) -> None:
+    """Use a cassette for all MCP tool calls and new agents' models.
+
+    Args:
+        cassette: Cassette to use, or None to go back to live services
+    """
+    global _cassette
+    _cassette = cassette
@@ -0,0 +1,419 @@
+"""Strava API quota tracking and background sync scheduling."""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import sqlite3
+import time
+from collections.abc import Awaitable, Callable, Hashable, Iterator, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from trainer.utils.cache import SQLiteCache, get_shared_cache
+from trainer.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Spreads successive athletes' first syncs evenly over the interval, however many there are
+_GOLDEN_RATIO_FRACTION = 0.6180339887498949
+
+
+class Priority(IntEnum):
+    """Request priority; lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class RateLimitError(Exception):
+    """Raised when Strava quota does not become available in time."""
+
+
+# Priority of Strava requests made in the current context
+_request_priority: ContextVar[Priority] = ContextVar(
+    "strava_request_priority", default=Priority.INTERACTIVE
+)
+
+
+def current_priority() -> Priority:
+    """Priority of Strava requests made in the current context."""
+    return _request_priority.get()
+
+
+@contextlib.contextmanager
+def background_requests() -> Iterator[None]:
+    """Mark Strava requests made within this context (and its tasks) as background."""
+    token = _request_priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+@dataclass
+class RateWindow:
+    """A fixed request quota window, aligned to the clock like Strava's.
+
+    Strava counts requests in 15-minute windows starting on the quarter hour
+    and in daily windows starting at midnight UTC.
+    """
+
+    name: str
+    limit: int
+    period: float
+    used: int = 0
+    window_start: float = field(default=0.0, repr=False)
+
+    def start(self, now: float) -> float:
+        """Time at which the current window started."""
+        return now - now % self.period
+
+    def _roll(self, now: float) -> None:
+        """Reset the count when a new window has started."""
+        start = self.start(now)
+        if start != self.window_start:
+            self.window_start = start
+            self.used = 0
+
+    def remaining(self, now: float) -> int:
+        """Requests left in the current window."""
+        self._roll(now)
+        return max(self.limit - self.used, 0)
+
+    def resets_at(self, now: float) -> float:
+        """Time at which the current window ends."""
+        self._roll(now)
+        return self.window_start + self.period
+
+
+class StravaRateLimiter:
+    """Quota for Strava requests, shared by every caller in the process.
+
+    Requests take one unit from every window. Interactive requests are always
+    served before queued background requests, and background requests may only
+    use ``background_share`` of each window so interactive users keep headroom.
+
+    With a ``shared`` cache, the windows are counted in it, so every process
+    using the state directory (serving workers, the webhook receiver, CLI runs)
+    draws on the same quota, and a restarted process remembers what was used.
+    The windows then mirror the shared counts as last seen.
+    """
+
+    def __init__(
+        self,
+        windows: Sequence[RateWindow],
+        background_share: float = 0.8,
+        clock: Callable[[], float] = time.time,
+        shared: SQLiteCache | None = None,
+    ):
+        """Initialize the rate limiter.
+
+        Args:
+            windows: Quota windows that every request counts against
+            background_share: Fraction of each window background requests may use
+            clock: Wall-clock time source (windows align to it)
+            shared: Cache counting the windows for every process, if any
+        """
+        self.windows = list(windows)
+        self.background_share = background_share
+        self.shared = shared
+        self._clock = clock
+        self._waiters: list[tuple[Priority, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: asyncio.Task[None] | None = None
+        self._wakeup = asyncio.Event()
+
+    def _limits(self, priority: Priority) -> list[int]:
+        """Most requests of a priority each window allows."""
+        share = 1.0 if priority == Priority.INTERACTIVE else self.background_share
+        return [window.limit - round(window.limit * (1 - share)) for window in self.windows]
+
+    def _reserve(self, priority: Priority) -> float | None:
+        """Take one request from every window, if they all have room for the priority.
+
+        Blocks on the shared cache, if any.
+
+        Returns:
+            None if the request was counted, otherwise seconds until the first
+            window without room resets
+        """
+        now = self._clock()
+        limits = self._limits(priority)
+        counted: bool | None = None
+        if self.shared is not None:
+            counters = [
+                (f"strava-quota:{window.name}", window.start(now), limit)
+                for window, limit in zip(self.windows, limits)
+            ]
+            try:
+                counted, used = self.shared.consume(counters)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not count Strava quota in the shared cache: {e}")
+            else:
+                for window, uses in zip(self.windows, used):
+                    window.window_start, window.used = window.start(now), uses
+        if counted is None:  # Counted by this process alone
+            counted = all(
+                window.remaining(now) > window.limit - limit
+                for window, limit in zip(self.windows, limits)
+            )
+            if counted:
+                for window in self.windows:
+                    window.used += 1
+        if counted:
+            return None
+        full = [
+            window
+            for window, limit in zip(self.windows, limits)
+            if window.remaining(now) <= window.limit - limit
+        ]
+        return max(min(window.resets_at(now) for window in full) - now, 0.0)
+
+    async def _reserve_async(self, priority: Priority) -> float | None:
+        if self.shared is None:
+            return self._reserve(priority)
+        return await asyncio.to_thread(self._reserve, priority)
+
+    def _wake(self) -> None:
+        """Start the dispatcher, or have it look at the queue again."""
+        if (
+            self._dispatcher is None
+            or self._dispatcher.done()
+            or self._dispatcher.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        else:
+            self._wakeup.set()
+
+    async def _dispatch(self) -> None:
+        """Grant quota to queued requests in priority order, until none are waiting."""
+        reserved = False
+        while True:
+            while self._waiters and self._waiters[0][2].done():  # Timed out or cancelled
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                return
+            if not reserved:
+                self._wakeup.clear()
+                delay = await self._reserve_async(self._waiters[0][0])
+                if delay is not None:
+                    # Wait for the first full window to reset, or for a new request
+                    with contextlib.suppress(asyncio.TimeoutError):  # noqa: UP041
+                        await asyncio.wait_for(self._wakeup.wait(), delay)
+                    continue
+                reserved = True
+                continue  # The first waiter may have changed or given up meanwhile
+            _, _, future = heapq.heappop(self._waiters)
+            future.set_result(None)
+            reserved = False
+
+    async def acquire(self, priority: Priority | None = None, timeout: float | None = None) -> None:
+        """Wait for quota for one Strava request.
+
+        Args:
+            priority: Request priority (defaults to the priority of the current context)
+            timeout: Seconds to wait before giving up (None waits indefinitely)
+
+        Raises:
+            RateLimitError: If quota did not become available within the timeout
+        """
+        priority = _request_priority.get() if priority is None else priority
+        if not len(self) and await self._reserve_async(priority) is None:
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        logger.debug(f"Waiting for Strava quota ({priority.name}, queue depth {len(self)})")
+        self._wake()
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:  # noqa: UP041 - not the builtin TimeoutError on Python 3.10
+            raise RateLimitError(
+                f"Strava quota exhausted; no capacity within {timeout:.0f}s"
+            ) from None
+        finally:
+            if not future.done() or future.cancelled():
+                self._wake()  # Lets the dispatcher stop once nobody is waiting
+
+    def __len__(self) -> int:
+        """Number of requests waiting for quota."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def metrics(self) -> dict[str, float]:
+        """Queue depth and remaining quota, for monitoring.
+
+        Returns:
+            Dictionary of metric name to value
+        """
+        now = self._clock()
+        metrics: dict[str, float] = {
+            "queue_depth": len(self),
+            "queue_depth_interactive": sum(
+                1
+                for priority, _, future in self._waiters
+                if priority == Priority.INTERACTIVE and not future.done()
+            ),
+        }
+        metrics["queue_depth_background"] = (
+            metrics["queue_depth"] - metrics["queue_depth_interactive"]
+        )
+        for window in self.windows:
+            metrics[f"remaining_{window.name}"] = window.remaining(now)
+            metrics[f"resets_in_{window.name}"] = window.resets_at(now) - now
+        return metrics
+
+
+# Global rate limiter instance - created lazily
+_rate_limiter: StravaRateLimiter | None = None
+
+
+def get_rate_limiter() -> StravaRateLimiter:
+    """Get or create the process-wide Strava rate limiter.
+
+    Returns:
+        Rate limiter with Strava's 15-minute and daily windows, counted in the
+        shared cache so every process draws on the same quota
+    """
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        settings = get_settings()
+        _rate_limiter = StravaRateLimiter(
+            [
+                RateWindow("15min", settings.strava_rate_limit_15min, 15 * 60),
+                RateWindow("daily", settings.strava_rate_limit_daily, 24 * 60 * 60),
+            ],
+            shared=get_shared_cache(),
+        )
+    return _rate_limiter
+
+
+@dataclass(order=True)
+class _ScheduledSync:
+    due: float
+    athlete_id: Hashable = field(compare=False)
+
+
+@dataclass
+class SyncStats:
+    """Counters for a background sync scheduler."""
+
+    completed: int = 0
+    failed: int = 0
+
+
+class SyncScheduler:
+    """Periodically runs incremental syncs for many athletes in the background.
+
+    Syncs are spread evenly across the interval rather than all firing at
+    once, run one at a time, and make their Strava requests at background
+    priority so they never delay interactive requests.
+    """
+
+    def __init__(self, interval: float = 3600.0, limiter: StravaRateLimiter | None = None):
+        """Initialize the scheduler.
+
+        Args:
+            interval: Seconds between syncs of the same athlete
+            limiter: Rate limiter to report metrics from (defaults to the global one)
+        """
+        self.interval = interval
+        self.limiter = get_rate_limiter() if limiter is None else limiter
+        self.stats = SyncStats()
+        self._syncs: dict[Hashable, Callable[[], Awaitable[Any]]] = {}
+        self._schedule: list[_ScheduledSync] = []
+        self._entries: dict[Hashable, _ScheduledSync] = {}
+        self._registrations = itertools.count()
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def register(self, athlete_id: Hashable, sync: Callable[[], Awaitable[Any]]) -> None:
+        """Add an athlete to the sync rotation.
+
+        The first sync is staggered so that syncs stay evenly spread across
+        the interval as athletes are added.
+
+        Args:
+            athlete_id: Athlete identifier
+            sync: Coroutine function that fetches the athlete's new data
+        """
+        self._syncs[athlete_id] = sync
+        offset = self.interval * ((next(self._registrations) * _GOLDEN_RATIO_FRACTION) % 1)
+        self._push(athlete_id, time.monotonic() + offset)
+
+    def unregister(self, athlete_id: Hashable) -> None:
+        """Remove an athlete from the sync rotation."""
+        self._syncs.pop(athlete_id, None)
+        self._entries.pop(athlete_id, None)
+
+    def _push(self, athlete_id: Hashable, due: float) -> None:
+        """Schedule an athlete's next sync, replacing any earlier entry."""
+        entry = _ScheduledSync(due, athlete_id)
+        self._entries[athlete_id] = entry
+        heapq.heappush(self._schedule, entry)
+        self._changed.set()
+
+    async def run(self) -> None:
+        """Run syncs as they fall due, until cancelled."""
+        while True:
+            # Drop entries for unregistered or rescheduled athletes
+            while self._schedule and (
+                self._entries.get(self._schedule[0].athlete_id) is not self._schedule[0]
+            ):
+                heapq.heappop(self._schedule)
+
+            delay = self._schedule[0].due - time.monotonic() if self._schedule else None
+            if delay is None or delay > 0:
+                self._changed.clear()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._changed.wait(), delay)
+                continue
+
+            scheduled = heapq.heappop(self._schedule)
+            await self._sync(scheduled.athlete_id)
+            if self._entries.get(scheduled.athlete_id) is scheduled:
+                self._push(scheduled.athlete_id, time.monotonic() + self.interval)
+
+    async def _sync(self, athlete_id: Hashable) -> None:
+        """Run one athlete's sync at background priority."""
+        logger.debug(f"Background sync for athlete {athlete_id}")
+        try:
+            with background_requests():
+                await self._syncs[athlete_id]()
+        except Exception as e:
+            self.stats.failed += 1
+            logger.warning(f"Background sync failed for athlete {athlete_id}: {e}")
+        else:
+            self.stats.completed += 1
+
+    def start(self) -> None:
+        """Start running syncs in a background task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def metrics(self) -> dict[str, float]:
+        """Scheduler and quota metrics, for monitoring.
+
+        Returns:
+            Dictionary of metric name to value
+        """
+        return {
+            **self.limiter.metrics(),
+            "athletes": len(self._syncs),
+            "syncs_completed": self.stats.completed,
+            "syncs_failed": self.stats.failed,
+        }
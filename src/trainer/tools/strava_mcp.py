@@ -7,15 +7,20 @@ from typing import Any
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 
+from trainer.tools.cassette import ToolSession, get_cassette
+from trainer.tools.rate_limit import Priority, current_priority, get_rate_limiter
 from trainer.utils.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Seconds an interactive tool call waits for Strava quota before failing
+QUOTA_TIMEOUT = 30.0
+
 # Global MCP client and session - kept alive for reuse
 _mcp_client_context = None
 _mcp_session_context = None
 _mcp_session: ClientSession | None = None
-_mcp_lock = asyncio.Lock()  # Lock to prevent concurrent MCP calls
+_mcp_lock = asyncio.Lock()  # Lock to prevent concurrent session creation
 
 
 async def close_mcp_session() -> None:
@@ -40,17 +45,46 @@ async def close_mcp_session() -> None:
     logger.info("MCP session closed")
 
 
-async def _get_mcp_session() -> ClientSession:
+async def _get_mcp_session() -> ToolSession:
     """Get or create MCP client session for Strava server.
 
+    When a cassette is in use, tool calls are recorded to it, or replayed from it
+    without starting the server.
+
     Returns:
         Active MCP client session
     """
-    global _mcp_client_context, _mcp_session_context, _mcp_session
+    cassette = get_cassette()
+    if cassette is not None and cassette.replaying:
+        return cassette.session()
+    session = await _get_live_mcp_session()
+    return session if cassette is None else cassette.session(session)
+
+
+async def _get_live_mcp_session() -> ClientSession:
+    """Get or create the MCP client session connected to the Strava server.
 
+    Returns:
+        Active MCP client session
+    """
     if _mcp_session is not None:
         return _mcp_session
 
+    # Tool calls share one session and may run concurrently; only creation is serialized
+    async with _mcp_lock:
+        if _mcp_session is not None:
+            return _mcp_session
+        return await _create_mcp_session()
+
+
+async def _create_mcp_session() -> ClientSession:
+    """Start the Strava MCP server and open a client session to it.
+
+    Returns:
+        Initialized MCP client session
+    """
+    global _mcp_client_context, _mcp_session_context, _mcp_session
+
     # Get Strava MCP server path from environment
     settings = get_settings()
     strava_mcp_path = settings.strava_mcp_path
@@ -80,6 +114,20 @@ async def _get_mcp_session() -> ClientSession:
     return _mcp_session
 
 
+async def _acquire_quota() -> None:
+    """Wait for Strava API quota before making a request.
+
+    Interactive requests give up after QUOTA_TIMEOUT; background requests wait
+    for the quota windows to reset. Calls replayed from a cassette never reach
+    Strava, so they use no quota.
+    """
+    cassette = get_cassette()
+    if cassette is not None and cassette.replaying:
+        return
+    timeout = QUOTA_TIMEOUT if current_priority() == Priority.INTERACTIVE else None
+    await get_rate_limiter().acquire(timeout=timeout)
+
+
 async def get_recent_activities(per_page: int) -> dict[str, Any]:
     """Get recent workout activities from Strava.
 
@@ -99,26 +147,26 @@ async def get_recent_activities(per_page: int) -> dict[str, Any]:
     """
     logger.info(f"Tool called: get_recent_activities(per_page={per_page})")
 
-    async with _mcp_lock:
-        try:
-            session = await _get_mcp_session()
-
-            # Call the MCP tool
-            result = await session.call_tool(
-                "get-recent-activities",
-                arguments={"perPage": per_page},
-            )
-
-            return {
-                "status": "success",
-                "data": result.content,
-            }
-        except Exception as e:
-            logger.error(f"Error fetching recent activities: {e}")
-            return {
-                "status": "error",
-                "error_message": f"Failed to retrieve recent activities: {str(e)}",
-            }
+    try:
+        await _acquire_quota()
+        session = await _get_mcp_session()
+
+        # Call the MCP tool
+        result = await session.call_tool(
+            "get-recent-activities",
+            arguments={"perPage": per_page},
+        )
+
+        return {
+            "status": "success",
+            "data": result.content,
+        }
+    except Exception as e:
+        logger.error(f"Error fetching recent activities: {e}")
+        return {
+            "status": "error",
+            "error_message": f"Failed to retrieve recent activities: {str(e)}",
+        }
 
 
 async def get_athlete_profile() -> dict[str, Any]:
@@ -129,22 +177,22 @@ async def get_athlete_profile() -> dict[str, Any]:
     """
     logger.info("Tool called: get_athlete_profile")
 
-    async with _mcp_lock:
-        try:
-            session = await _get_mcp_session()
+    try:
+        await _acquire_quota()
+        session = await _get_mcp_session()
 
-            result = await session.call_tool("get-athlete-profile", arguments={})
+        result = await session.call_tool("get-athlete-profile", arguments={})
 
-            return {
-                "status": "success",
-                "data": result.content,
-            }
-        except Exception as e:
-            logger.error(f"Error fetching athlete profile: {e}")
-            return {
-                "status": "error",
-                "error_message": f"Failed to retrieve athlete profile: {str(e)}",
-            }
+        return {
+            "status": "success",
+            "data": result.content,
+        }
+    except Exception as e:
+        logger.error(f"Error fetching athlete profile: {e}")
+        return {
+            "status": "error",
+            "error_message": f"Failed to retrieve athlete profile: {str(e)}",
+        }
 
 
 async def get_athlete_stats(athlete_id: int) -> dict[str, Any]:
@@ -165,24 +213,22 @@ async def get_athlete_stats(athlete_id: int) -> dict[str, Any]:
     """
     logger.info(f"Tool called: get_athlete_stats(athlete_id={athlete_id})")
 
-    async with _mcp_lock:
-        try:
-            session = await _get_mcp_session()
+    try:
+        await _acquire_quota()
+        session = await _get_mcp_session()
 
-            result = await session.call_tool(
-                "get-athlete-stats", arguments={"athleteId": athlete_id}
-            )
+        result = await session.call_tool("get-athlete-stats", arguments={"athleteId": athlete_id})
 
-            return {
-                "status": "success",
-                "data": result.content,
-            }
-        except Exception as e:
-            logger.error(f"Error fetching athlete stats: {e}")
-            return {
-                "status": "error",
-                "error_message": f"Failed to retrieve athlete statistics: {str(e)}",
-            }
+        return {
+            "status": "success",
+            "data": result.content,
+        }
+    except Exception as e:
+        logger.error(f"Error fetching athlete stats: {e}")
+        return {
+            "status": "error",
+            "error_message": f"Failed to retrieve athlete statistics: {str(e)}",
+        }
 
 
 async def get_activity_details(activity_id: str) -> dict[str, Any]:
@@ -204,25 +250,25 @@ async def get_activity_details(activity_id: str) -> dict[str, Any]:
     """
     logger.info(f"Tool called: get_activity_details(activity_id={activity_id})")
 
-    async with _mcp_lock:
-        try:
-            session = await _get_mcp_session()
+    try:
+        await _acquire_quota()
+        session = await _get_mcp_session()
 
-            result = await session.call_tool(
-                "get-activity-details",
-                arguments={"activityId": activity_id},
-            )
+        result = await session.call_tool(
+            "get-activity-details",
+            arguments={"activityId": activity_id},
+        )
 
-            return {
-                "status": "success",
-                "data": result.content,
-            }
-        except Exception as e:
-            logger.error(f"Error fetching activity details for {activity_id}: {e}")
-            return {
-                "status": "error",
-                "error_message": f"Failed to retrieve activity details: {str(e)}",
-            }
+        return {
+            "status": "success",
+            "data": result.content,
+        }
+    except Exception as e:
+        logger.error(f"Error fetching activity details for {activity_id}: {e}")
+        return {
+            "status": "error",
+            "error_message": f"Failed to retrieve activity details: {str(e)}",
+        }
 
 
 async def list_athlete_clubs() -> dict[str, Any]:
@@ -233,22 +279,22 @@ async def list_athlete_clubs() -> dict[str, Any]:
     """
     logger.info("Tool called: list_athlete_clubs")
 
-    async with _mcp_lock:
-        try:
-            session = await _get_mcp_session()
+    try:
+        await _acquire_quota()
+        session = await _get_mcp_session()
 
-            result = await session.call_tool("list-athlete-clubs", arguments={})
+        result = await session.call_tool("list-athlete-clubs", arguments={})
 
-            return {
-                "status": "success",
-                "data": result.content,
-            }
-        except Exception as e:
-            logger.error(f"Error fetching athlete clubs: {e}")
-            return {
-                "status": "error",
-                "error_message": f"Failed to retrieve athlete clubs: {str(e)}",
-            }
+        return {
+            "status": "success",
+            "data": result.content,
+        }
+    except Exception as e:
+        logger.error(f"Error fetching athlete clubs: {e}")
+        return {
+            "status": "error",
+            "error_message": f"Failed to retrieve athlete clubs: {str(e)}",
+        }
 
 
 async def get_segment(segment_id: str) -> dict[str, Any]:
@@ -262,22 +308,22 @@ async def get_segment(segment_id: str) -> dict[str, Any]:
     """
     logger.info(f"Tool called: get_segment(segment_id={segment_id})")
 
-    async with _mcp_lock:
-        try:
-            session = await _get_mcp_session()
-
-            result = await session.call_tool(
-                "get-segment",
-                arguments={"segmentId": segment_id},
-            )
-
-            return {
-                "status": "success",
-                "data": result.content,
-            }
-        except Exception as e:
-            logger.error(f"Error fetching segment {segment_id}: {e}")
-            return {
-                "status": "error",
-                "error_message": f"Failed to retrieve segment: {str(e)}",
-            }
+    try:
+        await _acquire_quota()
+        session = await _get_mcp_session()
+
+        result = await session.call_tool(
+            "get-segment",
+            arguments={"segmentId": segment_id},
+        )
+
+        return {
+            "status": "success",
+            "data": result.content,
+        }
+    except Exception as e:
+        logger.error(f"Error fetching segment {segment_id}: {e}")
+        return {
+            "status": "error",
+            "error_message": f"Failed to retrieve segment: {str(e)}",
+        }
@@ -1,6 +1,22 @@
 """Utility functions and helpers."""
 
 from .config import get_settings, settings
-from .formatters import format_distance, format_duration, format_pace
+from .formatters import (
+    format_distance,
+    format_distances,
+    format_duration,
+    format_durations,
+    format_pace,
+    format_paces,
+)
 
-__all__ = ["get_settings", "settings", "format_duration", "format_distance", "format_pace"]
+__all__ = [
+    "get_settings",
+    "settings",
+    "format_duration",
+    "format_distance",
+    "format_pace",
+    "format_durations",
+    "format_distances",
+    "format_paces",
+]
@@ -5,9 +5,12 @@ import argparse
 from trainer import __version__
 
 
-def parse_arguments() -> argparse.Namespace:
+def parse_arguments(argv: list[str] | None = None) -> argparse.Namespace:
     """Parse command line arguments.
 
+    Args:
+        argv: Arguments to parse (defaults to sys.argv)
+
     Returns:
         argparse.Namespace: Parsed command line arguments
     """
@@ -21,4 +24,60 @@ def parse_arguments() -> argparse.Namespace:
         version=f"%(prog)s {__version__}",
     )
 
-    return parser.parse_args()
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    webhook = subparsers.add_parser(
+        "webhook",
+        help="Receive Strava webhook events and sync changed activities",
+    )
+    webhook.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    webhook.add_argument("--port", type=int, default=8080, help="Port to listen on")
+
+    serve = subparsers.add_parser(
+        "serve",
+        help="Serve the chat API from several worker processes",
+    )
+    serve.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    serve.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    serve.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+    serve.add_argument(
+        "--state-dir",
+        default=None,
+        help="Directory for the session store, activity store and cache shared by the "
+        "workers (default: TRAINER_STATE_DIR, or .trainer)",
+    )
+    serve.add_argument(
+        "--drain-timeout",
+        type=int,
+        default=30,
+        help="Seconds workers may take to finish in-flight requests when restarting or stopping",
+    )
+
+    import_parser = subparsers.add_parser(
+        "import",
+        help="Import FIT, GPX and TCX files (or zip archives of them) recorded outside Strava",
+    )
+    import_parser.add_argument(
+        "paths", nargs="+", help="Files, directories and zip archives to import"
+    )
+    import_parser.add_argument(
+        "-o",
+        "--output",
+        help="Directory to save workouts.jsonl and per-second streams in "
+        "(without it, files are only parsed and validated, and nothing is saved)",
+    )
+    import_parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs)",
+    )
+
+    return parser.parse_args(argv)
@@ -0,0 +1,337 @@
+"""SQLite databases shared by processes on one machine, and a key-value cache in one."""
+
+import asyncio
+import contextlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from trainer.utils.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Database file in the state directory for the cache shared by every process
+CACHE_DB = "cache.db"
+
+# Seconds cache operations wait for another process's write lock. Writes are
+# single short statements, so this is only reached when something is wrong,
+# and callers on the event loop should not stall for long.
+CACHE_TIMEOUT = 5.0
+
+# Seconds between checks while waiting for another process's lease
+LEASE_POLL = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT PRIMARY KEY,
+    window_start REAL NOT NULL,
+    used INTEGER NOT NULL
+)
+"""
+
+
+def connect_database(path: str | Path, timeout: float) -> sqlite3.Connection:
+    """Open a SQLite database shared with other processes.
+
+    The connection is in autocommit mode (transactions are begun explicitly)
+    and uses write-ahead logging, so reads never wait for writes.
+
+    Args:
+        path: Database file (created if missing)
+        timeout: Seconds to wait for another process's write lock
+
+    Returns:
+        The connection
+    """
+    connection = sqlite3.connect(
+        path, timeout=timeout, isolation_level=None, check_same_thread=False
+    )
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def enable_wal(path: str | Path, timeout: float = 30.0) -> None:
+    """Switch a SQLite database to write-ahead logging, creating it if needed.
+
+    The journal mode is stored in the database file, so doing this once before
+    starting worker processes lets them read while another one writes.
+
+    Args:
+        path: Database file
+        timeout: Seconds to wait for another process's lock
+    """
+    with contextlib.closing(sqlite3.connect(path, timeout=timeout)) as connection:
+        connection.execute("PRAGMA journal_mode=WAL")
+
+
+@dataclass(frozen=True)
+class CachedValue:
+    """A value read from the cache."""
+
+    value: str
+    stored_at: float  # Unix timestamp
+
+    @property
+    def age(self) -> float:
+        """Seconds since the value was stored."""
+        return max(0.0, time.time() - self.stored_at)
+
+
+class SQLiteCache:
+    """String values with expiry times, in a SQLite database file.
+
+    Every process opens its own connection on first use (connections are not
+    carried across process creation), and the database uses write-ahead
+    logging so reads never wait for writes.
+
+    Methods block on SQLite, so coroutines call them through
+    ``asyncio.to_thread``. Leases (``acquire`` and ``release``) let one process
+    at a time do some work; see ``lease``. Counters (``consume``) count uses
+    of a quota in fixed windows across processes.
+    """
+
+    def __init__(self, path: str | Path, timeout: float = CACHE_TIMEOUT):
+        """Initialize the cache.
+
+        Args:
+            path: Database file (created if missing)
+            timeout: Seconds to wait for another process's write lock
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self._connection: sqlite3.Connection | None = None
+        self._pid: int | None = None
+        self._transaction = threading.Lock()  # Threads share the connection
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = connect_database(self.path, self.timeout)
+            self._connection.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def get(self, key: str) -> CachedValue | None:
+        """Return a value, unless it is missing or expired.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The value and when it was stored, or None
+        """
+        row = (
+            self._connect()
+            .execute(
+                "SELECT value, stored_at FROM cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return CachedValue(row[0], row[1]) if row is not None else None
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        """Store a value, replacing any previous one.
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Seconds until the value expires
+        """
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cache (key, value, stored_at, expires_at) VALUES (?, ?, ?, ?)",
+            (key, value, now, now + ttl),
+        )
+
+    def delete(self, key: str, stored_before: float | None = None) -> None:
+        """Remove a value, if present.
+
+        Args:
+            key: Cache key
+            stored_before: Only remove the value if it was stored before this Unix
+                timestamp, keeping one that is already newer
+        """
+        if stored_before is None:
+            self._connect().execute("DELETE FROM cache WHERE key = ?", (key,))
+        else:
+            self._connect().execute(
+                "DELETE FROM cache WHERE key = ? AND stored_at < ?", (key, stored_before)
+            )
+
+    def acquire(self, key: str, ttl: float) -> str | None:
+        """Take the lease on a key, unless another holder's lease has not expired.
+
+        Args:
+            key: Lease key
+            ttl: Seconds until the lease expires if it is not released, so a
+                holder that dies does not keep it
+
+        Returns:
+            Token identifying this holder (for ``release``), or None if the
+            lease is held by someone else
+        """
+        owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+        now = time.time()
+        # One statement, so two processes can never both take the lease
+        cursor = self._connect().execute(
+            "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, "
+            "expires_at = excluded.expires_at WHERE leases.expires_at <= ?",
+            (key, owner, now + ttl, now),
+        )
+        return owner if cursor.rowcount else None
+
+    def release(self, key: str, owner: str) -> None:
+        """Release a lease, if it is still held by the same holder.
+
+        Args:
+            key: Lease key
+            owner: Token returned by ``acquire``
+        """
+        self._connect().execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def consume(self, counters: Sequence[tuple[str, float, int]]) -> tuple[bool, list[int]]:
+        """Count one use on every counter, if each is below its limit.
+
+        Each counter counts uses in a window; a counter whose stored window
+        start differs from the given one starts again from zero. Either every
+        counter is incremented or none is.
+
+        Args:
+            counters: Key, current window start and limit of each counter
+
+        Returns:
+            Whether the use was counted, and each counter's uses in its window
+            (including this one)
+        """
+        with self._transaction:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                used = []
+                for key, window_start, _ in counters:
+                    row = connection.execute(
+                        "SELECT used FROM counters WHERE key = ? AND window_start = ?",
+                        (key, window_start),
+                    ).fetchone()
+                    used.append(row[0] if row is not None else 0)
+                counted = all(uses < limit for uses, (_, _, limit) in zip(used, counters))
+                if counted:
+                    connection.executemany(
+                        "INSERT INTO counters (key, window_start, used) VALUES (?, ?, ?) "
+                        "ON CONFLICT (key) DO UPDATE SET "
+                        "window_start = excluded.window_start, used = excluded.used",
+                        [
+                            (key, window_start, uses + 1)
+                            for uses, (key, window_start, _) in zip(used, counters)
+                        ],
+                    )
+                    used = [uses + 1 for uses in used]
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return counted, used
+
+    def purge(self) -> int:
+        """Remove expired values and leases.
+
+        Returns:
+            Number of values removed
+        """
+        now = time.time()
+        connection = self._connect()
+        cursor = connection.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        connection.execute("DELETE FROM leases WHERE expires_at <= ?", (now,))
+        if cursor.rowcount:
+            logger.debug(f"Purged {cursor.rowcount} expired cache entries from {self.path}")
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Close this process's connection."""
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection = None
+
+
+@contextlib.asynccontextmanager
+async def lease(
+    cache: SQLiteCache | None,
+    key: str,
+    ttl: float,
+    done: Callable[[], Awaitable[bool]] | None = None,
+) -> AsyncIterator[bool]:
+    """Do some work in one process at a time, unless another process already did it.
+
+    Waits for the lease on ``key``, checking ``done`` while another process
+    holds it and again once it is acquired. The lease is released on exit, or
+    expires after ``ttl`` seconds if this process dies first. Without a cache,
+    or if the database cannot be used, the work is done without a lease.
+
+    Args:
+        cache: Cache holding the lease, shared with the other processes
+        key: Lease key
+        ttl: Seconds the work may take before another process may start it
+        done: Returns whether the work has been done (by the lease's previous holder)
+
+    Yields:
+        True if the caller should do the work, False if ``done`` reported it done
+    """
+    owner: str | None = None
+    run = True
+    if cache is not None:
+        try:
+            while True:
+                owner = await asyncio.to_thread(cache.acquire, key, ttl)
+                if owner is not None or (done is not None and await done()):
+                    break
+                await asyncio.sleep(LEASE_POLL)
+            # Re-check once acquired, in case the previous holder finished meanwhile
+            run = owner is not None and (done is None or not await done())
+        except sqlite3.Error as e:
+            logger.warning(f"Could not take lease {key}: {e}")
+    try:
+        yield run
+    finally:
+        if owner is not None and cache is not None:
+            try:
+                await asyncio.to_thread(cache.release, key, owner)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not release lease {key}: {e}")
+
+
+# Global shared cache instance - created lazily
+_shared_cache: SQLiteCache | None = None
+
+
+def get_shared_cache() -> SQLiteCache:
+    """Get or create the cache shared by every process using the state directory.
+
+    Returns:
+        Cache in the state directory's cache database
+    """
+    global _shared_cache
+
+    if _shared_cache is None:
+        state_dir = Path(get_settings().state_dir)
+        state_dir.mkdir(parents=True, exist_ok=True)
+        _shared_cache = SQLiteCache(state_dir / CACHE_DB)
+    return _shared_cache
@@ -17,6 +17,21 @@ class Settings:
     gemini_api_key: str | None = None
     strava_mcp_path: str | None = None
     log_level: str = "INFO"
+    # Strava API read quotas (requests per 15 minutes and per day)
+    strava_rate_limit_15min: int = 100
+    strava_rate_limit_daily: int = 1000
+    # Token echoed back by Strava when validating a webhook subscription
+    strava_webhook_verify_token: str | None = None
+    # Directory for state shared between processes (synced activities, caches)
+    state_dir: str = ".trainer"
+    # Fair-share LLM scheduling across users (0 tokens per minute disables budgets)
+    llm_max_in_flight: int = 8
+    llm_max_in_flight_per_user: int = 2
+    llm_user_tokens_per_minute: int = 200_000
+    # Record or replay MCP and LLM traffic to a cassette file (unset for live traffic)
+    cassette_path: str | None = None
+    cassette_mode: str = "replay"
+    cassette_realtime: bool = False
 
 
 # Global settings instance - created lazily
@@ -54,6 +69,17 @@ def get_settings(load_dotenv_file: bool = False) -> Settings:
             gemini_api_key=os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"),
             strava_mcp_path=os.getenv("STRAVA_MCP_PATH"),
             log_level=os.getenv("LOG_LEVEL", "WARNING"),
+            strava_rate_limit_15min=int(os.getenv("STRAVA_RATE_LIMIT_15MIN", "100")),
+            strava_rate_limit_daily=int(os.getenv("STRAVA_RATE_LIMIT_DAILY", "1000")),
+            strava_webhook_verify_token=os.getenv("STRAVA_WEBHOOK_VERIFY_TOKEN"),
+            state_dir=os.getenv("TRAINER_STATE_DIR", ".trainer"),
+            llm_max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", "8")),
+            llm_max_in_flight_per_user=int(os.getenv("LLM_MAX_IN_FLIGHT_PER_USER", "2")),
+            llm_user_tokens_per_minute=int(os.getenv("LLM_USER_TOKENS_PER_MINUTE", "200000")),
+            cassette_path=os.getenv("TRAINER_CASSETTE"),
+            cassette_mode=os.getenv("TRAINER_CASSETTE_MODE", "replay"),
+            cassette_realtime=os.getenv("TRAINER_CASSETTE_REALTIME", "").lower()
+            in ("1", "true", "yes"),
         )
 
     return _settings
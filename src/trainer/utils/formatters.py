@@ -1,5 +1,9 @@
 """Formatting utilities for fitness data."""
 
+import numpy as np
+import numpy.typing as npt
+from numpy.dtypes import StringDType
+
 
 def format_duration(seconds: int) -> str:
     """Format duration in seconds to human-readable string.
@@ -62,3 +66,108 @@ def format_pace(meters: float, seconds: int, unit: str = "km") -> str:
     pace_secs = int(pace_seconds % 60)
 
     return f"{pace_minutes}:{pace_secs:02d} /{unit}"
+
+
+# Array variants for formatting whole columns at once. Strings are assembled as
+# fixed-width ASCII bytes from lookup tables generated by the scalar functions,
+# then converted to StringDType, so every element matches the scalar output.
+
+_STR = StringDType()
+_UNPADDED_1000 = np.array([str(i) for i in range(1000)], dtype="S3")
+_PADDED_1000 = np.array([f"{i:03d}" for i in range(1000)], dtype="S3")
+_KM_SUFFIX = np.array([f".{i:02d} km" for i in range(100)], dtype="S")
+# format_duration of every sub-hour remainder, alone and following an hours part
+_SUB_HOUR = np.array([format_duration(i) for i in range(3600)], dtype="S")
+_SUB_HOUR_SUFFIX = np.array(["h"] + [f"h {format_duration(i)}" for i in range(1, 3600)], dtype="S")
+# Values beyond this are formatted with the scalar functions to avoid overflow
+_MAX_VECTORIZED = 1e15
+
+
+def _ascii_integers(values: np.ndarray) -> np.ndarray:
+    """Render non-negative integers as ASCII bytes, three digits at a time."""
+    low = values % 1000
+    digits = np.take(_UNPADDED_1000, low)
+    large = values >= 1000
+    if not large.any():
+        return digits
+    higher = np.strings.add(_ascii_integers(values // 1000), _PADDED_1000[low])
+    return np.where(large, higher, digits)
+
+
+def format_durations(seconds: npt.ArrayLike) -> np.ndarray:
+    """Format an array of durations in seconds.
+
+    Args:
+        seconds: Durations in whole seconds
+
+    Returns:
+        Array of formatted strings, element-wise identical to format_duration
+    """
+    hours, remainder = np.divmod(np.asarray(seconds, dtype=np.int64), 3600)
+    with_hours = np.strings.add(_ascii_integers(np.maximum(hours, 0)), _SUB_HOUR_SUFFIX[remainder])
+    return np.where(hours > 0, with_hours, _SUB_HOUR[remainder]).astype(_STR)
+
+
+def format_distances(meters: npt.ArrayLike) -> np.ndarray:
+    """Format an array of distances in meters.
+
+    Args:
+        meters: Distances in meters
+
+    Returns:
+        Array of formatted strings, element-wise identical to format_distance
+    """
+    meters = np.asarray(meters, dtype=np.float64)
+    in_range = np.abs(meters) < _MAX_VECTORIZED
+    is_km = meters >= 1000
+
+    hundredths_exact = np.where(in_range & is_km, meters, 0) / 1000 * 100
+    hundredths = np.rint(hundredths_exact).astype(np.int64)
+    whole_meters = np.where(in_range & ~is_km, meters, 0).astype(np.int64)
+
+    km = np.strings.add(_ascii_integers(hundredths // 100), _KM_SUFFIX[hundredths % 100])
+    short = np.strings.add(_ascii_integers(np.maximum(whole_meters, 0)), b" m")
+    result = np.where(is_km, km, short).astype(_STR)
+
+    # Scaling to hundredths of a km can be off by an ulp, which only changes the
+    # rounding of values right on a .005 boundary. Those, negative and
+    # out-of-range values are formatted by the scalar function instead.
+    fraction = hundredths_exact - np.floor(hundredths_exact)
+    fallback = ~in_range | (whole_meters < 0) | (is_km & (np.abs(fraction - 0.5) < 1e-6))
+    for index in np.flatnonzero(fallback):
+        result.flat[index] = format_distance(meters.flat[index].item())
+    return result
+
+
+def format_paces(meters: npt.ArrayLike, seconds: npt.ArrayLike, unit: str = "km") -> np.ndarray:
+    """Format paces for arrays of distances and durations.
+
+    Args:
+        meters: Distances in meters
+        seconds: Durations in seconds
+        unit: Unit for pace ("km" or "mi")
+
+    Returns:
+        Array of formatted strings, element-wise identical to format_pace
+    """
+    meters, seconds = np.broadcast_arrays(
+        np.asarray(meters, dtype=np.float64), np.asarray(seconds, dtype=np.float64)
+    )
+    distance_in_unit = meters / 1000 if unit == "km" else meters / 1609.34
+    pace_seconds = np.divide(
+        seconds, distance_in_unit, out=np.zeros_like(seconds), where=distance_in_unit > 0
+    )
+    in_range = (pace_seconds >= 0) & (pace_seconds < _MAX_VECTORIZED)
+    pace_seconds = np.where(in_range, pace_seconds, 0)
+
+    pace_minutes = (pace_seconds // 60).astype(np.int64)
+    pace_secs = (pace_seconds % 60).astype(np.int64)
+    seconds_suffix = np.array([f":{i:02d} /{unit}" for i in range(60)], dtype="S")
+    pace = np.strings.add(_ascii_integers(pace_minutes), seconds_suffix[pace_secs])
+    result = np.where(meters == 0, b"N/A", pace).astype(_STR)
+
+    for index in np.flatnonzero(~in_range & (meters != 0)):
+        result.flat[index] = format_pace(
+            meters.flat[index].item(), seconds.flat[index].item(), unit
+        )
+    return result
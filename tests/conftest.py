@@ -6,11 +6,12 @@ import pytest
 
 
 @pytest.fixture(autouse=True)
-def mock_env_vars(monkeypatch):
+def mock_env_vars(monkeypatch, tmp_path):
     """Mock environment variables for all tests."""
     monkeypatch.setenv("GEMINI_API_KEY", "test-api-key-12345")
     monkeypatch.setenv("STRAVA_MCP_PATH", "/tmp/fake/strava-mcp/dist/server.js")
     monkeypatch.setenv("LOG_LEVEL", "DEBUG")
+    monkeypatch.setenv("TRAINER_STATE_DIR", str(tmp_path / "state"))
 
     # Reset settings to pick up test env vars
     import trainer.utils.config
@@ -19,6 +20,34 @@ def mock_env_vars(monkeypatch):
     trainer.utils.config.settings = trainer.utils.config.get_settings()
 
 
+@pytest.fixture(autouse=True)
+def reset_activity_store(monkeypatch):
+    """Give each test its own process-wide activity store, in its own state directory."""
+    import trainer.sync.backfill
+    import trainer.sync.store
+
+    monkeypatch.setattr(trainer.sync.store, "_activity_store", None)
+    monkeypatch.setattr(trainer.sync.backfill, "_activity_backfill", None)
+
+
+@pytest.fixture(autouse=True)
+def reset_shared_cache(monkeypatch):
+    """Give each test its own process-wide shared cache (and quota counted in it)."""
+    import trainer.tools.rate_limit
+    import trainer.utils.cache
+
+    monkeypatch.setattr(trainer.utils.cache, "_shared_cache", None)
+    monkeypatch.setattr(trainer.tools.rate_limit, "_rate_limiter", None)
+
+
+@pytest.fixture(autouse=True)
+def reset_snapshot_cache(monkeypatch):
+    """Give each test its own process-wide athlete snapshot cache."""
+    import trainer.agents.snapshot
+
+    monkeypatch.setattr(trainer.agents.snapshot, "_snapshot_cache", None)
+
+
 @pytest.fixture
 def mock_genai_client():
     """Mock Google GenAI client."""
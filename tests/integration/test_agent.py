@@ -1,10 +1,17 @@
 """Integration tests for trainer agent."""
 
-from unittest.mock import patch
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 
 import pytest
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.models.registry import LLMRegistry
+from google.genai import types
+from mcp.types import CallToolResult, TextContent
 
+from trainer.agents.router import Route
 from trainer.agents.trainer_agent import TrainerAgent
+from trainer.tools import Cassette, CassetteMode, cassette, strava_mcp
 
 
 @pytest.mark.asyncio
@@ -24,3 +31,97 @@ async def test_analyze_workout_integration():
     await agent.initialize()
     # analysis = await agent.analyze_workout("12345")
     # assert "summary" in analysis
+
+
+@pytest.mark.asyncio
+async def test_analyze_workout_prefetches_details(mock_genai_client):
+    """Test that activity details are fetched up front and included in the prompt."""
+    details = {"status": "success", "data": [SimpleNamespace(text='{"id": 12345}')]}
+
+    with (
+        patch("trainer.agents.trainer_agent.get_activity_details", AsyncMock(return_value=details)),
+        patch(
+            "trainer.agents.trainer_agent.fetch_athlete_snapshot", AsyncMock(side_effect=OSError)
+        ) as fetch,
+    ):
+        agent = TrainerAgent()
+        agent.process_message = AsyncMock(return_value="Solid aerobic run")
+        result = await agent.analyze_workout("12345")
+
+    assert result["analysis"] == "Solid aerobic run"
+    fetch.assert_awaited_once()
+    prompt = agent.process_message.await_args.args[0]
+    assert 'Activity details (already fetched from Strava):\n{"id": 12345}' in prompt
+
+
+@pytest.mark.asyncio
+async def test_process_message_routes_by_request(mock_genai_client):
+    """Test that lookups and planning requests run on different models."""
+
+    def fake_runner(reply):
+        async def run_async(**kwargs):
+            part = SimpleNamespace(text=reply)
+            yield SimpleNamespace(content=SimpleNamespace(parts=[part]))
+
+        return SimpleNamespace(run_async=run_async)
+
+    with patch(
+        "trainer.agents.trainer_agent.fetch_athlete_snapshot", AsyncMock(side_effect=OSError)
+    ):
+        agent = TrainerAgent(model_name="fast-model", heavy_model_name="heavy-model")
+        assert agent.runners[Route.HEAVY].agent.model.model == "heavy-model"
+        agent.runners = {Route.FAST: fake_runner("fast"), Route.HEAVY: fake_runner("heavy")}
+
+        assert await agent.process_message("How far did I run yesterday?") == "fast"
+        assert await agent.process_message("Build me a 16-week marathon plan") == "heavy"
+        assert await agent.process_message("hi", route=Route.HEAVY) == "heavy"
+
+    assert agent.router.metrics()["heavy_requests"] == 2
+    assert agent.router.metrics()["fast_requests"] == 1
+
+
+class ToolCallingLlm(BaseLlm):
+    """Model stand-in that looks up recent activities, then answers."""
+
+    async def generate_content_async(self, llm_request, stream=False):
+        last = llm_request.contents[-1].parts[0]
+        if last.function_response:
+            part = types.Part(text=f"Latest: {last.function_response.response['data']}")
+        else:
+            call = types.FunctionCall(name="get_recent_activities", args={"per_page": 5})
+            part = types.Part(function_call=call)
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+@pytest.mark.asyncio
+async def test_process_message_replays_recorded_conversation(
+    mock_genai_client, monkeypatch, tmp_path
+):
+    """Test that a recorded conversation replays offline with the same answer."""
+    path = tmp_path / "conversation.jsonl"
+    session = AsyncMock()
+    session.call_tool.return_value = CallToolResult(
+        content=[TextContent(type="text", text="5 km run")]
+    )
+    monkeypatch.setattr(strava_mcp, "_mcp_session", session)
+    monkeypatch.setattr(LLMRegistry, "new_llm", lambda model: ToolCallingLlm(model=model))
+
+    with patch(
+        "trainer.agents.trainer_agent.fetch_athlete_snapshot", AsyncMock(side_effect=OSError)
+    ):
+        monkeypatch.setattr(cassette, "_cassette", Cassette(path, mode=CassetteMode.RECORD))
+        agent = TrainerAgent(model_name="fake-model", heavy_model_name=None)
+        recorded = await agent.process_message("What was my last run?")
+        assert "5 km run" in recorded
+
+        # No live model or MCP session is available on replay
+        monkeypatch.setattr(strava_mcp, "_mcp_session", None)
+        monkeypatch.setattr(strava_mcp, "_create_mcp_session", AsyncMock(side_effect=OSError))
+        monkeypatch.setattr(LLMRegistry, "new_llm", AsyncMock(side_effect=OSError))
+        replay = Cassette(path)
+        monkeypatch.setattr(cassette, "_cassette", replay)
+        agent = TrainerAgent(model_name="fake-model", heavy_model_name=None)
+        assert await agent.process_message("What was my last run?") == recorded
+
+    assert session.call_tool.await_count == 1
+    assert replay.metrics() == {"interactions": 3, "hits": 3, "misses": 0}
@@ -0,0 +1,101 @@
+"""Tests for recording and replaying MCP and LLM traffic."""
+
+import asyncio
+import time
+
+import pytest
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from mcp.types import CallToolResult, TextContent
+
+from trainer.tools import Cassette, CassetteMissError, CassetteMode
+from trainer.tools.cassette import ReplayedError
+
+
+class FakeSession:
+    """MCP session stand-in with a fixed latency."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def call_tool(self, name, arguments=None):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if name == "broken":
+            raise RuntimeError("Strava is down")
+        text = f"{name} {arguments} #{self.calls}"
+        return CallToolResult(content=[TextContent(type="text", text=text)])
+
+
+class FakeLlm(BaseLlm):
+    """Model stand-in that streams two chunks."""
+
+    async def generate_content_async(self, llm_request, stream=False):
+        for text in ("Hello", " there"):
+            await asyncio.sleep(0.01)
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def user_request(text: str, call_id: str, activity_id: int = 1) -> LlmRequest:
+    call = types.FunctionCall(id=call_id, name="get_activity_details", args={"id": activity_id})
+    result = types.FunctionResponse(
+        id=call_id, name="get_activity_details", response={"data": {"id": activity_id}}
+    )
+    return LlmRequest(
+        contents=[
+            types.Content(role="model", parts=[types.Part(function_call=call)]),
+            types.Content(role="user", parts=[types.Part(function_response=result)]),
+            types.Content(role="user", parts=[types.Part(text=text)]),
+        ]
+    )
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_replay_in_order_and_in_real_time(tmp_path):
+    """Test that repeated calls replay in order, with their recorded latency if asked."""
+    path = tmp_path / "tools.jsonl"
+    session = Cassette(path, mode=CassetteMode.RECORD).session(FakeSession())
+    first = await session.call_tool("get-athlete-stats", {"athleteId": 1})
+    second = await session.call_tool("get-athlete-stats", {"athleteId": 1})
+    with pytest.raises(RuntimeError):
+        await session.call_tool("broken")
+
+    cassette = Cassette(path, realtime=True)
+    replay = cassette.session()
+    started = time.perf_counter()
+    assert await replay.call_tool("get-athlete-stats", {"athleteId": 1}) == first
+    assert time.perf_counter() - started >= 0.04
+    assert await replay.call_tool("get-athlete-stats", {"athleteId": 1}) == second
+    with pytest.raises(ReplayedError, match="Strava is down"):
+        await replay.call_tool("broken")
+    with pytest.raises(CassetteMissError, match="get-athlete-stats"):
+        await replay.call_tool("get-athlete-stats", {"athleteId": 2})
+    assert cassette.metrics() == {"interactions": 3, "hits": 3, "misses": 1}
+
+    repeating = Cassette(path, allow_repeats=True).session()
+    for _ in range(3):
+        assert await repeating.call_tool("get-athlete-stats", {"athleteId": 1}) in (first, second)
+
+
+@pytest.mark.asyncio
+async def test_model_exchanges_replay_ignoring_generated_ids(tmp_path):
+    """Test replaying streamed model responses for a conversation with new call ids."""
+    path = tmp_path / "llm.jsonl"
+    model = Cassette(path, mode=CassetteMode.RECORD).model(FakeLlm(model="fake-model"))
+    recorded = [
+        response async for response in model.generate_content_async(user_request("hi", "adk-1"))
+    ]
+
+    replay = Cassette(path).model("fake-model")
+    assert replay.inner is None
+    replayed = [
+        response async for response in replay.generate_content_async(user_request("hi", "adk-2"))
+    ]
+    assert replayed == recorded
+    assert "".join(response.content.parts[0].text for response in replayed) == "Hello there"
+    with pytest.raises(CassetteMissError):
+        await anext(replay.generate_content_async(user_request("bye", "adk-3")))
+    # Ids in the tool arguments and results are part of the conversation
+    replay = Cassette(path).model("fake-model")
+    with pytest.raises(CassetteMissError):
+        await anext(replay.generate_content_async(user_request("hi", "adk-4", activity_id=2)))
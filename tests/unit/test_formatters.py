@@ -1,6 +1,15 @@
 """Tests for formatting utilities."""
 
-from trainer.utils.formatters import format_distance, format_duration, format_pace
+import numpy as np
+
+from trainer.utils.formatters import (
+    format_distance,
+    format_distances,
+    format_duration,
+    format_durations,
+    format_pace,
+    format_paces,
+)
 
 
 def test_format_duration():
@@ -26,3 +35,32 @@ def test_format_pace():
     assert format_pace(10000, 3000, "km") == "5:00 /km"
     # Handle zero distance
     assert format_pace(0, 1000, "km") == "N/A"
+
+
+def test_format_durations_matches_scalar():
+    """Test that the array variant matches format_duration element-wise."""
+    seconds = np.concatenate([np.arange(-5, 4000), [7200, 86399, 360000, 10**9]])
+    assert format_durations(seconds).tolist() == [format_duration(int(s)) for s in seconds]
+
+
+def test_format_distances_matches_scalar():
+    """Test that the array variant matches format_distance element-wise."""
+    rng = np.random.default_rng(0)
+    meters = np.concatenate(
+        [
+            rng.uniform(0, 100_000, 10_000),
+            np.round(rng.uniform(0, 100_000, 10_000), 1),
+            [-12.5, 0.0, 999.4, 999.995, 999.999, 1000.0, 1004.999, 1005.0, 1234.565, np.inf],
+        ]
+    )
+    assert format_distances(meters).tolist() == [format_distance(m) for m in meters.tolist()]
+
+
+def test_format_paces_matches_scalar():
+    """Test that the array variant matches format_pace element-wise."""
+    rng = np.random.default_rng(1)
+    meters = np.concatenate([rng.uniform(0, 50_000, 5_000), [0.0, 0.0, -100.0, 5000.0]])
+    seconds = np.concatenate([rng.integers(0, 20_000, 5_000), [0, 1000, 600, -60]])
+    for unit in ("km", "mi"):
+        expected = [format_pace(m, s, unit) for m, s in zip(meters.tolist(), seconds.tolist())]
+        assert format_paces(meters, seconds, unit).tolist() == expected
@@ -0,0 +1,301 @@
+"""Tests for importing FIT, GPX and TCX activity files."""
+
+import gzip
+import io
+import json
+import math
+import multiprocessing
+import os
+import struct
+import zipfile
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from trainer.importers import (
+    ImportSource,
+    import_file,
+    import_files,
+    iter_sources,
+    parse_fit,
+    parse_tcx,
+    pipeline,
+    run_import,
+)
+from trainer.importers.fit import FIT_EPOCH
+from trainer.importers.gpx import _iter_elements, parse_gpx
+from trainer.models import Workout, WorkoutStreams
+from trainer.routes import decode_polyline
+
+START = datetime(2024, 3, 2, 7, 30, tzinfo=timezone.utc)  # noqa: UP017
+FIT_START = int(START.timestamp()) - FIT_EPOCH
+DEGREES_TO_SEMICIRCLES = 2**31 / 180
+
+
+def fit_definition(local: int, global_number: int, fields, developer=()) -> bytes:
+    """Encode a little-endian definition message."""
+    header = 0x40 | local | (0x20 if developer else 0)
+    data = struct.pack("<BBBHB", header, 0, 0, global_number, len(fields))
+    data += b"".join(struct.pack("BBB", *field) for field in fields)
+    if developer:
+        data += bytes([len(developer)])
+        data += b"".join(struct.pack("BBB", number, size, 0) for number, size in developer)
+    return data
+
+
+def make_fit() -> bytes:
+    """Encode a short run: 3 full records, 2 with compressed timestamps and a session."""
+    record_fields = [
+        (253, 4, 0x86),  # timestamp
+        (0, 4, 0x85),  # position_lat
+        (1, 4, 0x85),  # position_long
+        (78, 4, 0x86),  # enhanced_altitude
+        (13, 1, 0x01),  # temperature (not decoded)
+        (3, 1, 0x02),  # heart_rate
+        (5, 4, 0x86),  # distance
+    ]
+    messages = fit_definition(0, 20, record_fields, developer=[(0, 2)])
+    for second in range(3):
+        messages += bytes([0]) + struct.pack(
+            "<IiiIbBI",
+            FIT_START + second,
+            round(51.5 * DEGREES_TO_SEMICIRCLES),
+            round((-0.1 + second * 0.0001) * DEGREES_TO_SEMICIRCLES),
+            (10 + second + 500) * 5,
+            20,
+            0xFF if second == 1 else 140 + second,  # Invalid heart rate in the middle
+            second * 300,
+        )
+        messages += b"\x00\x00"  # Developer field
+    # Records without a timestamp field, sent with compressed timestamp headers
+    messages += fit_definition(1, 20, [(3, 1, 0x02), (5, 4, 0x86)])
+    for second in (3, 4):
+        offset = (FIT_START + second) & 0x1F
+        messages += bytes([0x80 | (1 << 5) | offset]) + struct.pack("<BI", 150, second * 300)
+
+    session_fields = [(2, 4, 0x86), (5, 1, 0x00), (8, 4, 0x86), (9, 4, 0x86), (22, 2, 0x84)]
+    messages += fit_definition(2, 18, session_fields)
+    messages += bytes([2]) + struct.pack("<IBIIH", FIT_START, 1, 4000, 1200, 7)
+
+    header = struct.pack("<BBHI4s", 14, 0x20, 2132, len(messages), b".FIT") + b"\x00\x00"
+    return header + messages + b"\x00\x00"
+
+
+GPX = """<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1"
+     xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">
+  <trk>
+    <name>Lunch Ride</name>
+    <type>cycling</type>
+    <trkseg>
+      <trkpt lat="51.5000" lon="-0.1000"><ele>10</ele><time>2024-03-02T07:30:00Z</time>
+        <extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>120</gpxtpx:hr>
+        </gpxtpx:TrackPointExtension></extensions></trkpt>
+      <trkpt lat="51.5000" lon="-0.0990"><ele>12</ele><time>2024-03-02T07:30:10Z</time></trkpt>
+      <trkpt lat="51.5000" lon="-0.0980"><ele>11</ele><time>2024-03-02T07:30:20Z</time>
+        <extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>130</gpxtpx:hr>
+        </gpxtpx:TrackPointExtension></extensions></trkpt>
+      <trkpt lat="51.5000" lon="-0.0970"><ele>15</ele><time>2024-03-02T07:32:00Z</time></trkpt>
+    </trkseg>
+  </trk>
+</gpx>
+"""
+
+TCX = """<?xml version="1.0" encoding="UTF-8"?>
+<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">
+  <Activities>
+    <Activity Sport="Running">
+      <Id>2024-03-02T07:30:00Z</Id>
+      <Lap StartTime="2024-03-02T07:30:00Z">
+        <TotalTimeSeconds>4.0</TotalTimeSeconds>
+        <DistanceMeters>12.0</DistanceMeters>
+        <Calories>1</Calories>
+        <MaximumHeartRateBpm><Value>150</Value></MaximumHeartRateBpm>
+        <Track>
+          <Trackpoint><Time>2024-03-02T07:30:00Z</Time><DistanceMeters>0</DistanceMeters>
+            <HeartRateBpm><Value>140</Value></HeartRateBpm></Trackpoint>
+          <Trackpoint><Time>2024-03-02T07:30:04Z</Time><DistanceMeters>12</DistanceMeters>
+            <HeartRateBpm><Value>150</Value></HeartRateBpm></Trackpoint>
+        </Track>
+      </Lap>
+    </Activity>
+  </Activities>
+</TrainingCenterDatabase>
+"""
+
+
+def test_parse_fit():
+    """Test decoding records, compressed timestamps and the session summary."""
+    track = parse_fit(io.BytesIO(make_fit()))
+
+    assert track.sport == "Run"
+    assert track.start_time == START.timestamp()
+    assert track.timestamps == [START.timestamp() + second for second in range(5)]
+    assert track.duration == 4.0
+    assert track.distance == 12.0
+    assert track.elevation_gain == 7
+
+    latitude, _, altitude, distance, heartrate, *_ = zip(*track.samples, strict=True)
+    assert latitude[0] == latitude[2] and abs(latitude[0] - 51.5) < 1e-6
+    assert math.isnan(latitude[3])
+    assert altitude[:3] == (10, 11, 12)
+    assert math.isnan(heartrate[1])
+    assert heartrate[3:] == (150, 150)
+    assert distance == (0, 3, 6, 9, 12)
+
+
+def test_build_workout_from_gpx(tmp_path):
+    """Test deriving summary values and per-second streams from a GPX track."""
+    (tmp_path / "ride.gpx").write_text(GPX)
+    result = import_file(ImportSource(str(tmp_path / "ride.gpx")))
+    workout, streams = result.workout, result.streams
+
+    assert workout.name == "Lunch Ride"
+    assert workout.type == "Ride"
+    assert workout.start_date == START
+    assert 200 < workout.distance < 220  # 3 x 0.001 degrees of longitude at 51.5N
+    assert workout.duration == 20  # The 100s gap at the end is a pause
+    assert workout.elevation_gain == 6
+    assert workout.average_heartrate == 125
+    assert workout.max_heartrate == 130
+    route = decode_polyline(workout.polyline)
+    assert np.allclose(route, [[51.5, -0.1], [51.5, -0.099], [51.5, -0.098], [51.5, -0.097]])
+
+    assert len(streams) == 121
+    assert streams["altitude"][5] == 11
+    assert np.isnan(streams["altitude"][60])  # Not interpolated across the pause
+    assert streams["altitude"][120] == 15
+    assert "power" not in streams
+
+
+def test_track_points_are_removed_from_the_tree():
+    """Test that parsed track points do not accumulate in the partially parsed tree."""
+    elements = list(_iter_elements(io.BytesIO(GPX.encode()), frozenset({"trkpt"})))
+    assert [tag for tag, _ in elements].count("trkpt") == 4
+    root = elements[-1][1]
+    assert not [element for element in root.iter() if element.tag.endswith("}trkpt")]
+    assert root.find(".//{*}trkseg") is not None
+
+
+def test_tcx_uses_lap_totals():
+    """Test that TCX lap totals take precedence over derived values."""
+    track = parse_tcx(io.BytesIO(TCX.encode()))
+    assert track.sport == "Run"
+    assert (track.duration, track.distance, track.calories, track.max_heartrate) == (
+        4.0,
+        12.0,
+        1.0,
+        150.0,
+    )
+    assert len(track.timestamps) == 2
+
+
+def test_import_files_from_directories_and_archives(tmp_path):
+    """Test importing plain, gzipped and zipped files, with one corrupt file."""
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "run.fit").write_bytes(make_fit())
+    (tmp_path / "nested" / "ride.gpx.gz").write_bytes(gzip.compress(GPX.encode()))
+    (tmp_path / "notes.txt").write_text("not an activity")
+    (tmp_path / "broken.fit").write_bytes(b"\x0e\x10garbage")
+    with zipfile.ZipFile(tmp_path / "export.zip", "w") as archive:
+        archive.writestr("activities/1.tcx", TCX)
+        archive.writestr("activities/2.fit.gz", gzip.compress(make_fit()))
+
+    sources = sorted(str(source) for source in iter_sources([tmp_path]))
+    assert len(sources) == 5
+    assert f"{tmp_path / 'export.zip'}:activities/2.fit.gz" in sources
+
+    results = list(import_files([tmp_path], workers=1))
+    failed = [result for result in results if result.error]
+    assert len(results) == 5
+    assert [str(result.source) for result in failed] == [str(tmp_path / "broken.fit")]
+
+
+def test_archive_members_share_one_open_archive(tmp_path):
+    """Test members of a zip archive are read without reopening the archive."""
+    with zipfile.ZipFile(tmp_path / "export.zip", "w") as archive:
+        for index in range(3):
+            archive.writestr(f"activities/{index}.tcx", TCX)
+
+    members = list(iter_sources([tmp_path / "export.zip"]))
+    with patch("zipfile.ZipFile", wraps=zipfile.ZipFile) as opened:
+        results = [import_file(member) for member in members]
+    assert [result.error for result in results] == [None, None, None]
+    assert opened.call_count <= 1
+
+
+def test_run_import_saves_results(tmp_path):
+    """Test the parallel import writes workouts and streams to the output directory."""
+    source = tmp_path / "source"
+    source.mkdir()
+    for index in range(6):
+        gpx = GPX.replace("2024-03-02", f"2024-03-{index + 10:02d}")
+        (source / f"ride-{index}.gpx").write_text(gpx)
+
+    stats = run_import([source], output=tmp_path / "out", workers=2)
+    assert (stats.files, stats.imported, stats.failed) == (6, 6, 0)
+    assert stats.files_per_second > 0
+
+    lines = (tmp_path / "out" / "workouts.jsonl").read_text().splitlines()
+    workouts = [Workout.model_validate(json.loads(line)) for line in lines]
+    assert len({workout.id for workout in workouts}) == 6
+    streams = WorkoutStreams.load(tmp_path / "out" / "streams" / f"{workouts[0].id}.npz")
+    assert len(streams) == 121
+    assert (streams["heartrate"][0], streams["heartrate"][20]) == (120, 130)
+    assert np.isnan(streams["heartrate"][10])  # Heart rate dropped out for 20s
+
+    # Importing the same files again replaces the saved workouts instead of adding rows
+    stats = run_import([source], output=tmp_path / "out", workers=2)
+    assert (stats.imported, stats.duplicates) == (6, 6)
+    lines = (tmp_path / "out" / "workouts.jsonl").read_text().splitlines()
+    assert len(lines) == 6
+    assert not (tmp_path / "out" / "workouts.jsonl.tmp").exists()
+    assert not (tmp_path / "out" / "streams.tmp").exists()
+
+
+def test_interrupted_import_keeps_saved_results(tmp_path):
+    """Test that an import failing part way leaves the saved workouts and streams unchanged."""
+    source = tmp_path / "ride.gpx"
+    source.write_text(GPX)
+    run_import([source], output=tmp_path / "out", workers=1)
+    saved = (tmp_path / "out" / "workouts.jsonl").read_text()
+    [streams_file] = (tmp_path / "out" / "streams").iterdir()
+    streams = streams_file.read_bytes()
+
+    def interrupted(paths, workers):
+        result = import_file(ImportSource(str(source)))
+        result.streams = WorkoutStreams(result.streams.time[:10], {})
+        yield result
+        raise KeyboardInterrupt
+
+    with patch.object(pipeline, "import_files", interrupted), pytest.raises(KeyboardInterrupt):
+        run_import([source], output=tmp_path / "out")
+    assert (tmp_path / "out" / "workouts.jsonl").read_text() == saved
+    assert streams_file.read_bytes() == streams
+
+
+def parse_gpx_or_die(stream):
+    """Parse a GPX file, killing the worker process if the file asks for it."""
+    data = stream.read()
+    if data == b"die":
+        os._exit(1)
+    return parse_gpx(io.BytesIO(data))
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork", reason="workers must inherit the patched parser"
+)
+def test_worker_dying_fails_only_its_file(tmp_path):
+    """Test that a worker process dying (e.g. out of memory) fails only the file it was parsing."""
+    for index in range(4):
+        (tmp_path / f"ride-{index}.gpx").write_text(GPX)
+    (tmp_path / "huge.gpx").write_bytes(b"die")
+
+    with patch.dict(pipeline.PARSERS, {".gpx": parse_gpx_or_die}):
+        results = list(import_files([tmp_path], workers=2))
+    failed = [result for result in results if result.error]
+    assert len(results) == 5
+    assert [str(result.source) for result in failed] == [str(tmp_path / "huge.gpx")]
+    assert "Worker process died" in failed[0].error
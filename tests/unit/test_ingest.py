@@ -0,0 +1,89 @@
+"""Tests for bulk activity ingestion."""
+
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from trainer.models import Workout
+from trainer.models.ingest import (
+    NonJSONContentError,
+    construct_workouts,
+    iter_workouts,
+    parse_mcp_content,
+    parse_workouts,
+)
+
+
+@pytest.fixture
+def strava_activities():
+    """Raw activities as returned by the Strava API."""
+    return [
+        {
+            "id": 9000 + i,
+            "name": f"Run {i}",
+            "type": "Run",
+            "start_date": "2025-10-01T06:00:00Z",
+            "distance": 5000.0 + i,
+            "moving_time": 1800 + i,
+            "elapsed_time": 1900 + i,
+            "total_elevation_gain": 12.5,
+            "average_speed": 2.78,
+            "map": {"id": f"a{9000 + i}", "summary_polyline": "_p~iF~ps|U_ulLnnqC_mqNvxq`@"},
+        }
+        for i in range(25)
+    ]
+
+
+def test_parse_workouts_maps_strava_fields(strava_activities):
+    """Test that raw Strava JSON validates into Workout models."""
+    workouts = parse_workouts(json.dumps(strava_activities))
+    assert len(workouts) == 25
+    assert workouts[0].id == "9000"
+    assert workouts[0].duration == 1800
+    assert workouts[0].elevation_gain == 12.5
+    assert workouts[0].polyline == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_construct_workouts_matches_validation(sample_workout_data):
+    """Test that the trusted fast path round-trips validated data."""
+    workout = Workout(**sample_workout_data)
+    assert construct_workouts([workout.model_dump()]) == [workout]
+
+
+def test_parse_mcp_content(strava_activities):
+    """Test parsing workouts from MCP text content blocks."""
+    text = json.dumps(strava_activities)
+    content = [SimpleNamespace(type="text", text=text[:100]), SimpleNamespace(text=text[100:])]
+    assert len(parse_mcp_content(content)) == 25
+
+    # A single activity, as returned by the activity details tool
+    (workout,) = parse_mcp_content([SimpleNamespace(text=json.dumps(strava_activities[0]))])
+    assert workout.id == str(strava_activities[0]["id"])
+
+    with pytest.raises(NonJSONContentError):
+        parse_mcp_content([SimpleNamespace(text="Recent activities: none")])
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_iter_workouts_streams_chunks(strava_activities, chunk_size):
+    """Test incremental decoding across arbitrary chunk boundaries."""
+    data = json.dumps(strava_activities, indent=2).encode()
+    chunks = [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+    workouts = list(iter_workouts(chunks, batch_size=10))
+    assert workouts == parse_workouts(data)
+
+
+def test_iter_workouts_from_file(strava_activities):
+    """Test streaming from a file object."""
+    stream = io.BytesIO(json.dumps(strava_activities).encode())
+    assert len(list(iter_workouts(stream))) == 25
+
+
+def test_iter_workouts_rejects_truncated_input(strava_activities):
+    """Test that truncated input raises instead of silently stopping."""
+    data = json.dumps(strava_activities)
+    with pytest.raises(ValueError):
+        list(iter_workouts([data[:-20]]))
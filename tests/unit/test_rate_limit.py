@@ -0,0 +1,121 @@
+"""Tests for Strava quota tracking and background sync scheduling."""
+
+import asyncio
+
+import pytest
+
+from trainer.tools.rate_limit import (
+    Priority,
+    RateLimitError,
+    RateWindow,
+    StravaRateLimiter,
+    SyncScheduler,
+    current_priority,
+)
+from trainer.utils.cache import SQLiteCache
+
+
+@pytest.mark.asyncio
+async def test_background_requests_keep_headroom():
+    """Test that background requests cannot use the interactive reserve."""
+    limiter = StravaRateLimiter([RateWindow("daily", 10, 86400)], background_share=0.8)
+
+    for _ in range(8):
+        await limiter.acquire(Priority.BACKGROUND)
+    with pytest.raises(RateLimitError):
+        await limiter.acquire(Priority.BACKGROUND, timeout=0.01)
+
+    await limiter.acquire(Priority.INTERACTIVE)
+    metrics = limiter.metrics()
+    assert metrics["remaining_daily"] == 1
+    assert metrics["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_jump_the_queue():
+    """Test that queued interactive requests are served before background ones."""
+    limiter = StravaRateLimiter([RateWindow("short", 1, 0.2)], background_share=1.0)
+    await limiter.acquire()
+
+    served = []
+
+    async def request(name, priority):
+        await limiter.acquire(priority)
+        served.append(name)
+
+    background = asyncio.create_task(request("background", Priority.BACKGROUND))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(request("interactive", Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    assert limiter.metrics()["queue_depth"] == 2
+
+    await asyncio.wait_for(asyncio.gather(background, interactive), timeout=2)
+    assert served == ["interactive", "background"]
+
+
+@pytest.mark.asyncio
+async def test_processes_share_the_quota(tmp_path):
+    """Test that limiters counting in one cache (one per process) share each window."""
+    now = [86400 * 100 + 10.0]
+    first, second = (
+        StravaRateLimiter(
+            [RateWindow("daily", 5, 86400)],
+            background_share=1.0,
+            clock=lambda: now[0],
+            shared=SQLiteCache(tmp_path / "cache.db"),
+        )
+        for _ in range(2)
+    )
+    for limiter in (first, second, first):
+        await limiter.acquire()
+    assert first.metrics()["remaining_daily"] == 2  # As of its last request
+
+    # A restarted process remembers what was used
+    restarted = StravaRateLimiter(
+        [RateWindow("daily", 5, 86400)],
+        clock=lambda: now[0],
+        shared=SQLiteCache(tmp_path / "cache.db"),
+    )
+    await restarted.acquire(Priority.INTERACTIVE)
+    await second.acquire()
+    with pytest.raises(RateLimitError):
+        await first.acquire(timeout=0.05)
+    assert first.metrics()["remaining_daily"] == 0
+
+    # Waiting requests are served once the window resets
+    waiting = asyncio.create_task(second.acquire())
+    await asyncio.sleep(0.05)
+    assert not waiting.done()
+    now[0] += 86400
+    second._wake()
+    await asyncio.wait_for(waiting, timeout=2)
+    assert second.metrics()["remaining_daily"] == 4
+
+
+@pytest.mark.asyncio
+async def test_sync_scheduler_runs_at_background_priority():
+    """Test that registered athletes are synced in the background."""
+    limiter = StravaRateLimiter([RateWindow("daily", 100, 86400)])
+    scheduler = SyncScheduler(interval=0.05, limiter=limiter)
+    assert scheduler.limiter is limiter  # Even though its queue is empty (so it is falsy)
+    priorities = {}
+
+    def make_sync(athlete_id):
+        async def sync():
+            priorities[athlete_id] = current_priority()
+
+        return sync
+
+    for athlete_id in (1, 2, 3):
+        scheduler.register(athlete_id, make_sync(athlete_id))
+    scheduler.unregister(3)
+
+    scheduler.start()
+    await asyncio.sleep(0.2)
+    await scheduler.stop()
+
+    assert priorities == {1: Priority.BACKGROUND, 2: Priority.BACKGROUND}
+    assert current_priority() == Priority.INTERACTIVE
+    metrics = scheduler.metrics()
+    assert metrics["athletes"] == 2
+    assert metrics["syncs_completed"] >= 2
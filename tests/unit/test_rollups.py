@@ -0,0 +1,185 @@
+"""Tests for incrementally maintained training rollups."""
+
+import json
+import random
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from trainer.models import Workout
+from trainer.sync import (
+    ActivityBackfill,
+    ActivityRollups,
+    ActivityStore,
+    Period,
+    backfill,
+    get_training_rollups,
+    rollups,
+    store,
+)
+from trainer.sync.rollups import period_start, previous_period
+from trainer.utils.cache import SQLiteCache
+
+TODAY = date(2025, 10, 8)  # A Wednesday
+
+
+def workout(activity_id, day, type="Run", distance=10000.0, duration=3000, elevation=50.0):
+    """Build a workout starting at 07:00 UTC on a day."""
+    start = datetime(day.year, day.month, day.day, 7, tzinfo=timezone.utc)  # noqa: UP017
+    return Workout(
+        id=str(activity_id),
+        name=f"Activity {activity_id}",
+        type=type,
+        start_date=start,
+        distance=distance,
+        duration=duration,
+        elevation_gain=elevation,
+    )
+
+
+def tool_result(value):
+    """Wrap a value the way the Strava tools return MCP content."""
+    return {"status": "success", "data": [SimpleNamespace(text=json.dumps(value))]}
+
+
+def test_rollups_follow_edits_and_deletes():
+    """Test that edits move activities between weeks and sports, and deletes remove them."""
+    activities = ActivityStore()
+    totals = ActivityRollups()
+    activities.add_listener(totals.on_activity_change)
+
+    activities.upsert(1, workout(1, date(2025, 10, 6)))
+    activities.upsert(1, workout(2, date(2025, 10, 7), type="Ride", distance=40000))
+    activities.upsert(1, workout(3, date(2025, 9, 30)))
+    (this_week,) = totals.table(1, periods=1, today=TODAY)
+    assert this_week.start == date(2025, 10, 6)
+    assert (this_week.totals.count, this_week.totals.distance) == (2, 50000)
+
+    # Edit: last week's run was really this week's ride
+    activities.upsert(1, workout(3, date(2025, 10, 8), type="Ride", distance=20000))
+    last_week, this_week = totals.table(1, periods=2, sport_type="Ride", today=TODAY)
+    assert last_week.totals.count == 0
+    assert (this_week.totals.count, this_week.totals.distance) == (2, 60000)
+    assert totals.sport_types(1) == ["Ride", "Run"]
+
+    activities.delete(1, "1")
+    assert totals.sport_types(1) == ["Ride"]
+    activities.forget(1)
+    assert totals.table(1, Period.MONTH, periods=3, today=TODAY)[-1].totals.count == 0
+
+
+def test_rollups_match_recomputation():
+    """Test that many random changes leave the same totals as aggregating from scratch."""
+    rng = random.Random(7)
+    activities = ActivityStore()
+    totals = ActivityRollups()
+    activities.add_listener(totals.on_activity_change)
+    for _ in range(2000):
+        activity_id = rng.randrange(300)
+        if rng.random() < 0.2:
+            activities.delete(1, str(activity_id))
+        else:
+            day = TODAY - timedelta(days=rng.randrange(200))
+            activities.upsert(1, workout(activity_id, day, rng.choice(["Run", "Ride"])))
+
+    for period in Period:
+        for row in totals.table(1, period, periods=10, sport_type="Run", today=TODAY):
+            expected = [
+                activity
+                for activity in activities.activities(1)
+                if activity.type == "Run"
+                and period_start(activity.start_date.date(), period) == row.start
+            ]
+            assert row.totals.count == len(expected)
+            assert abs(row.totals.distance - sum(a.distance for a in expected)) < 1e-6
+            assert abs(row.totals.elevation - sum(a.elevation_gain for a in expected)) < 1e-6
+
+
+@pytest.mark.asyncio
+async def test_training_rollups_tool(monkeypatch, tmp_path):
+    """Test the agent tool backfills an empty store, then follows other processes' changes."""
+    this_month = datetime.now(timezone.utc).date().replace(day=1)  # noqa: UP017
+    last_month = previous_period(this_month, Period.MONTH)
+    recent = [workout(1, last_month + timedelta(days=2), duration=5400, elevation=120)]
+    fetched = []
+
+    async def fetch_profile():
+        return tool_result({"id": 42})
+
+    async def fetch_activities(per_page):
+        fetched.append(per_page)
+        return tool_result([activity.model_dump(mode="json") for activity in recent])
+
+    activities = ActivityStore(tmp_path / "activities.db")
+    monkeypatch.setattr(store, "_activity_store", activities)
+    monkeypatch.setattr(rollups, "_activity_rollups", None)
+    monkeypatch.setattr(
+        backfill,
+        "_activity_backfill",
+        ActivityBackfill(
+            activities,
+            fetch_profile=fetch_profile,
+            fetch_activities=fetch_activities,
+            shared=SQLiteCache(tmp_path / "cache.db"),
+        ),
+    )
+
+    result = await get_training_rollups(42, period="month", periods=2)
+    assert result["status"] == "success"
+    assert result["sport_types"] == ["Run"]
+    header, previous, current = result["table"].splitlines()
+    assert header.split() == ["month", "count", "km", "hours", "elev_m", "load"]
+    assert previous.split() == [last_month.isoformat(), "1", "10.0", "1.5", "120", "90"]
+    assert current.split()[1] == "0"
+
+    # A change written by another process (e.g. the webhook receiver), with no new backfill
+    ActivityStore(tmp_path / "activities.db").upsert(42, workout(2, this_month, distance=5000))
+    result = await get_training_rollups(42, period="month", periods=1)
+    assert result["table"].splitlines()[1].split()[1:3] == ["1", "5.0"]
+    assert len(fetched) == 1
+
+    # Other athletes can't be backfilled, and aren't tried again
+    assert (await get_training_rollups(7))["status"] == "error"
+    assert (await get_training_rollups(7))["status"] == "error"
+    assert len(fetched) == 1
+    assert (await get_training_rollups(42, period="fortnight"))["status"] == "error"
+
+
+def test_rollups_use_local_dates():
+    """Test that activities count towards the week they started in, in local time."""
+    totals = ActivityRollups()
+    # Monday morning in Sydney, which is still Sunday in UTC
+    monday = workout(1, date(2025, 10, 5)).model_copy(
+        update={
+            "start_date": datetime(2025, 10, 5, 21, tzinfo=timezone.utc),  # noqa: UP017
+            "start_date_local": datetime(2025, 10, 6, 8, tzinfo=timezone.utc),  # noqa: UP017
+        }
+    )
+    totals.add(1, monday)
+    last_week, this_week = totals.table(1, periods=2, today=TODAY)
+    assert (last_week.totals.count, this_week.totals.count) == (0, 1)
+
+
+def test_current_period_follows_local_date():
+    """Test that the current week starts on the athlete's Monday, ahead of UTC."""
+    totals = ActivityRollups()
+    # A Monday morning run in Sydney (UTC+11), which started on Sunday in UTC
+    monday = workout(1, date(2025, 10, 5)).model_copy(
+        update={
+            "start_date": datetime(2025, 10, 5, 21, tzinfo=timezone.utc),  # noqa: UP017
+            "start_date_local": datetime(2025, 10, 6, 8, tzinfo=timezone.utc),  # noqa: UP017
+        }
+    )
+    assert monday.utc_offset == timedelta(hours=11)
+    totals.add(1, monday)
+
+    # An hour later it is still Sunday in UTC, but the athlete's week has begun
+    now = datetime(2025, 10, 5, 22, tzinfo=timezone.utc)  # noqa: UP017
+    assert totals.today(1, now) == date(2025, 10, 6)
+    (this_week,) = totals.table(1, periods=1, today=totals.today(1, now))
+    assert (this_week.start, this_week.totals.count) == (date(2025, 10, 6), 1)
+
+    # Athletes without local start times use UTC
+    totals.add(2, workout(2, date(2025, 10, 5)))
+    assert totals.today(2, now) == date(2025, 10, 5)
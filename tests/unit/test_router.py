@@ -0,0 +1,67 @@
+"""Tests for routing requests between a fast and a larger model."""
+
+import pytest
+
+from trainer.agents.router import ModelRouter, Route
+
+
+@pytest.fixture
+def router():
+    return ModelRouter(fast_model="fast-model", heavy_model="heavy-model")
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "What was my distance yesterday?",
+        "How far did I run last week?",
+        "What's my average heart rate on my last run?",
+        "thanks!",
+        "When did I last ride?",
+    ],
+)
+def test_lookups_use_fast_model(router, message):
+    """Test that quick lookups are routed to the fast model."""
+    assert router.classify(message).route == Route.FAST
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "Create a 24-week marathon training plan for me",
+        "Analyze my last month of running and tell me why my pace has plateaued",
+        "Can you build me a periodized schedule to taper for my race?",
+        "Compare my cycling trends this year and recommend how I should improve my FTP",
+        "Analyze my last run",
+        "Design a training block for my first 50k ultra",
+        "Am I overtraining?",
+        "What should I do to get faster at 5k?",
+        "What weekly mileage do I need to run a sub-3 marathon? I'm averaging 35 miles a "
+        "week with a longest run of 16 miles, and my half marathon time is 1:29.",
+    ],
+)
+def test_planning_and_analysis_use_heavy_model(router, message):
+    """Test that planning and in-depth analysis are routed to the larger model."""
+    decision = router.classify(message)
+    assert decision.route == Route.HEAVY
+    assert decision.reason
+
+
+def test_long_messages_use_heavy_model(router):
+    """Test that long, detailed requests are routed to the larger model."""
+    message = "Here is some background about my running. " * 12
+    assert router.classify(message).route == Route.HEAVY
+
+
+def test_latency_metrics(router):
+    """Test that latency is tracked separately per route."""
+    for latency in (0.5, 1.5, 1.0):
+        router.record(Route.FAST, latency)
+    router.record(Route.HEAVY, 8.0)
+
+    metrics = router.metrics()
+    assert metrics["fast_requests"] == 3
+    assert metrics["fast_latency_median"] == 1.0
+    assert metrics["heavy_requests"] == 1
+    assert metrics["heavy_latency_total"] == 8.0
+    assert router.model_for(Route.HEAVY) == "heavy-model"
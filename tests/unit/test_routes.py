@@ -0,0 +1,178 @@
+"""Tests for polylines and repeated route clustering."""
+
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from trainer.models import Workout
+from trainer.routes import (
+    AthleteRoutes,
+    RouteIndex,
+    clustering,
+    decode_polyline,
+    decode_polylines,
+    encode_polyline,
+    get_repeated_routes,
+    get_route_efforts,
+)
+from trainer.sync import ActivityBackfill, ActivityStore, backfill, store
+from trainer.utils.cache import SQLiteCache
+
+HOME = (51.75, -1.26)
+START = datetime(2025, 1, 6, 7, tzinfo=timezone.utc)  # noqa: UP017
+
+
+def encode(path):
+    """Encode a path of east/north offsets from HOME, in meters."""
+    latitude = HOME[0] + path[:, 1] / 111_320
+    longitude = HOME[1] + path[:, 0] / (111_320 * np.cos(np.radians(HOME[0])))
+    return encode_polyline(latitude, longitude)
+
+
+def tool_result(value):
+    """Wrap a value the way the Strava tools return MCP content."""
+    return {"status": "success", "data": [SimpleNamespace(text=json.dumps(value))]}
+
+
+def loop(radius=800.0, detour=0.0, points=200):
+    """A circular loop, optionally bulging out by ``detour`` meters on one side."""
+    angle = np.linspace(0, 2 * np.pi, points)
+    bulge = radius + detour * np.clip(np.sin(angle), 0, None) ** 4
+    return bulge[:, None] * np.column_stack([np.cos(angle), np.sin(angle)])
+
+
+def effort(activity_id, path, days=0, duration=1800, heartrate=150.0, type="Run", seed=0):
+    """Build a workout following a path with GPS noise."""
+    noisy = path + np.random.default_rng(seed).normal(0, 5, path.shape)
+    return Workout(
+        id=str(activity_id),
+        name=f"Activity {activity_id}",
+        type=type,
+        start_date=START + timedelta(days=days),
+        distance=float(np.hypot(*np.diff(path, axis=0).T).sum()),
+        duration=duration,
+        average_heartrate=heartrate,
+        polyline=encode(noisy),
+    )
+
+
+def test_polyline_round_trip():
+    """Test decoding against the reference example and round-tripping in batches."""
+    points = decode_polyline("_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+    assert np.allclose(points, [[38.5, -120.2], [40.7, -120.95], [43.252, -126.453]])
+    assert encode_polyline(points[:, 0], points[:, 1]) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+    rng = np.random.default_rng(1)
+    paths = [HOME + rng.normal(0, 0.01, (n, 2)) for n in (1, 50, 0, 7)]
+    encoded = [encode_polyline(p[:, 0], p[:, 1]) for p in paths]
+    for path, decoded in zip(paths, decode_polylines(encoded), strict=True):
+        assert decoded.shape == path.shape
+        assert np.allclose(decoded, path, rtol=0, atol=1e-5)
+    with pytest.raises(ValueError):
+        decode_polylines(["_p~iF~ps|U_ulL"])
+
+
+def test_route_index_clusters_repeated_routes():
+    """Test that loops match either way round and from any start, but detours do not."""
+    route = loop()
+    reversed_shifted = np.roll(route[::-1], 70, axis=0)
+    index = RouteIndex()
+    added = index.add(
+        [
+            effort(1, route, days=0, seed=1),
+            effort(2, reversed_shifted, days=7, seed=2),
+            effort(3, loop(detour=400), days=8, seed=3),
+            effort(4, route[:100], days=9, seed=4),  # Half the loop
+            effort(5, route, days=10, type="Ride", seed=5),
+            effort(6, route, days=14, seed=6),
+            Workout(
+                id="7", name="Treadmill", type="Run", start_date=START, distance=5000, duration=1500
+            ),
+        ]
+    )
+    assert added == 6
+    assert "7" not in index
+
+    (repeated,) = index.routes(min_efforts=2)
+    assert repeated.id == "1"
+    assert [e.id for e in repeated.efforts] == ["1", "2", "6"]
+    assert index.route_of("3") is not index.route_of("1")
+    assert index.route_of("4") is not index.route_of("1")
+    assert index.route_of("5").sport_type == "Ride"
+    assert len(index.routes(min_efforts=1)) == 4
+
+
+def test_route_efforts_trends():
+    """Test comparing efforts on a route over time."""
+    index = RouteIndex()
+    index.add(
+        effort(i, loop(), days=30 * i, duration=1800 - 30 * i, heartrate=150 - i, seed=i)
+        for i in range(4)
+    )
+    (route,) = index.routes()
+    assert route.speed_trend() > 1.5  # About 30 s faster per month on 30 minutes
+    assert route.heartrate_trend() == pytest.approx(-1.0)
+
+    summary = clustering.format_routes([route]).splitlines()[1].split()
+    assert summary[:3] == ["0", "Run", "4"]
+    assert summary[-2:] == [f"{route.speed_trend():+.1f}%/mo", "-1.0/mo"]
+    efforts = clustering.format_route_efforts(route).splitlines()
+    assert len(efforts) == 5
+    assert efforts[-1].split()[-1] == "147"
+
+
+@pytest.mark.asyncio
+async def test_athlete_routes_follow_store(monkeypatch, tmp_path):
+    """Test that the agent tools backfill an empty store and follow synced changes."""
+    fetched = []
+
+    async def fetch_profile():
+        return tool_result({"id": 42})
+
+    async def fetch_activities(per_page):
+        fetched.append(per_page)
+        recent = [effort(i, loop(), days=i, seed=i) for i in range(3)]
+        return tool_result([activity.model_dump(mode="json") for activity in recent])
+
+    activities = ActivityStore(tmp_path / "activities.db")
+    routes = AthleteRoutes(activities)
+    activities.add_listener(routes.on_activity_change)
+    monkeypatch.setattr(store, "_activity_store", activities)
+    monkeypatch.setattr(clustering, "_athlete_routes", routes)
+    monkeypatch.setattr(
+        backfill,
+        "_activity_backfill",
+        ActivityBackfill(
+            activities,
+            fetch_profile=fetch_profile,
+            fetch_activities=fetch_activities,
+            shared=SQLiteCache(tmp_path / "cache.db"),
+        ),
+    )
+
+    assert (await get_repeated_routes(42))["count"] == 1
+    index = routes.index(42)
+
+    # New activities join the index as they sync, including those written by
+    # other processes (e.g. the webhook receiver); renames are updated in place
+    ActivityStore(tmp_path / "activities.db").upsert(42, effort(3, loop(), days=3, seed=3))
+    renamed = activities.get(42, "0").model_copy(update={"name": "Park loop"})
+    activities.upsert(42, renamed)
+    assert routes.index(42) is index
+    assert len(index.route_of("3").efforts) == 4
+    assert [e.name for e in index.route_of("3").efforts][0] == "Park loop"
+
+    # Deleting an activity rebuilds the index on next use
+    activities.delete(42, "0")
+    result = await get_route_efforts(42, "3")
+    assert result["status"] == "success"
+    assert routes.index(42) is not index
+    assert len(result["efforts"].splitlines()) == 4
+    assert result["route"].splitlines()[1].split()[0] == "1"
+    assert len(fetched) == 1
+
+    assert (await get_route_efforts(42, "0"))["status"] == "error"
+    assert (await get_repeated_routes(7))["status"] == "error"
@@ -0,0 +1,188 @@
+"""Tests for fair-share scheduling of LLM requests."""
+
+import asyncio
+
+import pytest
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import Field
+
+from trainer.agents.scheduler import PRUNE_USERS, LLMScheduler, SchedulerOverloadedError
+
+
+class FakeLlm(BaseLlm):
+    """Model that records the order calls start and reports token usage."""
+
+    model: str = "fake-model"
+    tokens: int = 0
+    started: list[str] = Field(default_factory=list)
+    release: asyncio.Event = Field(default_factory=asyncio.Event)
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.started.append(llm_request.contents[-1].parts[0].text)
+        await self.release.wait()
+        for _ in range(2):
+            usage = types.GenerateContentResponseUsageMetadata(total_token_count=self.tokens)
+            yield LlmResponse(usage_metadata=usage)
+
+
+def request(message):
+    return LlmRequest(contents=[types.Content(role="user", parts=[types.Part(text=message)])])
+
+
+async def drain(scheduler, runner, user_id, message, cost=1.0):
+    model = scheduler.model(runner, user_id, cost)
+    return [response async for response in model.generate_content_async(request(message))]
+
+
+@pytest.mark.asyncio
+async def test_light_user_is_not_starved_by_heavy_user():
+    """Test that a light user's requests overtake a heavy user's backlog."""
+    scheduler = LLMScheduler(max_in_flight=1, tokens_per_minute=None)
+    runner = FakeLlm()
+    tasks = [asyncio.create_task(drain(scheduler, runner, "heavy", f"h{i}", 4.0)) for i in range(4)]
+    await asyncio.sleep(0)
+    tasks += [asyncio.create_task(drain(scheduler, runner, "light", f"l{i}")) for i in range(2)]
+    await asyncio.sleep(0)
+    assert scheduler.metrics()["queued"] == 5
+
+    runner.release.set()
+    await asyncio.gather(*tasks)
+    assert runner.started == ["h0", "l0", "l1", "h1", "h2", "h3"]
+    assert scheduler.metrics()["completed"] == 6
+
+
+@pytest.mark.asyncio
+async def test_per_user_concurrency_limit():
+    """Test that one user cannot take all the global capacity."""
+    scheduler = LLMScheduler(max_in_flight=4, max_in_flight_per_user=2, tokens_per_minute=None)
+    runner = FakeLlm()
+    tasks = [asyncio.create_task(drain(scheduler, runner, "a", f"a{i}")) for i in range(3)]
+    tasks.append(asyncio.create_task(drain(scheduler, runner, "b", "b0")))
+    await asyncio.sleep(0.01)
+
+    assert sorted(runner.started) == ["a0", "a1", "b0"]
+    metrics = scheduler.metrics()
+    assert (metrics["in_flight"], metrics["queued"]) == (3, 1)
+    runner.release.set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_sheds_when_queue_is_full_or_wait_too_long():
+    """Test load shedding on queue limits and on queue wait timeouts."""
+    scheduler = LLMScheduler(
+        max_in_flight=1, max_queued_per_user=1, tokens_per_minute=None, max_queue_wait=0.05
+    )
+    runner = FakeLlm()
+    running = asyncio.create_task(drain(scheduler, runner, "a", "a0"))
+    queued = asyncio.create_task(drain(scheduler, runner, "a", "a1"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(SchedulerOverloadedError, match="already queued"):
+        await drain(scheduler, runner, "a", "a2")
+    with pytest.raises(SchedulerOverloadedError, match="waited more than"):
+        await queued
+    assert scheduler.metrics()["queued"] == 0
+
+    runner.release.set()
+    await running
+    assert scheduler.metrics()["shed"] == 2
+    assert runner.started == ["a0"]
+
+
+@pytest.mark.asyncio
+async def test_token_budget_is_charged_and_refilled():
+    """Test that users over their token budget are shed until it refills."""
+    now = [0.0]
+    scheduler = LLMScheduler(tokens_per_minute=600, clock=lambda: now[0])
+    runner = FakeLlm(tokens=500)
+    runner.release.set()
+
+    await drain(scheduler, runner, "a", "a0")  # Leaves the budget at -400 (two responses)
+    with pytest.raises(SchedulerOverloadedError, match="token budget"):
+        await drain(scheduler, runner, "a", "a1")
+    await drain(scheduler, runner, "b", "b0")  # Other users are unaffected
+
+    now[0] = 41.0  # 410 tokens refilled
+    await drain(scheduler, runner, "a", "a1")
+    assert runner.started == ["a0", "b0", "a1"]
+    assert scheduler.metrics()["queue_wait_p99"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_slot_is_released_before_responses_are_consumed():
+    """Test that a call holds its slot only while the model generates."""
+    scheduler = LLMScheduler(max_in_flight=1, tokens_per_minute=None)
+    runner = FakeLlm()
+    runner.release.set()
+
+    responses = scheduler.model(runner, "a").generate_content_async(request("a0"))
+    await anext(responses)
+    # The caller is still consuming (e.g. running tools), but the slot is free
+    assert scheduler.metrics()["in_flight"] == 0
+    await drain(scheduler, runner, "b", "b0")
+    assert [response async for response in responses]
+    assert runner.started == ["a0", "b0"]
+
+
+@pytest.mark.asyncio
+async def test_shed_requests_do_not_advance_fair_queuing():
+    """Test that a request shed from the queue is not held against its user."""
+    scheduler = LLMScheduler(max_in_flight=1, tokens_per_minute=None, max_queue_wait=0.05)
+    runner = FakeLlm()
+    running = asyncio.create_task(drain(scheduler, runner, "b", "b0"))
+    await asyncio.sleep(0)
+    with pytest.raises(SchedulerOverloadedError, match="waited more than"):
+        await drain(scheduler, runner, "a", "a0", cost=100.0)
+
+    tasks = [asyncio.create_task(drain(scheduler, runner, user, f"{user}1")) for user in "ac"]
+    await asyncio.sleep(0)
+    runner.release.set()
+    await asyncio.gather(running, *tasks)
+    assert runner.started == ["b0", "a1", "c1"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("gives_up", ["cancel", "timeout"])
+async def test_waiter_giving_up_as_a_slot_is_released(gives_up):
+    """Test that a request abandoned in the same tick as a release takes no slot."""
+    scheduler = LLMScheduler(
+        max_in_flight=1,
+        tokens_per_minute=None,
+        max_queue_wait=0 if gives_up == "timeout" else None,
+    )
+    await scheduler.acquire("a")
+    waiter = asyncio.create_task(scheduler.acquire("b"))
+    await asyncio.sleep(0)  # Queued; a zero timeout has already cancelled the wait
+    if gives_up == "cancel":
+        waiter.cancel()
+    scheduler.release("a")
+
+    expected = asyncio.CancelledError if gives_up == "cancel" else SchedulerOverloadedError
+    with pytest.raises(expected):
+        await waiter
+    metrics = scheduler.metrics()
+    assert (metrics["in_flight"], metrics["queued"]) == (0, 0)
+    async with asyncio.timeout(1), scheduler.slot("c"):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_idle_users_are_forgotten():
+    """Test that users are only tracked while they affect scheduling."""
+    now = [0.0]
+    scheduler = LLMScheduler(tokens_per_minute=600, clock=lambda: now[0])
+    runner = FakeLlm(tokens=100)
+    runner.release.set()
+
+    for index in range(PRUNE_USERS):
+        await drain(scheduler, runner, index, "call")
+    await drain(scheduler, runner, "new", "call")
+    assert scheduler.metrics()["users"] == PRUNE_USERS + 1  # Budgets not refilled yet
+
+    now[0] = 60.0
+    for index in range(PRUNE_USERS, 4 * PRUNE_USERS):
+        await drain(scheduler, runner, index, "call")
+        now[0] += 60.0
+    assert scheduler.metrics()["users"] <= 2 * PRUNE_USERS
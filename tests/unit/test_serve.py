@@ -0,0 +1,219 @@
+"""Tests for the multi-worker chat server."""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from starlette.testclient import TestClient
+
+from trainer.serve import AgentPool, Supervisor, create_chat_app
+from trainer.sync import ActivityStore, WebhookProcessor, create_webhook_app
+from trainer.utils.cache import SQLiteCache, lease
+
+
+def idle_worker(ready):
+    """A worker that is ready at once and runs until terminated."""
+    ready.set()
+    while True:
+        time.sleep(0.1)
+
+
+def wait_for(condition, timeout=10.0):
+    """Wait until a condition holds."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def test_chat_app_reuses_agents_per_session():
+    """Test that sessions keep their agent until evicted, and bad requests are rejected."""
+    agents = []
+
+    def factory(user_id, session_id):
+        agent = MagicMock()
+        agent.process_message = AsyncMock(return_value=f"reply to {user_id}/{session_id}")
+        agents.append(agent)
+        return agent
+
+    pool = AgentPool(factory, max_sessions=2)
+    with TestClient(create_chat_app(pool)) as client:
+        for session in ("a", "a", "b", "c"):
+            response = client.post(
+                "/chat", json={"user_id": "u1", "session_id": session, "message": "hi"}
+            )
+            assert response.status_code == 200
+            assert response.json() == {"reply": f"reply to u1/{session}", "worker": os.getpid()}
+
+        assert len(agents) == 3
+        assert agents[0].process_message.await_count == 2
+        agents[0].close.assert_called_once()  # Session "a" was least recently used
+        assert client.post("/chat", json={"user_id": "u1", "message": ""}).status_code == 400
+
+        agents[2].process_message.side_effect = RuntimeError("boom")
+        response = client.post("/chat", json={"user_id": "u1", "session_id": "c", "message": "hi"})
+        assert response.status_code == 500
+
+        metrics = client.get("/metrics").json()
+        assert metrics["requests"] == 5
+        assert metrics["failed"] == 1
+        assert metrics["in_flight"] == 0
+        assert metrics["sessions"] == 2
+        assert metrics["evicted_sessions"] == 1
+        assert client.get("/health").json()["status"] == "ok"
+
+    # Shutting the app down closes the remaining agents
+    assert all(agent.close.called for agent in agents)
+
+
+def test_chat_app_receives_webhook_events():
+    """Test that workers serve the Strava webhook receiver alongside the chat API."""
+    store = ActivityStore()
+
+    async def fetch_activity(activity_id):
+        activity = {"id": int(activity_id), "name": "Run", "type": "Run", "distance": 5000.0}
+        activity.update(start_date="2024-01-15T08:00:00Z", moving_time=1800)
+        return {"status": "success", "data": [SimpleNamespace(text=json.dumps(activity))]}
+
+    webhook = create_webhook_app(WebhookProcessor(store, fetch_activity), "secret")
+    event = {
+        "object_type": "activity",
+        "object_id": 1,
+        "aspect_type": "create",
+        "owner_id": 42,
+        "subscription_id": 1,
+        "event_time": 1516126040,
+    }
+    with TestClient(create_chat_app(AgentPool(MagicMock()), webhook)) as client:
+        challenge = {"hub.mode": "subscribe", "hub.verify_token": "secret", "hub.challenge": "c"}
+        assert client.get("/strava/webhook", params=challenge).json() == {"hub.challenge": "c"}
+        assert client.post("/strava/webhook", json=event).status_code == 200
+        # The receiver's processor runs with the chat application
+        wait_for(lambda: client.get("/strava/metrics").json()["processed"] == 1)
+        assert client.get("/metrics").json()["requests"] == 0
+
+    assert store.totals(42).count == 1
+
+
+@pytest.mark.asyncio
+async def test_workers_answer_a_session_one_message_at_a_time(tmp_path):
+    """Test that pools sharing a cache (one per worker) never answer a session concurrently."""
+    answering = []
+    overlaps = []
+    concurrency = []
+
+    def factory(user_id, session_id):
+        async def process_message(message):
+            overlaps.append(sum(key == session_id for key in answering))
+            concurrency.append(len(answering))
+            answering.append(session_id)
+            await asyncio.sleep(0.1)
+            answering.remove(session_id)
+            return message
+
+        agent = MagicMock()
+        agent.process_message = process_message
+        return agent
+
+    workers = [AgentPool(factory, shared=SQLiteCache(tmp_path / "cache.db")) for _ in range(2)]
+    messages = [(worker, session) for session in ("a", "b") for worker in workers * 2]
+    replies = await asyncio.gather(
+        *(
+            worker.process_message("u1", session, f"{session}{i}")
+            for i, (worker, session) in enumerate(messages)
+        )
+    )
+    assert replies == [f"{session}{i}" for i, (_, session) in enumerate(messages)]
+    assert overlaps == [0] * len(messages)
+    # Different sessions are answered at the same time
+    assert max(concurrency) == 1
+
+
+def test_sqlite_cache_expiry(tmp_path):
+    """Test that values expire, and are visible to other connections."""
+    cache = SQLiteCache(tmp_path / "cache.db")
+    cache.set("fresh", "1", ttl=60)
+    cache.set("stale", "2", ttl=-1)
+
+    other = SQLiteCache(tmp_path / "cache.db")
+    assert other.get("fresh").value == "1"
+    assert other.get("fresh").age < 60
+    assert other.get("stale") is None
+    assert other.purge() == 1
+
+    cache.delete("fresh")
+    assert other.get("fresh") is None
+    cache.close()
+    other.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_leases(tmp_path):
+    """Test that one holder at a time gets a lease, and waiters see the holder's work."""
+    cache = SQLiteCache(tmp_path / "cache.db")
+    other = SQLiteCache(tmp_path / "cache.db")
+    owner = cache.acquire("job", ttl=60)
+    assert owner is not None
+    assert other.acquire("job", ttl=60) is None
+    other.release("job", "someone else")
+    assert other.acquire("job", ttl=60) is None
+    cache.release("job", owner)
+    assert other.acquire("expired", ttl=-1) is not None
+    assert cache.acquire("expired", ttl=60) is not None
+
+    # Waiters take the lease once it is released, unless the work is done by then
+    done = []
+
+    async def work(name):
+        async def is_done():
+            return bool(done)
+
+        async with lease(other if name == "b" else cache, "job", 60, is_done) as run:
+            if run:
+                await asyncio.sleep(0.2)
+                done.append(name)
+
+    await asyncio.gather(work("a"), work("b"), work("c"))
+    assert len(done) == 1
+    async with lease(None, "job", 60) as run:
+        assert run
+    cache.close()
+    other.close()
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="needs the fork start method"
+)
+def test_supervisor_restarts_and_replaces_workers():
+    """Test rolling restarts, replacing a worker that dies, and stopping."""
+    supervisor = Supervisor(idle_worker, workers=2, drain_timeout=1, start_method="fork")
+    thread = threading.Thread(target=supervisor.run)
+    thread.start()
+    try:
+        wait_for(supervisor.ready)
+        original = supervisor.pids
+        assert len(original) == 2
+
+        supervisor.request_restart()
+        wait_for(lambda: supervisor.restarts == 1 and supervisor.ready())
+        restarted = supervisor.pids
+        assert set(restarted).isdisjoint(original)
+
+        os.kill(restarted[0], 9)
+        wait_for(lambda: supervisor.replaced == 1 and supervisor.ready())
+        assert restarted[0] not in supervisor.pids
+        assert restarted[1] in supervisor.pids
+    finally:
+        supervisor.request_stop()
+        thread.join(timeout=30)
+    assert not thread.is_alive()
+    assert supervisor.pids == []
+
+    with pytest.raises(ValueError):
+        Supervisor(idle_worker, workers=0)
@@ -0,0 +1,356 @@
+"""Tests for the athlete context snapshot."""
+
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from trainer.agents.snapshot import SnapshotCache, build_athlete_snapshot
+from trainer.agents.trainer_agent import TrainerAgent
+from trainer.models import Workout
+from trainer.sync import ActivityChange, ActivityStore
+from trainer.utils.cache import SQLiteCache
+
+NOW = datetime(2025, 10, 8, 12, 0, tzinfo=timezone.utc)  # noqa: UP017
+
+
+def tool_result(value):
+    """Wrap a value the way the Strava tools return MCP content."""
+    text = value if isinstance(value, str) else json.dumps(value)
+    return {"status": "success", "data": [SimpleNamespace(type="text", text=text)]}
+
+
+@pytest.fixture
+def profile():
+    """Athlete profile tool result."""
+    return tool_result({"id": 42, "firstname": "Alex", "city": "Leeds", "bikes": [{"id": "b1"}]})
+
+
+@pytest.fixture
+def activities():
+    """Recent activities tool result."""
+    return tool_result(
+        [
+            {
+                "id": 1,
+                "name": "Easy Run",
+                "type": "Run",
+                "start_date": "2025-10-07T07:00:00Z",
+                "distance": 8000.0,
+                "moving_time": 2880,
+                "average_heartrate": 141.0,
+            },
+            {
+                "id": 2,
+                "name": "Long Ride",
+                "type": "Ride",
+                "start_date": "2025-09-20T09:00:00Z",
+                "distance": 80000.0,
+                "moving_time": 10800,
+            },
+        ]
+    )
+
+
+def test_build_snapshot(profile, activities):
+    """Test that the snapshot summarizes profile, stats, load and activities."""
+    stats = tool_result({"recent_run_totals": {"count": 1, "distance": 8000.0}})
+    snapshot = build_athlete_snapshot(profile, stats, activities, now=NOW)
+
+    assert snapshot.athlete_id == 42
+    assert snapshot.profile == {"id": 42, "firstname": "Alex", "city": "Leeds"}
+    assert [window.activities for window in snapshot.recent_load] == [1, 2]
+    assert snapshot.recent_activities[0].startswith("2025-10-07 Run 'Easy Run' (id 1): 8.00 km")
+
+    prompt = snapshot.to_prompt()
+    assert f"version {snapshot.version}" in prompt
+    assert '"recent_run_totals"' in prompt
+    assert "Acute:chronic load ratio" in prompt
+
+
+def test_snapshot_version_tracks_content(profile, activities):
+    """Test that the version only changes when the data changes."""
+    first = build_athlete_snapshot(profile, None, activities, now=NOW)
+    later = build_athlete_snapshot(profile, None, activities, now=NOW.replace(hour=13))
+    assert first.version == later.version
+
+    changed = build_athlete_snapshot(tool_result({"id": 42}), None, activities, now=NOW)
+    assert changed.version != first.version
+
+
+def test_snapshot_tolerates_errors_and_text():
+    """Test that failed or non-JSON tool results don't break the snapshot."""
+    error = {"status": "error", "error_message": "MCP unavailable"}
+    snapshot = build_athlete_snapshot(error, None, tool_result("No recent activities"), now=NOW)
+    assert snapshot.athlete_id is None
+    assert snapshot.profile is None
+    assert snapshot.recent_activities == ["No recent activities"]
+
+
+@pytest.mark.asyncio
+async def test_athlete_snapshot_refresh(mock_genai_client):
+    """Test that the snapshot is injected and only re-fetched when stale."""
+    first = SimpleNamespace(version="v1", athlete_id=None, to_prompt=lambda: "ATHLETE SNAPSHOT v1")
+    fetch = AsyncMock(side_effect=[first, SimpleNamespace(version="v1", athlete_id=None), first])
+
+    with patch("trainer.agents.trainer_agent.fetch_athlete_snapshot", fetch):
+        agent = TrainerAgent()
+        assert await agent.refresh_snapshot() is first
+        assert agent._instruction(None).endswith("ATHLETE SNAPSHOT v1")
+
+        # Fresh snapshots are reused without fetching
+        await agent.refresh_snapshot()
+        assert fetch.await_count == 1
+
+        # Re-fetching unchanged data keeps the existing snapshot
+        await agent.invalidate_snapshot()
+        assert await agent.refresh_snapshot() is first
+        assert fetch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_sessions_share_athlete_snapshot(mock_genai_client):
+    """Test that a user's sessions share one snapshot, fetched once."""
+    snapshot = SimpleNamespace(
+        version="v1", athlete_id=None, to_prompt=lambda: "ATHLETE SNAPSHOT v1"
+    )
+    fetch = AsyncMock(return_value=snapshot)
+
+    with patch("trainer.agents.trainer_agent.fetch_athlete_snapshot", fetch):
+        web = TrainerAgent(user_id="alex", session_id="web")
+        mobile = TrainerAgent(user_id="alex", session_id="mobile")
+        other = TrainerAgent(user_id="sam")
+        await asyncio.gather(web.refresh_snapshot(), mobile.refresh_snapshot())
+
+        assert fetch.await_count == 1
+        assert web.snapshot is mobile.snapshot is snapshot
+        assert other.snapshot is None
+
+        web.close()
+        assert mobile.snapshot is snapshot
+        mobile.close()
+        assert web.snapshots.metrics()["users"] == 1  # Only the other user's
+        assert web.snapshots.metrics()["athletes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cache_shares_one_fetch(profile, activities):
+    """Test that concurrent sessions share a fetch and unchanged data keeps the snapshot."""
+    cache = SnapshotCache()
+    fetched = []
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        fetched.append(build_athlete_snapshot(profile, None, activities, now=NOW))
+        return fetched[-1]
+
+    for _ in range(3):
+        cache.attach("alex")
+    snapshots = await asyncio.gather(*(cache.refresh("alex", fetch, 900) for _ in range(3)))
+    assert len(fetched) == 1
+    assert snapshots[0] is snapshots[1] is snapshots[2] is cache.get("alex")
+    assert cache.metrics() == {
+        "athletes": 1,
+        "users": 1,
+        "sessions": 3,
+        "fetches": 1,
+        "joined_fetches": 2,
+        "shared_hits": 0,
+    }
+
+    # An activity change for the athlete re-fetches once; unchanged content is not swapped
+    cache.on_activity_change(ActivityChange(42, "1", None, None))
+    assert await cache.refresh("alex", fetch, 900) is snapshots[0]
+    assert await cache.refresh("alex", fetch, 900) is snapshots[0]
+    assert len(fetched) == 2
+
+    for _ in range(3):
+        cache.detach("alex")
+    assert cache.get("alex") is None
+    assert cache.metrics()["athletes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cache_invalidated_during_fetch(profile, activities):
+    """Test that a snapshot invalidated while it was being fetched is fetched again."""
+    cache = SnapshotCache()
+    cache.attach("alex")
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return build_athlete_snapshot(profile, None, activities, now=NOW)
+
+    refresh = asyncio.create_task(cache.refresh("alex", fetch, 900))
+    await asyncio.sleep(0)
+    await cache.invalidate("alex")
+    release.set()
+    assert (await refresh).athlete_id == 42
+    await cache.refresh("alex", fetch, 900)
+    assert cache.fetches == 2
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cache_shared_between_processes(tmp_path, profile, activities):
+    """Test that caches sharing a SQLite file (one per worker) reuse each other's fetches."""
+    fetched = []
+
+    async def fetch():
+        fetched.append(build_athlete_snapshot(profile, None, activities, now=NOW))
+        return fetched[-1]
+
+    first = SnapshotCache(shared=SQLiteCache(tmp_path / "cache.db"))
+    second = SnapshotCache(shared=SQLiteCache(tmp_path / "cache.db"))
+    snapshot = await first.refresh("alex", fetch, 900)
+    assert (await second.refresh("alex", fetch, 900)).version == snapshot.version
+    assert len(fetched) == 1
+    assert second.metrics()["shared_hits"] == 1
+
+    # Invalidating in one worker makes the next refresh in any worker fetch again
+    await first.invalidate("alex")
+    await SnapshotCache(shared=SQLiteCache(tmp_path / "cache.db")).refresh("alex", fetch, 900)
+    assert len(fetched) == 2
+    # Forced refreshes always fetch
+    await second.refresh("alex", fetch, 900, force=True)
+    assert len(fetched) == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_in_several_processes_fetch_once(tmp_path, profile, activities):
+    """Test that workers refreshing at the same time wait for the one holding the lease."""
+    release = asyncio.Event()
+    fetched = []
+
+    async def fetch():
+        await release.wait()
+        fetched.append(build_athlete_snapshot(profile, None, activities, now=NOW))
+        return fetched[-1]
+
+    workers = [SnapshotCache(shared=SQLiteCache(tmp_path / "cache.db")) for _ in range(3)]
+    refreshes = [asyncio.ensure_future(cache.refresh("alex", fetch, 900)) for cache in workers]
+    await asyncio.sleep(0.3)
+    release.set()
+    snapshots = await asyncio.gather(*refreshes)
+    assert len(fetched) == 1
+    assert {snapshot.version for snapshot in snapshots} == {fetched[0].version}
+    assert sum(cache.metrics()["shared_hits"] for cache in workers) == 2
+
+
+@pytest.mark.asyncio
+async def test_users_of_one_athlete_share_a_snapshot(profile, activities):
+    """Test that snapshots are kept per fetched athlete, whichever user asked."""
+    cache = SnapshotCache()
+    fetches = []
+
+    async def fetch():
+        fetches.append(build_athlete_snapshot(profile, None, activities, now=NOW))
+        return fetches[-1]
+
+    cache.attach("alex")
+    cache.attach("sam")
+    await cache.refresh("alex", fetch, 900)
+    await cache.refresh("sam", fetch, 900)
+    assert cache.get("alex") is cache.get("sam")
+    assert (cache.metrics()["athletes"], cache.metrics()["users"]) == (1, 2)
+
+    # A change to the athlete's activities invalidates the snapshot for both users
+    cache.on_activity_change(ActivityChange(42, "1", None, None, NOW.timestamp() + 1))
+    await cache.refresh("sam", fetch, 900)
+    await cache.refresh("alex", fetch, 900)
+    assert len(fetches) == 3
+
+    # Changes made before the snapshot was fetched leave it fresh
+    cache.on_activity_change(ActivityChange(42, "2", None, None, NOW.timestamp() - 1))
+    await cache.refresh("alex", fetch, 900)
+    assert len(fetches) == 3
+
+    cache.detach("alex")
+    assert cache.get("sam") is not None
+    cache.detach("sam")
+    assert cache.metrics()["athletes"] == 0
+
+
+@pytest.mark.asyncio
+async def test_snapshot_of_unknown_athlete_is_invalidated_by_any_change(activities):
+    """Test that a snapshot without an athlete ID (profile not JSON) still goes stale."""
+    cache = SnapshotCache()
+    cache.attach("alex")
+    fetch = AsyncMock(
+        side_effect=lambda: build_athlete_snapshot(tool_result("Alex"), None, activities, now=NOW)
+    )
+    assert (await cache.refresh("alex", fetch, 900)).athlete_id is None
+
+    cache.on_activity_change(ActivityChange(42, "1", None, None, NOW.timestamp() + 1))
+    await cache.refresh("alex", fetch, 900)
+    assert fetch.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_activity_changes_invalidate_other_processes_snapshots(
+    tmp_path, profile, activities, sample_workout_data
+):
+    """Test that a change written by the webhook process reaches another process's snapshots."""
+    fetches = []
+
+    async def fetch():
+        now = datetime.now(timezone.utc)  # noqa: UP017
+        fetches.append(build_athlete_snapshot(profile, None, activities, now=now))
+        return fetches[-1]
+
+    def worker():
+        store = ActivityStore(tmp_path / "activities.db")
+        cache = SnapshotCache(shared=SQLiteCache(tmp_path / "cache.db"), store=store)
+        store.add_listener(cache.on_activity_change)
+        cache.attach("alex")
+        return cache
+
+    first, second = worker(), worker()
+    await first.refresh("alex", fetch, 900)
+    await second.refresh("alex", fetch, 900)
+    assert len(fetches) == 1
+
+    webhook = ActivityStore(tmp_path / "activities.db")
+    webhook.upsert(42, Workout(**sample_workout_data))
+    await second.refresh("alex", fetch, 900)
+    assert len(fetches) == 2
+    # The first worker applies the same change, then uses the newer shared snapshot
+    await first.refresh("alex", fetch, 900)
+    assert len(fetches) == 2
+    assert first.metrics()["shared_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot_cache_uses_sqlite_in_worker_threads(
+    tmp_path, profile, activities, sample_workout_data
+):
+    """Test that refreshes, invalidations and the store listener never block the event loop."""
+    shared = SQLiteCache(tmp_path / "cache.db")
+    threads = set()
+    for name in ("get", "set", "delete", "acquire", "release"):
+
+        def call(*args, _method=getattr(shared, name), **kwargs):
+            threads.add(threading.get_ident())
+            return _method(*args, **kwargs)
+
+        setattr(shared, name, call)
+
+    store = ActivityStore(tmp_path / "activities.db")
+    cache = SnapshotCache(shared=shared, store=store)
+    store.add_listener(cache.on_activity_change)
+    cache.attach("alex")
+    fetch = AsyncMock(
+        side_effect=lambda: build_athlete_snapshot(profile, None, activities, now=NOW)
+    )
+    await cache.refresh("alex", fetch, 900)
+    await store.upsert_async(42, Workout(**sample_workout_data))
+    await cache.refresh("alex", fetch, 900)
+    assert fetch.await_count == 2
+    await cache.invalidate("alex")
+    assert await cache.shared.read(42) is None
+
+    assert threads
+    assert threading.get_ident() not in threads
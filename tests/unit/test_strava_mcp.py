@@ -0,0 +1,37 @@
+"""Tests for the Strava MCP tools."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from trainer.tools import strava_mcp
+
+
+class FakeSession:
+    """MCP session stand-in that records how many calls are in flight."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def call_tool(self, name, arguments):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=name)])
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_share_session_concurrently(monkeypatch):
+    """Test that tool calls are not serialized on the shared session."""
+    session = FakeSession()
+    monkeypatch.setattr(strava_mcp, "_mcp_session", session)
+
+    profile, activities = await asyncio.gather(
+        strava_mcp.get_athlete_profile(), strava_mcp.get_recent_activities(per_page=5)
+    )
+
+    assert profile["status"] == activities["status"] == "success"
+    assert session.max_in_flight == 2
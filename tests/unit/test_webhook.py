@@ -0,0 +1,269 @@
+"""Tests for the Strava webhook receiver, using a local stand-in for Strava."""
+
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from starlette.testclient import TestClient
+
+from trainer.models.ingest import parse_workouts
+from trainer.sync import (
+    ActivityBackfill,
+    ActivityStore,
+    WebhookEvent,
+    WebhookProcessor,
+    create_webhook_app,
+)
+from trainer.tools.rate_limit import RateWindow, StravaRateLimiter, SyncScheduler
+
+ATHLETE_ID = 134815
+
+
+def make_event(activity_id: int, aspect_type: str = "create", **updates: str) -> dict:
+    """Build a synthetic push event shaped like Strava's."""
+    return {
+        "object_type": "activity",
+        "object_id": activity_id,
+        "aspect_type": aspect_type,
+        "owner_id": ATHLETE_ID,
+        "subscription_id": 120475,
+        "event_time": 1516126040,
+        "updates": updates,
+    }
+
+
+class FakeStrava:
+    """Serves activity details from memory and records which were fetched."""
+
+    def __init__(self):
+        self.activities: dict[str, dict] = {}
+        self.fetched: list[str] = []
+
+    def put(self, activity_id: int, name: str, distance: float = 5000.0) -> None:
+        self.activities[str(activity_id)] = {
+            "id": activity_id,
+            "name": name,
+            "type": "Run",
+            "start_date": "2024-01-15T08:00:00Z",
+            "distance": distance,
+            "moving_time": 1800,
+        }
+
+    async def fetch(self, activity_id: str) -> dict:
+        self.fetched.append(activity_id)
+        if activity_id not in self.activities:
+            return {"status": "error", "error_message": "Record Not Found"}
+        text = json.dumps(self.activities[activity_id])
+        return {"status": "success", "data": [SimpleNamespace(text=text)]}
+
+    async def profile(self) -> dict:
+        text = json.dumps({"id": ATHLETE_ID, "firstname": "Alex"})
+        return {"status": "success", "data": [SimpleNamespace(text=text)]}
+
+    async def recent(self, per_page: int) -> dict:
+        text = json.dumps(list(self.activities.values())[-per_page:])
+        return {"status": "success", "data": [SimpleNamespace(text=text)]}
+
+
+def wait_for(client: TestClient, processed: int, timeout: float = 5.0) -> dict:
+    """Poll the metrics endpoint until the processor has handled enough events."""
+    deadline = time.monotonic() + timeout
+    while True:
+        metrics = client.get("/metrics").json()
+        if metrics["processed"] + metrics["failed"] >= processed:
+            return metrics
+        assert time.monotonic() < deadline, f"events not processed: {metrics}"
+        time.sleep(0.01)
+
+
+def test_subscription_validation():
+    """Test the hub challenge handshake and rejection of a wrong token."""
+    app = create_webhook_app(WebhookProcessor(ActivityStore(), FakeStrava().fetch), "secret")
+    with TestClient(app) as client:
+        params = {"hub.mode": "subscribe", "hub.verify_token": "secret", "hub.challenge": "15f7"}
+        response = client.get("/webhook", params=params)
+        assert response.status_code == 200
+        assert response.json() == {"hub.challenge": "15f7"}
+
+        params["hub.verify_token"] = "wrong"
+        assert client.get("/webhook", params=params).status_code == 403
+
+
+def test_events_update_store_incrementally():
+    """Test that create, update and delete events are applied to the store."""
+    strava = FakeStrava()
+    strava.put(1, "Morning Run")
+    strava.put(2, "Evening Run", distance=10000.0)
+    store = ActivityStore()
+    app = create_webhook_app(WebhookProcessor(store, strava.fetch), "secret")
+
+    with TestClient(app) as client:
+        assert client.post("/webhook", json=make_event(1)).status_code == 200
+        assert client.post("/webhook", json=make_event(2)).status_code == 200
+        wait_for(client, processed=2)
+        assert store.totals(ATHLETE_ID).count == 2
+        assert store.totals(ATHLETE_ID).distance == 15000.0
+
+        strava.put(1, "Renamed Run")
+        client.post("/webhook", json=make_event(1, "update", title="Renamed Run"))
+        client.post("/webhook", json=make_event(2, "delete"))
+        metrics = wait_for(client, processed=4)
+
+    assert metrics["failed"] == 0
+    assert store.get(ATHLETE_ID, "1").name == "Renamed Run"
+    assert store.get(ATHLETE_ID, "2") is None
+    assert store.totals(ATHLETE_ID).distance == 5000.0
+    assert strava.fetched == ["1", "2", "1"]
+
+
+def test_backfill_runs_with_webhook():
+    """Test that the scheduled backfill fills the store with recent activities."""
+    strava = FakeStrava()
+    strava.put(1, "Morning Run")
+    strava.put(2, "Evening Run")
+    store = ActivityStore()
+    backfill = ActivityBackfill(store, fetch_profile=strava.profile, fetch_activities=strava.recent)
+    scheduler = SyncScheduler(interval=60, limiter=StravaRateLimiter([RateWindow("daily", 10, 1)]))
+    scheduler.register("authenticated", backfill.run)
+    app = create_webhook_app(WebhookProcessor(store, strava.fetch), "secret", scheduler)
+
+    with TestClient(app) as client:
+        deadline = time.monotonic() + 5
+        while client.get("/metrics").json()["sync_syncs_completed"] < 1:
+            assert time.monotonic() < deadline, "backfill did not run"
+            time.sleep(0.01)
+
+    assert store.totals(ATHLETE_ID).count == 2
+    strava.put(3, "Long Run")
+    assert asyncio.run(backfill.run()) == 1  # Only the new activity
+
+
+def test_malformed_event_and_failed_fetch():
+    """Test that bad events are rejected and failed fetches are counted."""
+    store = ActivityStore()
+    app = create_webhook_app(WebhookProcessor(store, FakeStrava().fetch), "secret")
+
+    with TestClient(app) as client:
+        assert client.post("/webhook", json={"object_type": "club"}).status_code == 400
+        client.post("/webhook", json=make_event(99))
+        metrics = wait_for(client, processed=1)
+
+    assert metrics["failed"] == 1
+    assert len(store) == 0
+
+
+@pytest.mark.asyncio
+async def test_events_coalesce_and_deauthorization_forgets_athlete():
+    """Test that queued events for one activity share a fetch, and deauthorization."""
+    strava = FakeStrava()
+    strava.put(1, "Morning Run")
+    store = ActivityStore()
+    processor = WebhookProcessor(store, strava.fetch)
+
+    for aspect_type in ("create", "update", "update"):
+        processor.submit(WebhookEvent.model_validate(make_event(1, aspect_type)))
+    processor.start()
+    await asyncio.wait_for(processor.join(), 1.0)
+    assert strava.fetched == ["1"]
+    assert processor.metrics()["coalesced"] == 2
+
+    processor.submit(
+        WebhookEvent.model_validate(
+            {
+                **make_event(ATHLETE_ID, "update", authorized="false"),
+                "object_type": "athlete",
+            }
+        )
+    )
+    await asyncio.wait_for(processor.join(), 1.0)
+    await processor.stop()
+    assert len(store) == 0
+    assert store.totals(ATHLETE_ID).count == 0
+
+
+@pytest.mark.asyncio
+async def test_store_shares_changes_between_processes(tmp_path):
+    """Test that changes synced into a persisted store reach other processes' listeners."""
+    strava = FakeStrava()
+    strava.put(1, "Morning Run")
+    strava.put(2, "Evening Run")
+    webhook_store = ActivityStore(tmp_path / "activities.db")
+    processor = WebhookProcessor(webhook_store, strava.fetch)
+
+    agent_store = ActivityStore(tmp_path / "activities.db")
+    changes = []
+    agent_store.add_listener(changes.append)
+
+    async def apply(*events):
+        for event in events:
+            processor.submit(WebhookEvent.model_validate(event))
+        processor.start()
+        await asyncio.wait_for(processor.join(), 1.0)
+
+    await apply(make_event(1), make_event(2))
+    assert agent_store.sync() == 2
+
+    # Unchanged re-fetches are not written again; the delete is
+    await apply(make_event(1, "update"), make_event(2, "delete"))
+    await processor.stop()
+    assert agent_store.sync() == 1
+    assert [(c.activity_id, c.previous is None, c.current is None) for c in changes] == [
+        ("1", True, False),
+        ("2", True, False),
+        ("2", False, True),
+    ]
+    assert [w.name for w in agent_store.activities(ATHLETE_ID)] == ["Morning Run"]
+    assert agent_store.totals(ATHLETE_ID).count == 1
+
+    # A process started later loads the current state when it syncs; reads
+    # only see the changes applied so far
+    later_store = ActivityStore(tmp_path / "activities.db")
+    assert len(later_store) == 0
+    assert later_store.sync() == 2  # Each activity's latest version
+    assert len(later_store) == 1
+    webhook_store.forget(ATHLETE_ID)
+    assert len(agent_store) == 1
+    assert agent_store.sync() == 1
+    assert len(agent_store) == 0
+
+
+@pytest.mark.asyncio
+async def test_async_store_methods_apply_changes_in_the_loop_thread(tmp_path):
+    """Test that coroutines' writes query the database in threads but notify in the loop."""
+    store = ActivityStore(tmp_path / "activities.db")
+    threads = []
+    store.add_listener(lambda change: threads.append(threading.get_ident()))
+    strava = FakeStrava()
+    strava.put(1, "Morning Run")
+    [workout] = parse_workouts(json.dumps([strava.activities["1"]]))
+
+    assert await store.upsert_async(ATHLETE_ID, workout) is None
+    assert await store.upsert_async(ATHLETE_ID, workout) == workout
+    assert await store.delete_async(ATHLETE_ID, "1") == workout
+    await store.upsert_async(ATHLETE_ID, workout)
+    await store.forget_async(ATHLETE_ID)
+    assert threads == [threading.get_ident()] * 4
+    assert len(store) == 0
+    assert await ActivityStore(tmp_path / "activities.db").sync_async() == 1
+
+
+@pytest.mark.asyncio
+async def test_text_activity_details_are_skipped():
+    """Test that activity details formatted as text are skipped rather than failing."""
+
+    async def fetch(activity_id):
+        return {"status": "success", "data": [SimpleNamespace(text="🏃 Morning Run: 5.00 km")]}
+
+    store = ActivityStore()
+    processor = WebhookProcessor(store, fetch)
+    processor.submit(WebhookEvent.model_validate(make_event(1)))
+    processor.start()
+    await asyncio.wait_for(processor.join(), 1.0)
+    await processor.stop()
+
+    assert processor.metrics()["skipped"] == 1
+    assert processor.metrics()["failed"] == 0
+    assert len(store) == 0
@@ -0,0 +1,73 @@
+"""Tests for the column-oriented workout table."""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from trainer.models import Workout, WorkoutTable
+
+
+@pytest.fixture
+def workouts(sample_workout_data):
+    """A small mixed set of workouts."""
+    start = datetime(2025, 10, 1, 6, 0, tzinfo=timezone.utc)  # noqa: UP017
+    rows = []
+    for day, activity_type in enumerate(["Run", "Ride", "Run", "Swim", "Run"]):
+        data = {
+            **sample_workout_data,
+            "id": str(1000 + day),
+            "type": activity_type,
+            "start_date": start + timedelta(days=day),
+            "distance": 1000.0 * (day + 1),
+            "elevation_gain": None if activity_type == "Swim" else 10.0,
+        }
+        rows.append(Workout(**data))
+    return rows
+
+
+def test_round_trip(workouts):
+    """Test that rows convert back to identical Workout models."""
+    table = WorkoutTable.from_workouts(workouts)
+    assert len(table) == 5
+    assert table.types == ("Run", "Ride", "Swim")
+    assert table.to_workouts() == workouts
+    assert table[-1] == workouts[-1]
+    assert table[3].elevation_gain is None
+
+
+def test_filter(workouts):
+    """Test vectorized filtering by type and start date."""
+    table = WorkoutTable.from_workouts(workouts)
+
+    runs = table.filter(type="Run")
+    assert list(runs.id) == ["1000", "1002", "1004"]
+
+    window = table.filter(
+        type=["Run", "Ride"],
+        start=datetime(2025, 10, 2, tzinfo=timezone.utc),  # noqa: UP017
+        end=datetime(2025, 10, 4, tzinfo=timezone.utc),  # noqa: UP017
+    )
+    assert [workout.id for workout in window] == ["1001", "1002"]
+
+
+def test_aggregation(workouts):
+    """Test totals, means and per-type summaries."""
+    table = WorkoutTable.from_workouts(workouts)
+    assert table.total("distance") == 15000.0
+    assert table.mean("elevation_gain") == 10.0
+    assert table.filter(type="Swim").mean("elevation_gain") is None
+
+    summary = table.summary_by_type()
+    assert summary["Run"]["count"] == 3
+    assert summary["Run"]["distance"] == 9000.0
+    assert summary["Swim"]["elevation_gain"] == 0.0
+
+
+def test_empty_table():
+    """Test that an empty table behaves sensibly."""
+    table = WorkoutTable.from_workouts([])
+    assert len(table) == 0
+    assert table.total("distance") == 0.0
+    assert table.summary_by_type() == {}
+    assert np.array_equal(table.type, np.array([], dtype=str))